@@ -1,5 +1,5 @@
 param(
-  [ValidateSet('Detect','ValidateExport','ValidateCsv','Apply','All')]
+  [ValidateSet('Detect','ValidateExport','ValidateCsv','Apply','All','Run')]
   [string]$Action = 'Detect',
   [string]$Text = 'examples\ambiguous_narrative_ru.txt',
   [string]$RunDir = 'examples_out\run1',
@@ -57,6 +57,11 @@ switch ($Action) {
     Write-Host "Done. Outputs in $RunDir"
     break
   }
+  'Run' {
+    Write-Host "In-memory run -> $outTxt, $report"
+    & $Python -m redactru.cli run $Text --out $outTxt --report $report --mapping $mapping
+    break
+  }
   default {
     throw "Unknown action: $Action"
   }
@@ -1,6 +1,7 @@
 import json, argparse, sys
 from pathlib import Path
-from hybrid.aggregator import HybridAnonymizer
+from hybrid.aggregator import DEFAULT_PROCESS_CHUNK, HybridAnonymizer
+from hybrid.profiles import DEFAULT_PROFILE, PROFILES
 
 def main():
     p = argparse.ArgumentParser()
@@ -8,19 +9,49 @@ def main():
     p.add_argument("--out", default=None, help="выходной .jsonl со спанами")
     p.add_argument("--device", choices=["cpu", "cuda"], default=None,
                    help="устройство для NER: cpu или cuda (по умолчанию авто)")
+    p.add_argument("--workers", type=int, default=None,
+                   help="CPU: число процессов NER (шардирование по предложениям)")
+    p.add_argument("--threads", type=int, default=None,
+                   help="CPU: потоков torch на процесс (по умолчанию 1 при --workers)")
+    p.add_argument("--quantize", action="store_true",
+                   help="CPU: int8-квантованная NER-модель (быстрее, возможна потеря полноты)")
+    p.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                   help="профиль: этапы, пороги, бюджет времени (hybrid/profiles.py)")
+    p.add_argument("--budget-ms", type=float, default=None,
+                   help="бюджет времени на документ, мс (переопределяет профиль)")
+    p.add_argument("--ner-cache", default=None,
+                   help="кеш NER по предложениям (SQLite), напр. data/ner_cache.sqlite")
+    p.add_argument("--chunk-chars", type=int, default=DEFAULT_PROCESS_CHUNK,
+                   help="символов в куске обработки; спаны пишутся по мере готовности кусков")
     args = p.parse_args()
 
     text = Path(args.path).read_text(encoding="utf-8")
-    az = HybridAnonymizer(device=args.device)
-    spans = az.process(text)
-
+    az = HybridAnonymizer(device=args.device, workers=args.workers, threads=args.threads,
+                          quantize=args.quantize, profile=args.profile, ner_cache=args.ner_cache)
     out = args.out or (Path(args.path).with_suffix(".hybrid.jsonl"))
-    with open(out, "w", encoding="utf-8") as f:
-        for s in spans:
-            f.write(json.dumps({
-                "start": s.start, "end": s.end, "text": s.text,
-                "type": s.type, "score": round(s.score, 4), "meta": s.meta
-            }, ensure_ascii=False) + "\n")
+    skipped, truncated, elapsed = set(), {}, 0.0
+    try:
+        with open(out, "w", encoding="utf-8") as f:
+            # куски пишутся сразу: спаны всего документа в памяти не копятся
+            for spans in az.iter_process(text, chunk_chars=args.chunk_chars, budget_ms=args.budget_ms):
+                for s in spans:
+                    f.write(json.dumps({
+                        "start": s.start, "end": s.end, "text": s.text,
+                        "type": s.type, "score": round(s.score, 4), "meta": s.meta
+                    }, ensure_ascii=False) + "\n")
+                f.flush()
+                skipped.update(spans.skipped_stages)
+                for k, v in spans.truncated.items():
+                    truncated.setdefault(k, v)  # первая позиция, где этап обрезан
+                elapsed += spans.elapsed_ms
+        if args.ner_cache:
+            print(f"ner cache: {az.ner.cache.stats()}", file=sys.stderr)
+    finally:
+        az.close()
+
+    if skipped or truncated:
+        print(f"degraded: skipped={sorted(skipped)} truncated={truncated} "
+              f"({elapsed:.0f} ms)", file=sys.stderr)
     print(f"ok: {out}")
 
 if __name__ == "__main__":
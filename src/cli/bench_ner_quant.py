@@ -0,0 +1,90 @@
+"""Сравнение float32 и int8 (динамическое квантование) CPU-NER на корпусах.
+
+Для каждого файла: скорость обеих моделей (лучшее из --repeat, после прогрева)
+и согласие int8 с float32 по сущностям (float32 — эталон): точное совпадение
+(start, end, label) → precision/recall/F1, в целом и по меткам. Помогает
+решить, стоит ли ускорение потери полноты.
+
+    python src/cli/bench_ner_quant.py examples/ambiguous_corpus_ru.txt examples/ambiguous_narrative_ru.txt --threads 1
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+from hybrid.ner_stanza import StanzaNER
+from hybrid.parallel import set_torch_threads
+
+
+def _timed(ner, text, repeat):
+    spans = ner.find(text)  # прогрев
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        ner.find(text)
+        best = min(best, time.perf_counter() - t0)
+    return spans, best
+
+
+def _agreement(ref, got):
+    r = {(s.start, s.end, s.label) for s in ref}
+    g = {(s.start, s.end, s.label) for s in got}
+    tp = len(r & g)
+    p = tp / len(g) if g else 1.0
+    rc = tp / len(r) if r else 1.0
+    f1 = 2 * p * rc / (p + rc) if p + rc else 0.0
+    by_label = {}
+    for lab in sorted({x[2] for x in r | g}):
+        rl = {x for x in r if x[2] == lab}
+        gl = {x for x in g if x[2] == lab}
+        by_label[lab] = {"ref": len(rl), "int8": len(gl), "recall": round(len(rl & gl) / len(rl), 4) if rl else 1.0}
+    return {"precision": round(p, 4), "recall": round(rc, 4), "f1": round(f1, 4), "by_label": by_label}
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("paths", nargs="+", help="входные файлы .txt")
+    p.add_argument("--threads", type=int, default=1, help="потоков torch (одинаково для обеих моделей)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--cache-dir", default=None, help="кеш int8-модели (по умолчанию data/ner_int8)")
+    p.add_argument("--stanza-dir", default=None, help="локальный каталог моделей stanza (без обращения к сети)")
+    p.add_argument("--json", default=None, help="сохранить результаты в JSON")
+    args = p.parse_args()
+
+    set_torch_threads(args.threads)
+    fp32 = StanzaNER(device="cpu", use_gpu=False, stanza_dir=args.stanza_dir)
+    t0 = time.perf_counter()
+    int8 = StanzaNER(device="cpu", use_gpu=False, quantize=True, quant_cache_dir=args.cache_dir,
+                     stanza_dir=args.stanza_dir)
+    load_s = time.perf_counter() - t0
+    if not int8.quantized:
+        raise SystemExit("quantization failed, see warnings above")
+
+    rows = []
+    for path in args.paths:
+        text = Path(path).read_text(encoding="utf-8")
+        ref, t_fp = _timed(fp32, text, args.repeat)
+        got, t_q = _timed(int8, text, args.repeat)
+        row = {
+            "path": path, "chars": len(text),
+            "fp32_chars_per_s": round(len(text) / t_fp), "int8_chars_per_s": round(len(text) / t_q),
+            "speedup": round(t_fp / t_q, 2),
+            "labels_fp32": dict(Counter(s.label for s in ref)),
+            **_agreement(ref, got),
+        }
+        rows.append(row)
+        print(f"{path}: x{row['speedup']} ({row['fp32_chars_per_s']} -> {row['int8_chars_per_s']} ch/s), "
+              f"P={row['precision']} R={row['recall']} F1={row['f1']}")
+        for lab, d in row["by_label"].items():
+            print(f"  {lab:<5} ref={d['ref']:<5} int8={d['int8']:<5} recall={d['recall']}")
+    print(f"int8 load (incl. cache): {load_s:.2f}s")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"threads": args.threads, "int8_load_s": round(load_s, 3), "files": rows},
+                                              ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"ok: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Бенчмарк масштабирования CPU-NER: 1..N процессов (hybrid.parallel.ShardedNER).
+
+Для каждого числа процессов пул поднимается заново, первый прогон — прогрев
+(загрузка моделей), затем --repeat замеров. Печатает время, символы/с,
+ускорение и эффективность относительно 1 процесса; --json — то же в файл.
+
+    python src/cli/bench_ner_scaling.py examples/ambiguous_corpus_ru.txt --max-workers 8 --threads 1
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+from hybrid.parallel import ShardedNER
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("path", help="входной файл .txt")
+    p.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--threads", type=int, default=1, help="потоков torch на процесс")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--scale", type=int, default=1, help="повторить текст N раз (крупнее документ)")
+    p.add_argument("--json", default=None, help="сохранить результаты в JSON")
+    args = p.parse_args()
+
+    text = Path(args.path).read_text(encoding="utf-8") * args.scale
+    rows = []
+    base = None
+    for n in range(1, args.max_workers + 1):
+        with ShardedNER(workers=n, intra_threads=args.threads) as ner:
+            n_spans = len(ner.find(text))  # прогрев: модели загружены во всех процессах
+            best = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                ner.find(text)
+                best = min(best, time.perf_counter() - t0)
+        base = base or best
+        row = {"workers": n, "threads": args.threads, "seconds": round(best, 4),
+               "chars_per_s": round(len(text) / best), "speedup": round(base / best, 2),
+               "efficiency": round(base / best / n, 2), "spans": n_spans}
+        rows.append(row)
+        print(f"workers={n:<3} {best:8.3f}s {row['chars_per_s']:>10} ch/s "
+              f"x{row['speedup']:<5} eff={row['efficiency']:.2f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"chars": len(text), "runs": rows}, ensure_ascii=False, indent=2),
+                                   encoding="utf-8")
+        print(f"ok: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,24 @@
+import re
+import time
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from functools import partial
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 from .ner_stanza import StanzaNER
-from . import regex_min
+from .parallel import ShardedNER, cpu_stanza_ner, iter_shards, set_torch_threads
 from .dictionaries import RUS_NAME_FIRST, STOP_UNITS, ADDR_MARKERS, LEGAL_SHORT
 from .normalizers import normalize_phone, snils_checksum_ok, addr_incomplete
 from .resolver import resolve_overlaps, Span
-from .profiles import WEIGHTS, THRESHOLDS
+from .profiles import DEFAULT_PROFILE, DEFAULT_RATES, Profile, get_profile
+from redactru.registry import run_detectors
+from redactru.util.context import ContextIndex
+from redactru.util.ids import ID_TYPES, is_valid_id
+from redactru.util.spans import Span as RuleSpan
+
+# детекторы redactru для этапа "regex"; ФИО по правилам — отдельный этап "per_rules"
+REGEX_TYPES = ("SNILS", "PHONE", "ID", "ADDR")
+# regex_strength кандидатов из правил (как было у прежнего hybrid.regex_min);
+# у числовых идентификаторов — score детектора (метка и контрольная сумма)
+REGEX_STRENGTH = {"SNILS": 1.0, "PHONE": 1.0, "ADDR": 0.6, "PER": 1.0}
 
 @dataclass
 class Candidate:
@@ -16,14 +29,75 @@ class Candidate:
     ctx_feat: float = 0.0
     penalty: int = 0
 
+class SpanList(list):
+    """Список Span (как раньше) + сведения о деградации по бюджету времени."""
+    def __init__(self, spans=(), degraded: bool = False, skipped_stages: Tuple[str, ...] = (),
+                 truncated: Optional[Dict[str, int]] = None, elapsed_ms: float = 0.0,
+                 profile: str = DEFAULT_PROFILE):
+        super().__init__(spans)
+        self.degraded = degraded
+        self.skipped_stages = tuple(skipped_stages)
+        self.truncated = dict(truncated or {})   # этап -> сколько символов обработано
+        self.elapsed_ms = elapsed_ms
+        self.profile = profile
+
+DEFAULT_PROCESS_CHUNK = 20000  # символов на кусок в iter_process
+
+# конец предложения или строки — где можно обрезать текст для дорогого этапа
+_CUT_RE = re.compile(r"[.!?…]\s+|\n")
+
+def _cut_prefix(text: str, limit: int) -> int:
+    """Длина префикса ≤ limit, обрезанного по границе предложения (иначе — по пробелу)."""
+    if limit >= len(text):
+        return len(text)
+    cut = 0
+    for m in _CUT_RE.finditer(text, 0, limit):
+        cut = m.end()
+    if cut == 0:
+        cut = text.rfind(" ", 0, limit) + 1
+    return max(cut, 0)
+
 class HybridAnonymizer:
-    def __init__(self, device: Optional[str] = None):
+    def __init__(self, device: Optional[str] = None, workers: Optional[int] = None,
+                 threads: Optional[int] = None, quantize: bool = False,
+                 profile: str | Profile = DEFAULT_PROFILE, ner_cache=None,
+                 batch_wait_ms: Optional[float] = None, batch_size: int = 64,
+                 clock: Callable[[], float] = time.perf_counter):
         """Create anonymizer with optional device selection.
 
         If ``device`` is not provided, GPU availability is detected
         automatically. When a specific device is requested but not
         available, the implementation falls back to CPU.
+
+        On CPU, ``workers`` > 1 shards NER by sentences across that many
+        processes (see ``hybrid.parallel``), each using ``threads`` torch
+        threads (default 1). Without workers, ``threads`` pins the torch
+        thread count of the current process.
+
+        ``quantize`` switches CPU NER to a dynamically quantized int8 model
+        (cached on disk); GPU runs ignore it.
+
+        ``profile`` (name or ``Profile``, see ``hybrid.profiles``) selects the
+        stages, weights, thresholds and the per-document latency budget; its
+        device is used when ``device`` is not given. Profiles without the
+        "ner" stage do not load stanza at all.
+
+        ``ner_cache`` (path or ``hybrid.ner_cache.NerCache``) enables the
+        on-disk per-sentence NER cache: cached sentences skip the model.
+
+        ``batch_wait_ms`` enables dynamic micro-batching for concurrent callers
+        (``hybrid.batching.NerBatcher``): sentences from parallel ``process``
+        calls are collected for up to that many milliseconds or ``batch_size``
+        sentences and sent to the model as one batch. Cache hits bypass it.
+
+        ``clock`` (seconds, monotonic) measures the budget and stage rates;
+        tests inject a fake one.
         """
+        self.profile = get_profile(profile) if isinstance(profile, str) else profile
+        self._clock = clock
+        self._rates = dict(self.profile.rates)
+        if device is None:
+            device = self.profile.device
         use_gpu = False
         if device not in {"cpu", "cuda"}:
             device = None
@@ -44,42 +118,152 @@ class HybridAnonymizer:
 
         self.device = device
         self.use_gpu = use_gpu
-        self.ner = StanzaNER(device=device, use_gpu=use_gpu)
+        if "ner" not in self.profile.stages:
+            self.ner = None
+        elif device == "cpu" and workers and workers > 1:
+            self.ner = ShardedNER(workers=workers, intra_threads=threads or 1,
+                                  factory=partial(cpu_stanza_ner, quantize=quantize))
+        else:
+            if device == "cpu" and threads:
+                set_torch_threads(threads)
+            self.ner = StanzaNER(device=device, use_gpu=use_gpu, quantize=quantize and device == "cpu")
+        if self.ner is not None and batch_wait_ms is not None:
+            from .batching import NerBatcher
+            self.ner = NerBatcher(self.ner, max_batch=batch_size, max_wait_ms=batch_wait_ms)
+        if self.ner is not None and ner_cache is not None:
+            from .ner_cache import CachedNER, NerCache
+            cache = ner_cache if isinstance(ner_cache, NerCache) else NerCache(ner_cache)
+            self.ner = CachedNER(self.ner, cache)
+
+    def close(self) -> None:
+        """Остановить процессы NER (шардирование), поток микропакетов и закрыть кеш NER."""
+        if hasattr(self.ner, "close"):  # ShardedNER, CachedNER, NerBatcher
+            self.ner.close()
 
-    def _context_score(self, text: str, start: int, end: int, t: str) -> float:
-        left = text[max(0, start-24):start].lower()
-        right = text[end:min(len(text), end+24)].lower()
+    def _context_score(self, text: str, start: int, end: int, t: str,
+                       ctx: Optional[ContextIndex] = None) -> float:
         if t == "ADDR":
-            return 1.0 if any(m in left+right for m in ADDR_MARKERS) else 0.0
+            if ctx is None:
+                ctx = ContextIndex(text, markers=ADDR_MARKERS)
+            return 1.0 if ctx.has_marker_near(start, end, 24) else 0.0
         if t == "PER":
-            token = text[start:end].strip().split()[0].lower().strip('.')
+            # view снимает регистр и латинские двойники («Aнна» → «анна»)
+            low = ctx.view.slice(start, end) if ctx is not None else text[start:end].lower()
+            token = low.strip().split()[0].strip('.')
             return 1.0 if token in RUS_NAME_FIRST else 0.0
         return 0.0
 
     def _score(self, c: Candidate) -> float:
-        w = WEIGHTS
+        w = self.profile.weights
         s = (w["ner"]*c.ner_prob + w["regex"]*c.regex_strength +
              w["dict"]*c.dict_hit + w["ctx"]*c.ctx_feat - w["penalty"]*c.penalty)
         return s
 
-    def process(self, text: str, extra_regex_spans: Optional[List[Dict]] = None):
-        cands: List[Candidate] = []
+    # ---- этапы: каждый возвращает кандидатов по тексту (или его префиксу) ----
 
-        # 1) NER → PER/ORG/LOC
+    def _stage_ner(self, text: str, extra_regex_spans=None, ctx=None) -> List[Candidate]:
+        out = []
         for s in self.ner.find(text):
             if s.label in {"PER", "LOC", "ORG"}:
                 t = "PER" if s.label == "PER" else "LOC"
-                cands.append(Candidate(s.start, s.end, s.text, t, ner_prob=s.prob))
+                out.append(Candidate(s.start, s.end, s.text, t, ner_prob=s.prob))
+        return out
+
+    @staticmethod
+    def _rule_candidate(r) -> Candidate:
+        if isinstance(r, dict):  # прежний формат: {"start", "end", "text", "rtype", "strength"}
+            return Candidate(r["start"], r["end"], r["text"], r["rtype"],
+                             regex_strength=r.get("strength", 1.0))
+        return Candidate(r.start, r.end, r.text, r.typ,
+                         regex_strength=REGEX_STRENGTH.get(r.typ, r.score or 1.0))
 
-        # 2) Regex: свои или fallback
-        rx_spans = []
+    def _stage_regex(self, text: str, extra_regex_spans=None, ctx=None) -> List[Candidate]:
+        # готовые спаны (Span из redactru.registry.run_detectors или словари) или детекторы реестра
         if extra_regex_spans:
             rx_spans = extra_regex_spans
         else:
-            rx_spans = [vars(x) for x in regex_min.find(text)]
-        for r in rx_spans:
-            cands.append(Candidate(r["start"], r["end"], r["text"], r["rtype"],
-                                   regex_strength=r.get("strength", 1.0)))
+            rx_spans = run_detectors(text, types=REGEX_TYPES, ctx=ctx)
+        return [self._rule_candidate(r) for r in rx_spans]
+
+    def _stage_per_rules(self, text: str, extra_regex_spans=None, ctx=None) -> List[Candidate]:
+        if extra_regex_spans and any(isinstance(r, RuleSpan) and r.typ == "PER" for r in extra_regex_spans):
+            return []  # ФИО уже пришли в готовых спанах (этап "regex")
+        return [self._rule_candidate(r) for r in run_detectors(text, types=("PER",), ctx=ctx)]
+
+    def _rate(self, stage: str) -> float:
+        return self._rates.get(stage) or DEFAULT_RATES[stage]
+
+    def _observe(self, stage: str, chars: int, dt: float) -> None:
+        if dt > 0 and chars >= 1000:  # уточнить скорость этапа (скользящее среднее)
+            self._rates[stage] = 0.7 * self._rate(stage) + 0.3 * (chars / dt)
+
+    def _run_stages(self, text: str, extra_regex_spans, budget_ms: Optional[float], ctx: ContextIndex,
+                    t0: float):
+        """Этапы профиля по порядку с учётом бюджета. -> (кандидаты, пропущенные, обрезанные).
+
+        t0 — начало process: бюджет уже потрачен на всё до этапа (ContextIndex,
+        предыдущие этапы), и из него заранее вычтена оценка скоринга.
+        """
+        prof = self.profile
+        clock = self._clock
+        reserve_s = len(text) / self._rate("score")
+        cands: List[Candidate] = []
+        skipped: List[str] = []
+        truncated: Dict[str, int] = {}
+        for stage in prof.stages:
+            part = text
+            if budget_ms is not None and stage in prof.expensive:
+                left_s = budget_ms / 1000.0 - (clock() - t0) - reserve_s
+                fits = int(max(left_s, 0.0) * self._rate(stage))
+                if fits < len(text):
+                    n = _cut_prefix(text, fits) if prof.on_budget == "truncate" else 0
+                    if n <= 0:
+                        skipped.append(stage)
+                        continue
+                    part = text[:n]
+                    truncated[stage] = n
+            ts = clock()
+            cands.extend(getattr(self, f"_stage_{stage}")(part, extra_regex_spans, ctx))
+            self._observe(stage, len(part), clock() - ts)
+        return cands, skipped, truncated
+
+    def iter_process(self, text: str, chunk_chars: int = DEFAULT_PROCESS_CHUNK,
+                     budget_ms: Optional[float] = None) -> Iterator[SpanList]:
+        """Как process, но по кускам ~chunk_chars по границам предложений (razdel):
+        спаны каждого куска (в смещениях документа) отдаются по мере готовности,
+        память на NER и скоринг ограничена куском. Бюджет — на весь документ:
+        каждый кусок получает остаток; truncated — позиция в документе."""
+        t0 = self._clock()
+        if budget_ms is None:
+            budget_ms = self.profile.budget_ms
+        for off, chunk in iter_shards(text, chunk_chars):
+            left = None if budget_ms is None else budget_ms - (self._clock() - t0) * 1000.0
+            part = self.process(chunk, budget_ms=left)
+            yield SpanList([Span(s.start + off, s.end + off, s.text, s.type, s.score, s.meta) for s in part],
+                           degraded=part.degraded, skipped_stages=part.skipped_stages,
+                           truncated={k: v + off for k, v in part.truncated.items()},
+                           elapsed_ms=part.elapsed_ms, profile=part.profile)
+
+    def process(self, text: str, extra_regex_spans: Optional[List] = None,
+                budget_ms: Optional[float] = None) -> SpanList:
+        """Спаны по тексту. budget_ms переопределяет бюджет профиля; при нехватке
+        времени дорогие этапы обрезаются/пропускаются, результат — degraded.
+
+        extra_regex_spans — уже найденные правилами спаны: список Span из
+        redactru.registry.run_detectors (тот же, что для detect_candidates) или
+        словари {"start", "end", "text", "rtype", "strength"}; тогда детекторы
+        реестра по тексту повторно не запускаются.
+        """
+        clock = self._clock
+        t0 = clock()
+        if budget_ms is None:
+            budget_ms = self.profile.budget_ms
+        # один на документ: левый контекст для правил и адресные маркеры для скоринга
+        ctx = ContextIndex(text, markers=ADDR_MARKERS)
+
+        # 1-2) этапы профиля: NER → PER/ORG/LOC, regex, правила ФИО
+        cands, skipped, truncated = self._run_stages(text, extra_regex_spans, budget_ms, ctx, t0)
+        ts = clock()
 
         # 3) Фичи + скоринг
         spans: List[Span] = []
@@ -94,9 +278,9 @@ class HybridAnonymizer:
                 dicts = (RUS_NAME_FIRST, LEGAL_SHORT, ADDR_MARKERS)
                 if any(tok in d for d in dicts for tok in tokens):
                     c.dict_hit = 1
-            c.ctx_feat = self._context_score(text, c.start, c.end, c.type)
+            c.ctx_feat = self._context_score(text, c.start, c.end, c.type, ctx)
             sc = self._score(c)
-            thr = THRESHOLDS.get(c.type, 0.7)
+            thr = self.profile.thresholds.get(c.type, 0.7)
             if sc >= thr:
                 m = {"score_parts": {"ner": c.ner_prob, "regex": c.regex_strength,
                                      "dict": c.dict_hit, "ctx": c.ctx_feat, "penalty": c.penalty}}
@@ -107,10 +291,17 @@ class HybridAnonymizer:
                     m["checksum_ok"] = snils_checksum_ok(c.text)
                     if not m["checksum_ok"]:
                         continue
+                if c.type in ID_TYPES:
+                    m["checksum_ok"] = is_valid_id(c.type, c.text)
+                    if not m["checksum_ok"]:
+                        continue
                 if c.type == "ADDR":
                     m["addr_incomplete"] = addr_incomplete(c.text)
                 spans.append(Span(c.start, c.end, c.text, c.type, sc, m))
 
         # 4) Снятие перекрытий
         spans = resolve_overlaps(spans)
-        return spans
+        self._observe("score", len(text), clock() - ts)
+        return SpanList(spans, degraded=bool(skipped or truncated), skipped_stages=skipped,
+                        truncated=truncated, elapsed_ms=(clock() - t0) * 1000.0,
+                        profile=self.profile.name)
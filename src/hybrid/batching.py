@@ -0,0 +1,140 @@
+"""Динамические микропакеты NER для параллельных вызовов (веб-сервис, потоки).
+
+Без планировщика каждый запрос гоняет модель на своём тексте: модель не видит
+полных пакетов, а одновременные вызовы толкаются за неё. NerBatcher — один
+фоновый поток перед моделью:
+
+1. вызывающий режет текст на предложения (razdel) и ставит их в очередь;
+2. поток берёт первое предложение и добирает очередь, пока не наберётся
+   max_batch предложений или не пройдёт max_wait_ms с первого;
+3. пакет сортируется по длине (меньше паддинга в батче модели) и уходит в
+   модель одним вызовом (ner_stanza.batch_find: find_many или склейка);
+4. спаны раздаются по запросам; запрос просыпается, когда готовы все его
+   предложения, и собирает спаны в смещениях своего текста.
+
+Интерфейс — как у StanzaNER (find, find_many), поэтому HybridAnonymizer
+использует его вместо модели (batch_wait_ms=...). Метрики — stats():
+число пакетов, средний и последний размер пакета, глубина очереди.
+"""
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from .ner_stanza import NerSpan, batch_find, split_sentences
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+
+_STOP = object()
+
+
+class _Request:
+    # пишет только фоновый поток; вызывающий читает после done
+    __slots__ = ("results", "pending", "done", "error")
+
+    def __init__(self, n: int):
+        self.results: List[Optional[List[NerSpan]]] = [None] * n
+        self.pending = n
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class NerBatcher:
+    def __init__(self, ner, max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.ner = ner
+        self.model_id = getattr(ner, "model_id", None) or type(ner).__name__
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._q: "queue.Queue" = queue.Queue()
+        self._batches = self._sentences = self._last_batch = self._max_depth = 0
+        self._thread = threading.Thread(target=self._loop, name="ner-batcher", daemon=True)
+        self._thread.start()
+
+    # ---- вызывающие ----
+
+    def find_many(self, texts: Sequence[str]) -> List[List[NerSpan]]:
+        sents = [(i, off, s) for i, t in enumerate(texts) for off, s in split_sentences(t) if s.strip()]
+        out: List[List[NerSpan]] = [[] for _ in texts]
+        if not sents:
+            return out
+        req = _Request(len(sents))
+        for k, (_, _, s) in enumerate(sents):
+            self._q.put((req, k, s))
+        req.done.wait()
+        if req.error is not None:
+            raise req.error
+        for (i, off, _), spans in zip(sents, req.results):
+            for sp in spans:
+                out[i].append(NerSpan(sp.start + off, sp.end + off, texts[i][sp.start + off:sp.end + off],
+                                      sp.label, sp.prob))
+        return out
+
+    def find(self, text: str) -> List[NerSpan]:
+        return self.find_many([text])[0]
+
+    # ---- фоновый поток ----
+
+    def _collect(self, first) -> list:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            left = deadline - time.perf_counter()
+            try:
+                item = self._q.get(timeout=left) if left > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._q.put(_STOP)  # остановимся после этого пакета
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            first = self._q.get()
+            if first is _STOP:
+                return
+            self._max_depth = max(self._max_depth, self._q.qsize() + 1)
+            batch = self._collect(first)
+            batch.sort(key=lambda it: len(it[2]))  # близкие длины — меньше паддинга
+            try:
+                res = batch_find(self.ner, [it[2] for it in batch])
+                err = None
+            except BaseException as e:  # ошибка модели — всем запросам пакета
+                res, err = [[] for _ in batch], e
+            self._batches += 1
+            self._sentences += len(batch)
+            self._last_batch = len(batch)
+            for (req, k, _), spans in zip(batch, res):
+                req.results[k] = spans
+                if err is not None:
+                    req.error = err
+                req.pending -= 1
+                if req.pending == 0:
+                    req.done.set()
+
+    # ---- метрики и остановка ----
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self._batches,
+            "sentences": self._sentences,
+            "avg_batch": self._sentences / self._batches if self._batches else 0.0,
+            "last_batch": self._last_batch,
+            "queue_depth": self._q.qsize(),
+            "max_queue_depth": self._max_depth,
+        }
+
+    def close(self) -> None:
+        """Остановить поток (после уже поставленных в очередь предложений) и закрыть модель."""
+        self._q.put(_STOP)
+        self._thread.join()
+        if hasattr(self.ner, "close"):
+            self.ner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,160 @@
+"""Кеш результатов NER на диске по хешу предложения.
+
+Письма собираются из шаблонов: одни и те же предложения («Прошу рассмотреть
+заявление…», подписи) проходят через NER снова и снова. CachedNER режет текст
+на предложения (razdel), ищет каждое в NerCache по ключу
+
+    sha1(CACHE_VERSION, model_id, нормализованный текст предложения)
+
+и отдаёт модели только промахи — одним вызовом find по склеенным через пустую
+строку предложениям (или find_many, если NER его умеет, см. ShardedNER). Если
+все предложения документа в кеше, модель не вызывается вовсе.
+
+Нормализация сохраняет длину (любой пробельный символ → пробел), поэтому
+спаны хранятся в смещениях относительно начала предложения и переносятся в
+документ без пересчёта. model_id — идентичность модели (StanzaNER.model_id:
+версии torch/stanza, int8); при смене модели старые записи просто не находятся.
+
+Хранилище — SQLite (одна таблица), ограничение по числу записей max_entries:
+при превышении удаляются давно не использованные (LRU по счётчику обращений,
+обращения пишутся пакетом). Метрики — hits/misses/evictions в stats().
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .ner_stanza import NerSpan, batch_find, split_sentences
+
+CACHE_VERSION = "1"
+DEFAULT_CACHE_PATH = Path("data/ner_cache.sqlite")
+DEFAULT_MAX_ENTRIES = 1_000_000
+_SQL_CHUNK = 500          # ключей в одном IN (...)
+_WS_RE = re.compile(r"\s")
+
+
+def normalize_sentence(s: str) -> str:
+    """Ключевая форма предложения той же длины: пробельные символы → пробел."""
+    return _WS_RE.sub(" ", s)
+
+
+def model_id_of(ner) -> str:
+    return getattr(ner, "model_id", None) or type(ner).__name__
+
+
+class NerCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # одно соединение на все потоки (HybridAnonymizer из веб-сервиса), доступ — под замком
+        self._con = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        # WAL: частые короткие транзакции без fsync на каждую
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS ner (key TEXT PRIMARY KEY, spans TEXT NOT NULL, used INTEGER NOT NULL)"
+        )
+        self._con.execute("CREATE INDEX IF NOT EXISTS ner_used ON ner (used)")
+        self._con.commit()
+        row = self._con.execute("SELECT COALESCE(MAX(used), 0), COUNT(*) FROM ner").fetchone()
+        self._clock, self._count = row[0], row[1]
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def key(model_id: str, sentence: str) -> str:
+        h = hashlib.sha1()
+        for part in (CACHE_VERSION, model_id, normalize_sentence(sentence)):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[Tuple[int, int, str, float]]]:
+        """Найденные ключи -> спаны (start, end, label, prob) относительно предложения."""
+        found: Dict[str, List[Tuple[int, int, str, float]]] = {}
+        uniq = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(uniq), _SQL_CHUNK):
+                part = uniq[i:i + _SQL_CHUNK]
+                q = f"SELECT key, spans FROM ner WHERE key IN ({','.join('?' * len(part))})"
+                for k, spans in self._con.execute(q, part):
+                    found[k] = [tuple(x) for x in json.loads(spans)]
+            self._clock += 1
+            if found:  # отметка использования — одним пакетом
+                self._con.executemany("UPDATE ner SET used = ? WHERE key = ?", [(self._clock, k) for k in found])
+                self._con.commit()
+            hit = sum(1 for k in keys if k in found)
+            self.hits += hit
+            self.misses += len(keys) - hit
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, List[Tuple[int, int, str, float]]]]) -> None:
+        with self._lock:
+            self._clock += 1
+            rows = [(k, json.dumps(v, ensure_ascii=False), self._clock) for k, v in items]
+            cur = self._con.executemany("INSERT OR IGNORE INTO ner (key, spans, used) VALUES (?, ?, ?)", rows)
+            self._count += max(cur.rowcount, 0)
+            if self._count > self.max_entries:
+                self._evict()
+            self._con.commit()
+
+    def _evict(self) -> None:
+        # с запасом 10%, чтобы не вытеснять на каждой записи
+        drop = self._count - int(self.max_entries * 0.9)
+        cur = self._con.execute(
+            "DELETE FROM ner WHERE key IN (SELECT key FROM ner ORDER BY used LIMIT ?)", (drop,))
+        self._count -= cur.rowcount
+        self.evictions += cur.rowcount
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": self._count, "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.commit()
+            self._con.close()
+
+
+class CachedNER:
+    """Обёртка над NER (find / find_many) с кешем по предложениям. Интерфейс — как у StanzaNER."""
+
+    def __init__(self, ner, cache: NerCache, model_id: Optional[str] = None):
+        self.ner = ner
+        self.cache = cache
+        self.model_id = model_id or model_id_of(ner)
+
+    def find(self, text: str) -> List[NerSpan]:
+        sents = split_sentences(text)
+        keys = [self.cache.key(self.model_id, s) for _, s in sents]
+        found = self.cache.get_many(keys)
+
+        miss_idx: Dict[str, int] = {}  # одинаковые предложения-промахи — в модель один раз
+        for i, k in enumerate(keys):
+            if k not in found and k not in miss_idx:
+                miss_idx[k] = i
+        if miss_idx:
+            res = batch_find(self.ner, [sents[i][1] for i in miss_idx.values()])
+            new = {k: [(s.start, s.end, s.label, float(s.prob)) for s in spans]
+                   for k, spans in zip(miss_idx, res)}
+            self.cache.put_many(new.items())
+            found.update(new)
+
+        out: List[NerSpan] = []
+        for (off, _), k in zip(sents, keys):
+            for a, b, label, prob in found[k]:
+                out.append(NerSpan(off + a, off + b, text[off + a:off + b], label, prob))
+        return out
+
+    def close(self) -> None:
+        self.cache.close()
+        if hasattr(self.ner, "close"):
+            self.ner.close()
@@ -1,6 +1,16 @@
+import hashlib
+import os
+import warnings
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
-import stanza
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
+
+DEFAULT_QUANT_CACHE = Path("data/ner_int8")
+DEFAULT_CHUNK_CHARS = 5000   # символов в одном вызове stanza (pretokenized)
+_JOIN = "\n\n"                # разделитель текстов пакета при общем вызове find
+
+# токен razdel в координатах документа
+Tok = Tuple[int, int, str]
 
 @dataclass
 class NerSpan:
@@ -10,21 +20,238 @@ class NerSpan:
     label: str
     prob: float
 
+def _versions() -> str:
+    try:
+        from importlib.metadata import version
+        return f"torch={version('torch')};stanza={version('stanza')}"
+    except Exception:
+        return "unknown"
+
+
+def quant_cache_path(model_path: Optional[str], cache_dir: Path) -> Path:
+    """Файл кеша int8-модели: ключ — путь, размер и mtime исходной модели + версии torch/stanza."""
+    parts = [_versions()]
+    if model_path and os.path.exists(model_path):
+        st = os.stat(model_path)
+        parts += [os.path.abspath(model_path), str(st.st_size), str(int(st.st_mtime))]
+    else:
+        parts.append(str(model_path))
+    key = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir) / f"ner_int8_{key}.pt"
+
+
+def quantize_module(model, cache_path: Optional[Path] = None):
+    """Динамическое int8-квантование слоёв Linear/LSTM (веса int8, активации float).
+
+    В кеше (cache_path) лежит только state_dict квантованной модели: при
+    повторной загрузке каркас строится из model, а веса читаются через
+    torch.load(weights_only=True) — из файла восстанавливаются тензоры и
+    упакованные веса torch, но не произвольные объекты Python (подложенный
+    в data/ner_int8 пикл не исполнится). Битый или чужой кеш — предупреждение
+    и пересборка.
+    """
+    import torch
+    from torch import nn
+
+    q = torch.ao.quantization.quantize_dynamic(model, {nn.Linear, nn.LSTM}, dtype=torch.qint8)
+    if cache_path is not None and Path(cache_path).exists():
+        try:
+            # ScriptObject — упакованные int8-веса LSTM (классы torch на C++)
+            with torch.serialization.safe_globals([torch.ScriptObject]):
+                state = torch.load(cache_path, weights_only=True)
+            q.load_state_dict(state)
+            return q
+        except Exception as e:  # битый кеш, другая архитектура или версия — пересобираем
+            warnings.warn(f"quantized NER cache {cache_path} ignored: {e}")
+            q = torch.ao.quantization.quantize_dynamic(model, {nn.Linear, nn.LSTM}, dtype=torch.qint8)
+    if cache_path is not None:
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        torch.save(q.state_dict(), cache_path)
+    return q
+
+
+def split_sentences(text: str) -> List[Tuple[int, str]]:
+    """(смещение, предложение) по razdel; пробелы между предложениями не входят."""
+    from razdel import sentenize
+    return [(s.start, s.text) for s in sentenize(text)]
+
+
+def _tokens(text: str, base: int = 0) -> List[Tok]:
+    from razdel import tokenize
+    return [(base + t.start, base + t.stop, t.text) for t in tokenize(text)]
+
+
+def razdel_chunks(text: str, chunk_chars: int = DEFAULT_CHUNK_CHARS) -> Iterator[List[List[Tok]]]:
+    """Предложения и токены razdel, сгруппированные в куски ~chunk_chars символов.
+
+    Кусок — список предложений, предложение — список токенов (start, end, text)
+    в смещениях исходного текста. Длинное предложение идёт отдельным куском
+    целиком (предложения не режутся). Генератор: в памяти один кусок.
+    """
+    from razdel import sentenize
+
+    chunk: List[List[Tok]] = []
+    size = 0
+    for s in sentenize(text):
+        toks = _tokens(s.text, s.start)
+        if not toks:
+            continue
+        n = s.stop - s.start
+        if chunk and size + n > chunk_chars:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(toks)
+        size += n
+    if chunk:
+        yield chunk
+
+
+def entity_spans(doc, chunk: List[List[Tok]], text: str) -> List[NerSpan]:
+    """Сущности stanza (pretokenized) -> NerSpan в смещениях документа.
+
+    Смещения берутся не из start_char/end_char stanza (они относятся к тексту,
+    склеенному из токенов), а из номеров токенов в предложении: id токена
+    stanza — 1-based индекс в нашем списке токенов razdel."""
+    return [NerSpan(start=a, end=b, text=text[a:b], label=label, prob=prob)
+            for _, a, b, label, prob in _sentence_entities(doc, chunk)]
+
+
+def _sentence_entities(doc, chunk: List[List[Tok]]) -> Iterator[Tuple[int, int, int, str, float]]:
+    """(номер предложения в куске, start, end, метка, prob) по сущностям stanza."""
+    # Типы: PER/ORG/LOC. Адресов нет — их берём regex/контекстом.
+    for k, (sent, toks) in enumerate(zip(doc.sentences, chunk)):
+        for ent in sent.ents:
+            a = toks[ent.tokens[0].id[0] - 1][0]
+            b = toks[ent.tokens[-1].id[-1] - 1][1]
+            yield k, a, b, ent.type, getattr(ent, "score", 0.99)  # score есть не всегда
+
+
+def batch_find(ner, texts: Sequence[str]) -> List[List[NerSpan]]:
+    """NER по пакету текстов через лучший доступный интерфейс модели:
+    find_many (StanzaNER, ShardedNER, NerBatcher) или один find по текстам,
+    склеенным через пустую строку (сущности через границу отбрасываются)."""
+    if hasattr(ner, "find_many"):
+        return ner.find_many(texts)
+    joined = _JOIN.join(texts)
+    bounds, pos = [], 0
+    for s in texts:
+        bounds.append((pos, pos + len(s)))
+        pos += len(s) + len(_JOIN)
+    out: List[List[NerSpan]] = [[] for _ in texts]
+    j = 0
+    for sp in sorted(ner.find(joined), key=lambda x: x.start):
+        while j < len(bounds) and bounds[j][1] <= sp.start:
+            j += 1
+        if j == len(bounds):
+            break
+        a, b = bounds[j]
+        if sp.start >= a and sp.end <= b:
+            out[j].append(NerSpan(sp.start - a, sp.end - a, sp.text, sp.label, float(sp.prob)))
+    return out
+
+
 class StanzaNER:
-    def __init__(self, device: str = "cuda", use_gpu: bool = True):
+    def __init__(self, device: str = "cuda", use_gpu: bool = True, quantize: bool = False,
+                 quant_cache_dir: Optional[Path] = None, pretokenized: bool = True,
+                 chunk_chars: int = DEFAULT_CHUNK_CHARS, stanza_dir: Optional[str] = None):
+        """quantize=True (только CPU) — int8-квантование NER-модели при загрузке,
+        с кешем в quant_cache_dir (по умолчанию data/ner_int8).
+
+        pretokenized=True (по умолчанию) — предложения и токены режет razdel,
+        нейросетевой токенизатор stanza не работает, документ подаётся кусками
+        по chunk_chars символов (память не растёт с длиной документа).
+        pretokenized=False — прежний режим: весь текст одной строкой в stanza.
+
+        stanza_dir — каталог моделей stanza (resources.json и ru/...), например
+        скопированный stanza_resources: модели берутся только оттуда, без сети.
+        """
         # Модели скачайте один раз: stanza.download('ru')
+        import stanza  # лениво: NerSpan и шардирование не тянут stanza/torch
+        self.pretokenized = pretokenized
+        self.chunk_chars = chunk_chars
+        offline = {"dir": str(stanza_dir), "download_method": None} if stanza_dir else {}
         self.nlp = stanza.Pipeline(
             lang="ru",
             processors="tokenize,ner",
+            tokenize_pretokenized=pretokenized,
             use_gpu=use_gpu,
-            device=device
+            device=device,
+            **offline
         )
+        self.quantized = False
+        self.model_id = f"stanza-ru-ner;{_versions()};device={device}" + (";razdel" if pretokenized else "")
+        if quantize:
+            if use_gpu or device != "cpu":
+                warnings.warn("int8 NER is CPU-only; running float32 model")
+            else:
+                self._quantize(Path(quant_cache_dir or DEFAULT_QUANT_CACHE))
+
+    def _quantize(self, cache_dir: Path) -> None:
+        proc = self.nlp.processors["ner"]
+        # stanza держит один trainer (_trainer) или список (trainers) для нескольких пакетов
+        trainers = list(getattr(proc, "trainers", None) or [proc._trainer])
+        model_paths = (getattr(proc, "config", None) or {}).get("model_path")
+        if not isinstance(model_paths, (list, tuple)):
+            model_paths = [model_paths] * len(trainers)
+        try:
+            for tr, mp in zip(trainers, model_paths):
+                tr.model = quantize_module(tr.model, quant_cache_path(mp, cache_dir))
+                tr.model.eval()
+            self.quantized = True
+            self.model_id += ";int8"
+        except Exception as e:  # архитектура не поддерживается — остаёмся на float32
+            warnings.warn(f"NER quantization failed, running float32 model: {e}")
+
+    def iter_find(self, text: str) -> Iterator[List[NerSpan]]:
+        """Сущности по кускам документа (pretokenized), по мере готовности."""
+        if not self.pretokenized:
+            yield self._find_raw(text)
+            return
+        for chunk in razdel_chunks(text, self.chunk_chars):
+            doc = self.nlp([[t[2] for t in sent] for sent in chunk])
+            yield entity_spans(doc, chunk, text)
 
     def find(self, text: str) -> List[NerSpan]:
+        return [s for part in self.iter_find(text) for s in part]
+
+    def find_many(self, texts: Sequence[str]) -> List[List[NerSpan]]:
+        """NER по пакету текстов (например, предложений разных запросов): в
+        pretokenized-режиме предложения всех текстов идут в stanza общими
+        вызовами по chunk_chars символов — модель видит полные пакеты."""
+        if not self.pretokenized:
+            return [self._find_raw(t) for t in texts]
+        from razdel import sentenize
+
+        out: List[List[NerSpan]] = [[] for _ in texts]
+        chunk: List[List[Tok]] = []
+        owner: List[int] = []
+        size = 0
+
+        def flush():
+            doc = self.nlp([[t[2] for t in sent] for sent in chunk])
+            for k, a, b, label, prob in _sentence_entities(doc, chunk):
+                i = owner[k]
+                out[i].append(NerSpan(start=a, end=b, text=texts[i][a:b], label=label, prob=prob))
+
+        for i, text in enumerate(texts):
+            for s in sentenize(text):
+                toks = _tokens(s.text, s.start)
+                if not toks:
+                    continue
+                if chunk and size + len(s.text) > self.chunk_chars:
+                    flush()
+                    chunk, owner, size = [], [], 0
+                chunk.append(toks)
+                owner.append(i)
+                size += len(s.text)
+        if chunk:
+            flush()
+        return out
+
+    def _find_raw(self, text: str) -> List[NerSpan]:
         doc = self.nlp(text)
         out: List[NerSpan] = []
         for ent in doc.entities:
-            # Типы: PER/ORG/LOC. Адресов нет — их берём regex/контекстом.
             out.append(NerSpan(
                 start=ent.start_char,
                 end=ent.end_char,
@@ -1,7 +1,14 @@
-import re
+from redactru.util.phones import _normalize as _normalize_ru_phone, _only_digits
+from redactru.util.snils import is_valid_snils
+
+# Проверки телефонов/СНИЛС — те же, что у детекторов redactru (redactru.util.*)
 
 def normalize_phone(txt: str) -> str:
-    digits = re.sub(r'\D', '', txt)
+    digits = _only_digits(txt)
+    norm = _normalize_ru_phone(digits)
+    if norm:
+        return norm
+    # нестандартная длина (например, с добавочным) — как раньше, с префиксом +7
     if digits.startswith('8'):
         digits = '7' + digits[1:]
     if not digits.startswith('7'):
@@ -9,14 +16,7 @@ def normalize_phone(txt: str) -> str:
     return '+' + digits
 
 def snils_checksum_ok(snils: str) -> bool:
-    nums = re.sub(r'\D', '', snils)
-    if len(nums) != 11: return False
-    s = sum(int(nums[i]) * (9 - i) for i in range(9))
-    c = int(nums[-2:])
-    if s < 100: return s == c
-    if s in (100, 101): return c == 0
-    s = s % 101
-    return (0 if s == 100 else s) == c
+    return is_valid_snils(snils)
 
 def addr_incomplete(txt: str) -> bool:
     return ('кв' in txt or 'кв.' in txt) and not any(ch.isdigit() for ch in txt.split('кв')[-1])
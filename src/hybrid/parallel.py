@@ -0,0 +1,137 @@
+"""CPU-режим NER: шардирование по предложениям между процессами.
+
+Без GPU stanza в одном процессе, а torch сам выбирает число потоков — на общем
+хосте несколько заданий перегружают ядра. ShardedNER режет документ (или пакет
+документов) по границам предложений (razdel) на куски примерно равной длины и
+раздаёт их N процессам. В каждом процессе свой StanzaNER и явно заданные
+intra-op/inter-op потоки torch (по умолчанию 1/1: N процессов = N ядер).
+Результаты собираются по порядку, смещения переводятся в глобальные.
+
+Интерфейс совпадает со StanzaNER (find), поэтому HybridAnonymizer может
+использовать его вместо однопроцессного NER (workers=N).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from .ner_stanza import NerSpan
+
+DEFAULT_SHARD_CHARS = 10000
+
+_THREAD_ENV = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def set_torch_threads(intra: int, interop: int = 1) -> None:
+    """Зафиксировать потоки torch в текущем процессе (до первой работы модели)."""
+    for k in _THREAD_ENV:
+        os.environ[k] = str(intra)
+    try:
+        import torch
+    except Exception:  # torch не установлен — нечего настраивать
+        return
+    torch.set_num_threads(intra)
+    try:
+        torch.set_num_interop_threads(interop)
+    except RuntimeError:
+        pass  # уже задано или параллельная работа уже шла — оставляем как есть
+
+
+def cpu_stanza_ner(quantize: bool = False):
+    """Фабрика NER по умолчанию: StanzaNER на CPU (quantize — int8-модель).
+    Для процессов передавайте functools.partial(cpu_stanza_ner, quantize=True)."""
+    from .ner_stanza import StanzaNER
+    return StanzaNER(device="cpu", use_gpu=False, quantize=quantize)
+
+
+def iter_shards(text: str, target_chars: int) -> Iterator[Tuple[int, str]]:
+    """Куски (смещение, текст) по началам предложений, ~target_chars, по мере разбора.
+    Куски покрывают текст целиком и без перекрытий."""
+    if len(text) <= target_chars:
+        if text:
+            yield 0, text
+        return
+    from razdel import sentenize
+
+    a = 0
+    for s in sentenize(text):
+        if s.start - a >= target_chars:
+            yield a, text[a:s.start]
+            a = s.start
+    yield a, text[a:]
+
+
+def shard_text(text: str, target_chars: int) -> List[Tuple[int, str]]:
+    """Разбить текст на (смещение, кусок) по началам предложений, куски ~target_chars."""
+    return list(iter_shards(text, target_chars))
+
+
+# ---- рабочий процесс ----
+
+_worker_ner = None
+
+
+def _init_worker(factory: Callable, intra: int, interop: int) -> None:
+    global _worker_ner
+    set_torch_threads(intra, interop)  # до импорта torch моделью
+    _worker_ner = factory()
+
+
+def _find_shard(job: Tuple[int, int, str]) -> Tuple[int, List[NerSpan]]:
+    doc, off, chunk = job
+    out = []
+    for s in _worker_ner.find(chunk):
+        out.append(NerSpan(start=s.start + off, end=s.end + off, text=s.text,
+                           label=s.label, prob=float(s.prob)))
+    return doc, out
+
+
+class ShardedNER:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        intra_threads: int = 1,
+        interop_threads: int = 1,
+        shard_chars: int = DEFAULT_SHARD_CHARS,
+        factory: Callable = cpu_stanza_ner,
+        mp_context: str = "spawn",
+    ):
+        """Пул из workers процессов (по умолчанию — число ядер / intra_threads).
+
+        factory — вызываемое без аргументов, возвращает объект с find(text); должно
+        быть доступно по импорту (spawn). "spawn" по умолчанию: fork после
+        инициализации потоков torch может зависнуть.
+        """
+        self.workers = max(1, workers or (os.cpu_count() or 1) // max(1, intra_threads))
+        self.shard_chars = shard_chars
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context(mp_context),
+            initializer=_init_worker,
+            initargs=(factory, intra_threads, interop_threads),
+        )
+
+    def _jobs(self, texts: Sequence[str]) -> List[Tuple[int, int, str]]:
+        total = sum(len(t) for t in texts)
+        # не меньше шарда на процесс, но и не длиннее shard_chars (балансировка)
+        target = max(1, min(self.shard_chars, -(-total // self.workers)))
+        return [(i, off, chunk) for i, t in enumerate(texts) for off, chunk in shard_text(t, target)]
+
+    def find_many(self, texts: Sequence[str]) -> List[List[NerSpan]]:
+        """NER по пакету документов; шарды всех документов делят один пул."""
+        out: List[List[NerSpan]] = [[] for _ in texts]
+        for doc, spans in self._pool.map(_find_shard, self._jobs(texts)):
+            out[doc].extend(spans)  # map сохраняет порядок шардов
+        return out
+
+    def find(self, text: str) -> List[NerSpan]:
+        return self.find_many([text])[0]
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,2 +1,81 @@
+"""Профили гибридного конвейера: этапы, их порядок, веса, пороги, бюджет времени.
+
+Этапы (выполняются в порядке profile.stages):
+- "ner"       — stanza NER (PER/LOC), дорогой;
+- "regex"     — детекторы redactru.registry: PHONE/SNILS/ADDR и числовые идентификаторы
+                (INN/OGRN/OGRNIP/CARD/OMS/PASSPORT) или переданные extra_regex_spans;
+- "per_rules" — ФИО по правилам redactru (регэкспы + морфология pymorphy3), дорогой.
+
+budget_ms — бюджет на документ. Перед каждым дорогим этапом (profile.expensive)
+оценивается его стоимость по скорости (символов/с, уточняется по факту); если
+этап не укладывается в остаток бюджета, он обрезается до префикса текста по
+границе предложения (on_budget="truncate") или пропускается ("skip"). Остаток
+считается от начала process (подготовка контекста и предыдущие этапы — по
+факту) за вычетом оценки скоринга по скорости "score".
+Результат тогда помечен degraded (см. aggregator.SpanList).
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
 WEIGHTS = dict(ner=0.45, regex=0.30, dict=0.15, ctx=0.10, penalty=0.20)
-THRESHOLDS = {"PHONE":0.90, "SNILS":0.95, "PASSPORT":0.90, "ADDR":0.55, "PER":0.60}
+THRESHOLDS = {"PHONE":0.90, "SNILS":0.95, "PASSPORT":0.90, "INN":0.90, "OGRN":0.90, "OGRNIP":0.90,
+              "CARD":0.90, "OMS":0.90, "ADDR":0.55, "PER":0.60}
+
+STAGES = ("ner", "regex", "per_rules")
+# априорная скорость этапов (символов/с); в работе уточняется скользящим средним.
+# regex и score ("score" — признаки, скоринг и снятие перекрытий после этапов)
+# измерены на examples/*.txt на одном ядре: ~0.30–0.37 и ~3–5 млн символов/с
+DEFAULT_RATES = {"ner": 20000.0, "regex": 350_000.0, "per_rules": 300000.0, "score": 3_000_000.0}
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    stages: Tuple[str, ...]
+    weights: Dict[str, float] = field(default_factory=lambda: dict(WEIGHTS))
+    thresholds: Dict[str, float] = field(default_factory=lambda: dict(THRESHOLDS))
+    budget_ms: Optional[float] = None          # None — без ограничения
+    expensive: Tuple[str, ...] = ("ner", "per_rules")
+    on_budget: str = "truncate"                # truncate | skip
+    device: Optional[str] = None               # cpu | cuda | None (авто)
+    rates: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_RATES))
+
+    def __post_init__(self):
+        bad = [s for s in self.stages if s not in STAGES]
+        if bad:
+            raise ValueError(f"unknown stages in profile {self.name}: {bad}")
+        if self.on_budget not in ("truncate", "skip"):
+            raise ValueError(f"on_budget must be truncate|skip: {self.on_budget}")
+
+
+# без NER кандидат держится на правилах: основной вес у regex
+_RULES_WEIGHTS = dict(ner=0.0, regex=0.75, dict=0.15, ctx=0.10, penalty=0.50)
+# идентификатор с верной суммой без метки (score 0.9) проходит, с неверной — нет
+_RULES_THRESHOLDS = {"PHONE": 0.75, "SNILS": 0.75, "PASSPORT": 0.75, "INN": 0.65, "OGRN": 0.65,
+                     "OGRNIP": 0.65, "CARD": 0.65, "OMS": 0.75, "ADDR": 0.60, "PER": 0.75}
+
+PROFILES: Dict[str, Profile] = {}
+
+
+def register_profile(profile: Profile) -> Profile:
+    PROFILES[profile.name] = profile
+    return profile
+
+
+def get_profile(name: str) -> Profile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown profile: {name} (known: {', '.join(sorted(PROFILES))})") from None
+
+
+# исторический конвейер: NER + правила, без бюджета
+register_profile(Profile("ru_hybrid", stages=("ner", "regex")))
+# только правила: без stanza/torch, предсказуемое время
+register_profile(Profile("ru_regex_only", stages=("regex", "per_rules"),
+                         weights=_RULES_WEIGHTS, thresholds=_RULES_THRESHOLDS))
+register_profile(Profile("ru_hybrid_cpu", stages=("regex", "ner"), device="cpu", budget_ms=2000.0))
+register_profile(Profile("ru_hybrid_gpu", stages=("regex", "ner"), device="cuda", budget_ms=500.0,
+                         rates={**DEFAULT_RATES, "ner": 200000.0}))
+
+DEFAULT_PROFILE = "ru_hybrid"
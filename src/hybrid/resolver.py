@@ -10,7 +10,8 @@ class Span:
     score: float
     meta: Dict
 
-PRIORITY = {"SNILS":5, "PHONE":4, "PASSPORT":3, "ADDR":2, "PER":1}
+PRIORITY = {"SNILS":5, "PHONE":4, "PASSPORT":3, "INN":3, "OGRNIP":3, "OGRN":3, "OMS":3, "CARD":3,
+            "ADDR":2, "PER":1}
 
 def resolve_overlaps(spans: List[Span]) -> List[Span]:
     spans = sorted(spans, key=lambda s: (-PRIORITY.get(s.type,0), -s.score, s.start, -(s.end-s.start)))
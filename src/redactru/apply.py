@@ -7,12 +7,13 @@ from __future__ import annotations
 
 import json, re
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Tuple, Any
 
 from jsonschema import validate as js_validate
 
-from redactru.util.spans import Span, resolve_overlaps, apply_spans, DEFAULT_PRIORITY
+from redactru.util.spans import Span, resolve_overlaps, resolve_by_components, apply_spans, DEFAULT_PRIORITY
 
 CAND_SCHEMA_PATH = Path("schemas/candidates.schema.json")
 REPORT_SCHEMA_PATH = Path("schemas/report.schema.json")
@@ -22,11 +23,16 @@ def _read_json(p: Path) -> Dict[str, Any] | List[Dict[str, Any]]:
     return json.loads(p.read_text(encoding="utf-8"))
 
 
+@lru_cache(maxsize=None)
+def _read_schema(p: Path) -> Dict[str, Any]:
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
 def _load_candidates_doc(p: Path) -> Dict[str, Any]:
     doc = _read_json(p)
     if not isinstance(doc, dict):
         raise ValueError("candidates: expected object")
-    js_validate(instance=doc, schema=json.loads(CAND_SCHEMA_PATH.read_text(encoding="utf-8")))
+    js_validate(instance=doc, schema=_read_schema(CAND_SCHEMA_PATH))
     return doc
 
 
@@ -62,8 +68,14 @@ def _align_slice(text: str, start: int, end: int, frag: str) -> Tuple[int, int,
     return s, e, False
 
 
-def apply_to_text(text: str, cand_doc: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
-    """Возвращает (новый_текст, report_dict). Выравнивает спаны по содержимому."""
+def apply_to_text(
+    text: str,
+    cand_doc: Dict[str, Any],
+    check_schema: bool = True,
+) -> Tuple[str, Dict[str, Any]]:
+    """Возвращает (новый_текст, report_dict). Выравнивает спаны по содержимому.
+    check_schema=False пропускает проверку отчёта по схеме (сквозной прогон в памяти).
+    """
     # Сформировать спаны из документа с выравниванием
     spans: List[Span] = []
     report_items: List[Dict[str, Any]] = []
@@ -138,7 +150,8 @@ def apply_to_text(text: str, cand_doc: Dict[str, Any]) -> Tuple[str, Dict[str, A
         },
         "items": report_items,
     }
-    js_validate(instance=report, schema=json.loads(REPORT_SCHEMA_PATH.read_text(encoding="utf-8")))
+    if check_schema:
+        js_validate(instance=report, schema=_read_schema(REPORT_SCHEMA_PATH))
     return new_text, report
 
 
@@ -166,3 +179,159 @@ def apply_file(
     out_p.write_text(new_text, encoding=encoding)
     rep_p.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
     return out_p, rep_p
+
+
+# ===== Потоковый apply =====
+# Память зависит от числа спанов, а не от размера документа: исходник читается
+# блоками в скользящее окно, неизменённые участки копируются в выходной файл
+# блоками, отчёт пишется по мере готовности элементов.
+
+STREAM_BLOCK = 1 << 20   # символов за одно чтение
+ALIGN_WINDOW = 50        # окно выравнивания вокруг ожидаемого start
+
+
+class _SlidingText:
+    """Окно text[base:base+len(buf)] над текстовым потоком."""
+
+    def __init__(self, f, block: int):
+        self.f = f
+        self.block = block
+        self.buf = ""
+        self.base = 0
+        self.eof = False
+
+    def ensure(self, end: int) -> None:
+        parts = [self.buf]
+        have = self.base + len(self.buf)
+        while not self.eof and have < end:
+            chunk = self.f.read(self.block)
+            if not chunk:
+                self.eof = True
+                break
+            parts.append(chunk)
+            have += len(chunk)
+        if len(parts) > 1:
+            self.buf = "".join(parts)
+
+    def drop(self, upto: int) -> None:
+        """Забыть всё левее upto (сдвигаем буфер только крупными кусками)."""
+        cut = min(upto - self.base, len(self.buf))
+        if cut >= self.block:
+            self.buf = self.buf[cut:]
+            self.base += cut
+
+    def slice(self, s: int, e: int) -> str:
+        self.ensure(e)
+        s = max(s, self.base)
+        return self.buf[s - self.base: max(s, e) - self.base]
+
+
+def _align_window(src: _SlidingText, start: int, end: int, frag: str, window: int) -> Tuple[int, int, bool]:
+    """Как _align_slice, но только в окне [start-window .. start+window+len(frag)]
+    (без глобального поиска — он требует всего текста)."""
+    s = max(0, start)
+    e = max(s, end)
+    if src.slice(s, e) == frag:
+        return s, e, True
+    win_s = max(0, s - window)
+    pos = src.slice(win_s, s + window + len(frag)).find(frag)
+    if pos >= 0:
+        ns = win_s + pos
+        return ns, ns + len(frag), True
+    return s, e, False
+
+
+def _copy_chars(f_in, f_out, n: int, block: int) -> None:
+    while n > 0:
+        chunk = f_in.read(min(n, block))
+        if not chunk:
+            break
+        if f_out is not None:
+            f_out.write(chunk)
+        n -= len(chunk)
+
+
+def apply_file_stream(
+    input_path: str | Path,
+    candidates_path: str | Path,
+    out_path: str | Path,
+    report_path: str | Path,
+    encoding: str = "utf-8",
+    window: int = ALIGN_WINDOW,
+    block: int = STREAM_BLOCK,
+) -> Tuple[Path, Path]:
+    """Потоковый вариант apply_file для файлов больше оперативной памяти.
+
+    Два прохода по исходнику: (1) выравнивание спанов в ограниченном окне и запись
+    отчёта, (2) копирование текста блоками с заменами. Отличия от apply_file:
+    нет глобального поиска при выравнивании, элементы отчёта упорядочены по start,
+    отчёт не проверяется по схеме целиком. Пересечения спанов решаются по группам
+    связанных спанов (resolve_by_components) — время растёт линейно с их числом.
+    """
+    inp = Path(input_path)
+    out_p = Path(out_path)
+    rep_p = Path(report_path)
+    doc = _load_candidates_doc(Path(candidates_path))
+    items = sorted(doc["items"], key=lambda it: int(it.get("start", 0)))
+
+    out_p.parent.mkdir(parents=True, exist_ok=True)
+    rep_p.parent.mkdir(parents=True, exist_ok=True)
+
+    header = {
+        "version": "1",
+        "source_path": str(inp.resolve()),
+        "encoding": encoding,
+        "created_utc": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "counts": {
+            "total": len(items),
+            "applied": sum(1 for it in items if it.get("apply")),
+            "skipped": sum(1 for it in items if not it.get("apply")),
+        },
+    }
+
+    # Проход 1: выравнивание + отчёт
+    spans: List[Span] = []
+    with inp.open("r", encoding=encoding, errors="ignore") as f_in, \
+            rep_p.open("w", encoding="utf-8") as rep:
+        head = json.dumps(header, ensure_ascii=False, indent=2)
+        rep.write(head[: head.rindex("}")].rstrip() + ',\n  "items": [')
+        src = _SlidingText(f_in, block)
+        for i, it in enumerate(items):
+            typ = str(it.get("typ")).upper()
+            s0 = int(it.get("start", 0))
+            e0 = int(it.get("end", 0))
+            new = str(it.get("replacement", ""))
+            if not it.get("apply"):
+                op = {"id": it.get("id", f"{typ}:{s0}-{e0}"), "typ": typ, "start": s0, "end": e0,
+                      "old": str(it.get("text", "")), "new": new, "ok_slice": True}
+            else:
+                src.drop(s0 - window)
+                frag = str(it.get("text", ""))
+                ns, ne, ok = _align_window(src, s0, e0, frag, window)
+                if ok:
+                    spans.append(Span(start=ns, end=ne, typ=typ, text=frag, replacement=new,
+                                      score=float(it.get("score") or 0.0)))
+                    op = {"id": it.get("id", f"{typ}:{ns}-{ne}"), "typ": typ, "start": ns, "end": ne,
+                          "old": frag, "new": new, "ok_slice": True}
+                else:
+                    op = {"id": it.get("id", f"{typ}:{s0}-{e0}"), "typ": typ, "start": s0, "end": e0,
+                          "old": src.slice(s0, e0), "new": new, "ok_slice": False}
+            rep.write(("," if i else "") + "\n    " + json.dumps(op, ensure_ascii=False))
+        rep.write("\n  ]\n}\n")
+
+    # Проход 2: копирование с заменами
+    spans = resolve_by_components(spans, DEFAULT_PRIORITY)
+    with inp.open("r", encoding=encoding, errors="ignore") as f_in, \
+            out_p.open("w", encoding=encoding) as f_out:
+        pos = 0
+        for s in spans:
+            _copy_chars(f_in, f_out, s.start - pos, block)
+            _copy_chars(f_in, None, s.end - s.start, block)
+            f_out.write(s.replacement)
+            pos = s.end
+        while True:
+            chunk = f_in.read(block)
+            if not chunk:
+                break
+            f_out.write(chunk)
+    return out_p, rep_p
@@ -3,9 +3,10 @@ import json, csv
 from pathlib import Path
 import typer
 
-from redactru.detect import detect_file
+from redactru.detect import detect_file, detect_file_mapped
 from redactru.validate import validate_file
-from redactru.apply import apply_file
+from redactru.apply import apply_file, apply_file_stream
+from redactru.run import run_file
 
 app = typer.Typer(add_completion=False, no_args_is_help=True)
 
@@ -15,9 +16,29 @@ def cmd_detect(
     out: Path = typer.Option(Path("candidates_raw.json"), "--out", "-o"),
     preview: Path | None = typer.Option(None, "--preview", "-p"),
     encoding: str = typer.Option("utf-8", "--encoding"),
+    mmap: bool = typer.Option(False, "--mmap", help="Отобразить файл в память и искать только SNILS/PHONE по байтам (UTF-8); в meta — байтовые смещения"),
+    workers: int = typer.Option(1, "--workers", help="Процессов: документ режется на шарды по абзацам (UTF-8); результат тот же"),
+    known: Path | None = typer.Option(None, "--known", help="mapping.json: добавить точные вхождения уже известных сущностей"),
 ):
     """Найти кандидатов и сохранить «сырые» результаты (JSON). CSV-превью опционально."""
-    cs = detect_file(str(input_path), encoding=encoding)
+    utf8 = encoding.lower().replace("_", "-") in ("utf-8", "utf8")
+    if mmap:
+        if not utf8:
+            raise typer.BadParameter("--mmap поддерживает только UTF-8", param_hint="--encoding")
+        cs = detect_file_mapped(str(input_path))
+    elif workers > 1:
+        if not utf8:
+            raise typer.BadParameter("--workers поддерживает только UTF-8", param_hint="--encoding")
+        from redactru.parallel import detect_file_parallel
+        cs = detect_file_parallel(input_path, workers)
+    elif known is not None:
+        from redactru.detect import detect_candidates
+        from redactru.util.automaton import KnownEntityIndex
+        from redactru.util.tokens import TokenManager
+        text = input_path.read_text(encoding=encoding, errors="ignore")
+        cs = detect_candidates(text, known=KnownEntityIndex(TokenManager(known, autosave=False)))
+    else:
+        cs = detect_file(str(input_path), encoding=encoding)
     out.parent.mkdir(parents=True, exist_ok=True)
     out.write_text(json.dumps([c.to_dict() for c in cs], ensure_ascii=False, indent=2), encoding="utf-8")
     if preview:
@@ -37,8 +58,10 @@ def cmd_validate(
     out: Path = typer.Option(Path("candidates.json"), "--out", "-o"),
     mapping: Path = typer.Option(Path("mapping.json"), "--mapping"),
     export: Path | None = typer.Option(None, "--export-csv", help="Экспортировать валидированный документ в CSV с колонками apply/replacement для ручного редактирования"),
+    replace: str = typer.Option("token", "--replace", help="Замена: token ([PER_001]) или surrogate (суррогатное ФИО в падеже упоминания)"),
+    cluster: bool = typer.Option(True, "--cluster/--no-cluster", help="Один токен на кластер вариантов PER/ADDR (падежи, опечатки)"),
 ):
-    res = validate_file(input_path, out, mapping)
+    res = validate_file(input_path, out, mapping, replacement_mode=replace, cluster=cluster)
     typer.echo(f"validated: {res}")
     typer.echo(f"mapping: {mapping}")
     if export:
@@ -63,11 +86,165 @@ def cmd_apply(
     out: Path = typer.Option(Path("out.txt"), "--out", "-o"),
     report: Path = typer.Option(Path("report.json"), "--report"),
     encoding: str = typer.Option("utf-8", "--encoding"),
+    stream: bool = typer.Option(False, "--stream", help="Потоковый режим: память не зависит от размера текста (для очень больших файлов)"),
 ):
     """Применить замены по candidates.json к исходному тексту. Сохранить текст и отчёт."""
-    out_p, rep_p = apply_file(input_text, candidates, out, report, encoding=encoding)
+    apply_fn = apply_file_stream if stream else apply_file
+    out_p, rep_p = apply_fn(input_text, candidates, out, report, encoding=encoding)
     typer.echo(f"out: {out_p}")
     typer.echo(f"report: {rep_p}")
 
+@app.command("run")
+def cmd_run(
+    input_text: Path = typer.Argument(..., exists=True, readable=True),
+    out: Path = typer.Option(Path("out.txt"), "--out", "-o"),
+    report: Path = typer.Option(Path("report.json"), "--report"),
+    mapping: Path = typer.Option(Path("mapping.json"), "--mapping"),
+    dump_dir: Path | None = typer.Option(None, "--dump-dir", help="Выгрузить candidates_raw.json и candidates.json в каталог"),
+    apply_types: list[str] | None = typer.Option(None, "--apply", help="Типы для замены без ручной проверки (повторяемая опция), напр. --apply PER"),
+    encoding: str = typer.Option("utf-8", "--encoding"),
+    replace: str = typer.Option("token", "--replace", help="Замена: token ([PER_001]) или surrogate (суррогатное ФИО в падеже упоминания)"),
+    cluster: bool = typer.Option(True, "--cluster/--no-cluster", help="Один токен на кластер вариантов PER/ADDR (падежи, опечатки)"),
+    known: bool = typer.Option(False, "--known", help="Искать уже известные по --mapping сущности (точные вхождения, те же токены)"),
+):
+    """detect → validate → apply за один проход в памяти, без промежуточных файлов."""
+    out_p, rep_p = run_file(input_text, out, report, mapping, encoding=encoding,
+                            dump_dir=dump_dir, apply_types=apply_types or None,
+                            replacement_mode=replace, cluster=cluster, known=known)
+    typer.echo(f"out: {out_p}")
+    typer.echo(f"report: {rep_p}")
+    if dump_dir:
+        typer.echo(f"dump: {dump_dir}")
+
+@app.command("table")
+def cmd_table(
+    input_path: Path = typer.Argument(..., exists=True, readable=True),
+    out: Path = typer.Option(Path("out.csv"), "--out", "-o"),
+    column: list[str] = typer.Option(..., "--column", "-c", help="Колонка и вид: ИМЯ=snils|phone|text|keep (повторяемая опция)"),
+    mapping: Path = typer.Option(Path("mapping.json"), "--mapping"),
+    delimiter: str | None = typer.Option(None, "--delimiter", help="Разделитель (по умолчанию: .tsv — табуляция, иначе запятая)"),
+    encoding: str = typer.Option("utf-8", "--encoding"),
+    batch_rows: int = typer.Option(50_000, "--batch-rows", help="Строк в пакете векторной проверки"),
+    apply_types: list[str] | None = typer.Option(None, "--apply", help="Типы для замены в колонках text (как в run)"),
+):
+    """Обезличить CSV/TSV по колонкам потоково: SNILS/телефоны векторно, свободный текст — полным прогоном."""
+    from redactru.table import anonymize_table, parse_columns
+    try:
+        columns = parse_columns(column)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--column")
+    if delimiter == "\\t":
+        delimiter = "\t"
+    stats = anonymize_table(input_path, out, columns, mapping, delimiter=delimiter, encoding=encoding,
+                            batch_rows=batch_rows, apply_types=apply_types or None)
+    typer.echo(f"out: {out} ({stats.rows} rows)")
+    for col, c in stats.columns.items():
+        typer.echo(f"  {col}: replaced={c['replaced']} invalid={c['invalid']} empty={c['empty']}")
+
+@app.command("sqlite")
+def cmd_sqlite(
+    db_path: Path = typer.Argument(..., exists=True, readable=True),
+    table: str = typer.Option(..., "--table", "-t"),
+    column: list[str] = typer.Option(..., "--column", "-c", help="Текстовая колонка (повторяемая опция)"),
+    key: str = typer.Option("rowid", "--key", help="Колонка-ключ для пагинации (уникальная, упорядочиваемая)"),
+    mapping: Path = typer.Option(Path("mapping.json"), "--mapping"),
+    batch_rows: int = typer.Option(1000, "--batch-rows", help="Строк в пакете чтения/записи"),
+    workers: int = typer.Option(1, "--workers", help="Процессов для detect"),
+    apply_types: list[str] | None = typer.Option(None, "--apply", help="Типы для замены без ручной проверки (как в run)"),
+    restart: bool = typer.Option(False, "--restart", help="Начать с начала, игнорируя контрольную точку"),
+):
+    """Обезличить текстовые колонки таблицы SQLite на месте (пакетами, с контрольной точкой)."""
+    from redactru.sqlite import anonymize_sqlite
+    stats = anonymize_sqlite(db_path, table, column, mapping, key=key, batch_rows=batch_rows,
+                             workers=workers, apply_types=apply_types or None, resume=not restart)
+    typer.echo(f"rows: {stats.rows}, updated: {stats.updated}, last key: {stats.last_key}")
+    typer.echo(f"{stats.rows_per_s:.0f} rows/s ({stats.elapsed_s:.1f} s)")
+
+@app.command("filter")
+def cmd_filter(
+    mapping: Path = typer.Option(Path("mapping.json"), "--mapping"),
+    types: list[str] | None = typer.Option(None, "--type", "-t", help="Детектор (повторяемая опция): SNILS, PHONE, ID, ADDR, PER; по умолчанию SNILS, PHONE, ADDR, PER"),
+    apply_types: list[str] | None = typer.Option(None, "--apply", help="Типы для замены (по умолчанию — все выбранные)"),
+    encoding: str = typer.Option("utf-8", "--encoding"),
+    save_every: float = typer.Option(5.0, "--save-every", help="Секунд между записями mapping"),
+    stats: bool = typer.Option(False, "--stats", help="Напечатать в stderr строки, замены и МБ/с"),
+):
+    """Фильтр stdin → stdout: обезличивать строки по мере поступления (`tail -F app.log | redact filter`)."""
+    import sys
+    from redactru.filter import DEFAULT_TYPES, filter_stream
+    st = filter_stream(sys.stdin.buffer, sys.stdout.buffer, mapping, types=types or DEFAULT_TYPES,
+                       apply_types=apply_types or None, encoding=encoding, save_every=save_every)
+    if stats:
+        typer.echo(f"lines: {st.lines}, replaced: {st.replaced}, {st.mb_per_s:.1f} MB/s", err=True)
+
+@app.command("pool")
+def cmd_pool(
+    inputs: list[Path] = typer.Argument(..., exists=True, readable=True),
+    out_dir: Path = typer.Option(Path("pool_out"), "--out-dir", "-o"),
+    workers: int = typer.Option(0, "--workers", help="Процессов (0 — по числу ядер)"),
+    hybrid: bool = typer.Option(False, "--hybrid", help="Гибридный анонимайзер (stanza) вместо detect"),
+    profile: str | None = typer.Option(None, "--profile", help="Профиль гибридного режима"),
+    encoding: str = typer.Option("utf-8", "--encoding"),
+):
+    """Обработать файлы пулом fork-процессов с общими (copy-on-write) моделями; отчёт о памяти."""
+    from redactru.prefork import PreforkPool
+    texts = [p.read_text(encoding=encoding) for p in inputs]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with PreforkPool(workers or None, mode="hybrid" if hybrid else "detect", profile=profile) as pool:
+        for p, res in zip(inputs, pool.map(texts)):
+            (out_dir / f"{p.stem}.json").write_text(json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8")
+        rep = pool.memory_report()
+    typer.echo(f"files: {len(inputs)}, workers: {pool.workers}, out: {out_dir}")
+    if rep["parent"] is not None:
+        typer.echo(f"parent: RSS {rep['parent'].rss_kb // 1024} MiB")
+    for m in rep["workers"]:
+        typer.echo(f"  worker {m.pid}: RSS {m.rss_kb // 1024} MiB, shared {m.shared_kb // 1024} MiB, "
+                   f"private {m.private_kb // 1024} MiB")
+    if rep["workers"]:
+        typer.echo(f"workers total: RSS {rep['workers_rss_kb'] // 1024} MiB, PSS {rep['workers_pss_kb'] // 1024} MiB, "
+                   f"shared {rep['workers_shared_kb'] // 1024} MiB")
+
+@app.command("scan")
+def cmd_scan(
+    inputs: list[Path] = typer.Argument(..., exists=True, help="Файлы и каталоги (обходятся рекурсивно)"),
+    out: Path = typer.Option(Path("scan_manifest.csv"), "--out", "-o"),
+    pattern: str = typer.Option("*", "--pattern", help="Шаблон имён файлов в каталогах"),
+    workers: int = typer.Option(1, "--workers", help="Процессов (0 — по числу ядер)"),
+    max_bytes: int = typer.Option(0, "--max-bytes", help="Читать только начало файла (0 — весь файл); счётчики масштабируются"),
+):
+    """Быстрая оценка плотности ПДн по файлам (UTF-8, без морфологии); манифест по убыванию плотности."""
+    import os
+    import time
+    from redactru.scan import iter_files, scan_paths, write_manifest
+    t0 = time.perf_counter()
+    paths = list(iter_files(inputs, pattern))
+    stats = scan_paths(paths, workers=workers or os.cpu_count() or 1, max_bytes=max_bytes or None)
+    write_manifest(stats, out)
+    dt = time.perf_counter() - t0
+    total = sum(st.scanned_bytes for st in stats)
+    hit = sum(1 for st in stats if st.density > 0)
+    typer.echo(f"files: {len(stats)}, with signals: {hit}, scanned: {total / 1e6:.1f} MB, "
+               f"{total / 1e6 / dt if dt else 0.0:.1f} MB/s")
+    typer.echo(f"written: {out}")
+
+@app.command("build-lexicon")
+def cmd_build_lexicon(
+    out: Path = typer.Option(Path("data/name_lexicon.bin"), "--out", "-o"),
+):
+    """Собрать артефакт словоформ Name/Surn/Patr из словарей pymorphy3 (занимает минуты)."""
+    from redactru.nlp.namelex import build_name_lexicon
+    n = build_name_lexicon(out)
+    typer.echo(f"written: {out} ({n} forms)")
+
+@app.command("build-gazetteer")
+def cmd_build_gazetteer(
+    sources: list[Path] = typer.Argument(..., exists=True, help="Выгрузки ФИАС/ГАР: AS_ADDR_OBJ*.XML или CSV (NAME;TYPENAME;LEVEL)"),
+    out: Path = typer.Option(Path("data/address_gazetteer.bin"), "--out", "-o"),
+):
+    """Собрать газеттир регионов, населённых пунктов и улиц для поиска адресов."""
+    from redactru.rules.gazetteer import build_gazetteer
+    n = build_gazetteer(sources, out)
+    typer.echo(f"written: {out} ({n} names)")
+
 if __name__ == "__main__":
     app()
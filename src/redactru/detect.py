@@ -1,4 +1,5 @@
-"""Поиск кандидатов: SNILS, PHONE, ADDR, PER. Грубый гибрид (regex + эвристики).
+"""Поиск кандидатов: SNILS, PHONE, числовые идентификаторы (INN, OGRN, OGRNIP,
+CARD, OMS, PASSPORT), ADDR, PER. Грубый гибрид (regex + эвристики).
 
 Примеры (doctest):
 >>> from redactru.detect import detect_candidates
@@ -9,20 +10,23 @@ True
 """
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
-from typing import Dict, Iterable, List
-import re
+from dataclasses import dataclass, asdict, replace
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from redactru.util.snils import iter_snils_spans
-from redactru.util.phones import iter_phone_spans
-from redactru.rules.regex_ru import iter_address_spans, iter_person_spans
+from redactru.registry import run_detectors
+from redactru.util.automaton import KnownEntityIndex, KnownHit
+from redactru.util.context import ContextIndex
+from redactru.util.ids import ID_TYPES, SCORE_CONFIRMED, is_valid_id
+from redactru.util.snils import iter_snils_spans_bytes
+from redactru.util.phones import iter_phone_spans_bytes
+from redactru.util.mapped import ByteCharIndex, open_mapped
 from redactru.util.spans import Span, resolve_overlaps, DEFAULT_PRIORITY
 
 
 @dataclass(frozen=True)
 class Candidate:
     id: str
-    typ: str           # SNILS | PHONE | ADDR | PER
+    typ: str           # SNILS | PHONE | INN | OGRN | OGRNIP | CARD | OMS | PASSPORT | ADDR | PER
     start: int
     end: int
     text: str
@@ -34,46 +38,6 @@ class Candidate:
         return asdict(self)
 
 
-def _snils_candidates(text: str) -> Iterable[Span]:
-    for s in iter_snils_spans(text):
-        score = 1.0 if s.is_valid else 0.2
-        yield Span(start=s.start, end=s.end, typ="SNILS", text=text[s.start:s.end],
-                   replacement="[SNILS]", score=score)
-
-
-def _phone_candidates(text: str) -> Iterable[Span]:
-    for p in iter_phone_spans(text):
-        yield Span(start=p.start, end=p.end, typ="PHONE", text=text[p.start:p.end],
-                   replacement="[PHONE]", score=0.9)
-
-
-# Робастный фоллбэк для коротких адресных фраз в одном предложении
-USE_FALLBACK_ADDR = False
-_FALLBACK_ADDR_RE = re.compile(
-    r"""(?P<addr>
-        (?:г\.?|город)\s+[^\n\r.!?]{1,120}?                # город + контекст
-        (?:ул\.?|улица|пр-?кт|проспект|пер\.?|переулок)    # улица/проспект/пер.
-        [^\n\r.!?]{0,120}?
-        (?:д\.?|дом)\s*\d+[^\n\r.!?]*                      # дом N и хвост
-    )""",
-    re.IGNORECASE | re.VERBOSE,
-)
-
-def _addr_candidates(text: str) -> Iterable[Span]:
-    for a in iter_address_spans(text):
-        yield Span(start=a.start, end=a.end, typ="ADDR", text=a.raw, replacement="[ADDR]", score=0.7)
-    if USE_FALLBACK_ADDR:
-        for m in _FALLBACK_ADDR_RE.finditer(text):
-            yield Span(start=m.start("addr"), end=m.end("addr"), typ="ADDR",
-                       text=m.group("addr"), replacement="[ADDR]", score=0.6)
-
-
-def _per_candidates(text: str) -> Iterable[Span]:
-    for per in iter_person_spans(text):
-        yield Span(start=per.start, end=per.end, typ="PER", text=per.raw,
-                   replacement="[PER]", score=0.5)
-
-
 def _make_candidate(span: Span, text: str) -> Candidate:
     if span.typ == "SNILS":
         from redactru.util.snils import normalize_snils, is_valid_snils
@@ -84,6 +48,11 @@ def _make_candidate(span: Span, text: str) -> Candidate:
         digits = only_digits(span.text)
         norm = norm_phone(digits)
         meta = {"digits": digits}
+    elif span.typ in ID_TYPES:
+        norm = "".join(ch for ch in span.text if ch.isdigit())
+        meta = {"valid": is_valid_id(span.typ, norm)}
+        if meta["valid"] and span.score < SCORE_CONFIRMED:
+            meta["review"] = True  # сумма верна, но без метки и признаков (карта «заказ 4111…»)
     elif span.typ == "ADDR":
         norm = None
         meta = {}
@@ -102,15 +71,32 @@ def _make_candidate(span: Span, text: str) -> Candidate:
     )
 
 
-def detect_candidates(text: str, priority: Iterable[str] = DEFAULT_PRIORITY) -> List[Candidate]:
-    spans: List[Span] = []
-    spans.extend(_snils_candidates(text))
-    spans.extend(_phone_candidates(text))
-    spans.extend(_addr_candidates(text))
-    spans.extend(_per_candidates(text))
-
-    resolved = resolve_overlaps(spans, list(priority))
-    out = [_make_candidate(s, text) for s in resolved]
+def _known_candidate(span: Span, hit: KnownHit) -> Candidate:
+    # норма — ключ из карты: validate выдаст тот же токен
+    c = _make_candidate(span, "")
+    return replace(c, norm=hit.key, meta={**c.meta, "known": True, "token": hit.token})
+
+
+def detect_candidates(
+    text: str,
+    priority: Iterable[str] = DEFAULT_PRIORITY,
+    spans: Optional[List[Span]] = None,
+    known: Optional[KnownEntityIndex] = None,
+) -> List[Candidate]:
+    """Кандидаты по тексту. spans — уже посчитанные redactru.registry.run_detectors
+    (например, общие с гибридным конвейером); иначе детекторы запускаются здесь.
+    known — индекс ключей mapping.json: точные вхождения известных сущностей
+    добавляются кандидатами (score 1.0, meta.known, meta.token)."""
+    ctx = ContextIndex(text) if known is not None else None
+    if spans is None:
+        spans = run_detectors(text, ctx=ctx)
+    hits: Dict[Span, KnownHit] = {}
+    if known is not None:
+        for h in known.find(text, ctx.view):
+            hits[h.to_span()] = h
+    # известные — первыми: при равных спанах resolve_overlaps оставляет первый
+    resolved = resolve_overlaps(list(hits) + list(spans), list(priority))
+    out = [_known_candidate(s, hits[s]) if s in hits else _make_candidate(s, text) for s in resolved]
     out.sort(key=lambda c: c.start)
     return out
 
@@ -119,3 +105,34 @@ def detect_file(path: str, encoding: str = "utf-8") -> List[Candidate]:
     with open(path, "r", encoding=encoding, errors="ignore") as f:
         txt = f.read()
     return detect_candidates(txt)
+
+
+def detect_file_mapped(path: str, priority: Iterable[str] = DEFAULT_PRIORITY) -> List[Candidate]:
+    """Режим mmap: только цифровые детекторы (SNILS/PHONE) по байтам файла UTF-8.
+
+    Файл не декодируется целиком. start/end кандидатов — символьные смещения
+    (как у detect_file), байтовые — в meta.byte_start/meta.byte_end.
+    """
+    spans: List[Span] = []
+    byte_pos: Dict[Tuple[int, int], Tuple[int, int]] = {}
+    with open_mapped(path) as buf:
+        idx = ByteCharIndex(buf)
+        for sn in iter_snils_spans_bytes(buf):
+            cs, ce = idx.char_at(sn.start), idx.char_at(sn.end)
+            byte_pos[(cs, ce)] = (sn.start, sn.end)
+            spans.append(Span(start=cs, end=ce, typ="SNILS", text=sn.raw, replacement="[SNILS]",
+                              score=1.0 if sn.is_valid else 0.2))
+        for p in iter_phone_spans_bytes(buf):
+            cs, ce = idx.char_at(p.start), idx.char_at(p.end)
+            byte_pos[(cs, ce)] = (p.start, p.end)
+            raw = buf[p.start:p.end].decode("utf-8", errors="ignore")
+            spans.append(Span(start=cs, end=ce, typ="PHONE", text=raw, replacement="[PHONE]", score=0.9))
+
+    resolved = resolve_overlaps(spans, list(priority))
+    out: List[Candidate] = []
+    for s in resolved:
+        c = _make_candidate(s, "")
+        bs, be = byte_pos[(s.start, s.end)]
+        out.append(replace(c, meta={**c.meta, "byte_start": bs, "byte_end": be}))
+    out.sort(key=lambda c: c.start)
+    return out
@@ -0,0 +1,260 @@
+"""
+Потоковый фильтр stdin → stdout для логов: `tail -F app.log | redact filter`.
+
+Вход читается тем, что уже пришло в канал (read1, до CHUNK_BYTES): под
+нагрузкой это большие окна из многих строк, в тишине — одна строка. Окно
+целиком (только завершённые строки) проходит detect → validate → apply одним
+текстом, результат пишется и сразу сбрасывается (flush) — задержка на строку
+не больше времени обработки её окна. Замены никогда не склеивают строки:
+строки, которые задел спан через перевод строки («8 999 123 45 67\nдоб. 12»),
+проверяются детекторами заново, каждая отдельно, а сам спан отбрасывается.
+
+Токены стабильны между окнами и перезапусками: общий TokenManager (mapping),
+новые токены сохраняются на диск не чаще раза в save_every секунд и в конце.
+
+Если выбраны только SNILS и PHONE, окно не декодируется вовсе: байтовые
+детекторы (как у `detect --mmap`) и замена по байтам, токены — по тем же
+ключам, что и в текстовом конвейере: кандидат строится той же функцией detect,
+ключ — как в validate (нормализованный СНИЛС, телефон +7…, а телефон с
+добавочным — по тексту); применяются валидные СНИЛС и все телефоны (как apply
+по умолчанию).
+Полные регэкспы запускаются только по строкам, где префильтр (bytes.translate
+в классы символов и один простой регэксп) нашёл возможный номер.
+
+Пример (doctest):
+>>> import io, tempfile, os
+>>> src = io.BytesIO("ok\\nтел. +7 (999) 123-45-67\\nснова +7 999 123 45 67\\n".encode())
+>>> out = io.BytesIO()
+>>> stats = filter_stream(src, out, os.path.join(tempfile.mkdtemp(), "m.json"), types=("PHONE",))
+>>> print(out.getvalue().decode(), end="")
+ok
+тел. [PHONE_001]
+снова [PHONE_001]
+>>> stats.lines, stats.replaced
+(3, 2)
+"""
+from __future__ import annotations
+
+import codecs
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from redactru.detect import DEFAULT_PRIORITY, _make_candidate, detect_candidates
+from redactru.registry import run_detectors
+from redactru.run import run_candidates
+from redactru.util.ids import ID_TYPES
+from redactru.util.normview import UTF8_SPACES
+from redactru.util.phones import iter_phone_spans_bytes
+from redactru.util.snils import iter_snils_spans_bytes
+from redactru.util.spans import Span, resolve_overlaps
+from redactru.util.tokens import TokenManager
+from redactru.validate import _token_key
+
+DEFAULT_TYPES = ("SNILS", "PHONE", "ADDR", "PER")
+BYTE_TYPES = frozenset({"SNILS", "PHONE"})  # есть байтовые детекторы
+CHUNK_BYTES = 1 << 16
+DEFAULT_SAVE_EVERY = 5.0  # секунд между записями mapping
+
+
+def _byte_classes() -> bytes:
+    tab = bytearray(b"x" * 256)
+    for b in b"0123456789":
+        tab[b] = ord("0")
+    for b in b" \t\r\x0b\x0c-()+":  # разделители внутри номера (без перевода строки)
+        tab[b] = ord("-")
+    tab[ord("\n")] = ord("\n")
+    return bytes(tab)
+
+
+_CLASSES = _byte_classes()
+# юникодные пробелы по первому байту: в тексте без них — одна проверка на байт
+_SPACES_BY_LEAD = {}
+for _sp in UTF8_SPACES:
+    _SPACES_BY_LEAD.setdefault(_sp[:1], []).append(_sp)
+_PREFILTER_RE = re.compile(rb"000-*000(?:-*0){4}")
+
+
+@dataclass
+class FilterStats:
+    lines: int = 0
+    bytes: int = 0
+    windows: int = 0
+    replaced: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes / 1e6 / self.elapsed_s if self.elapsed_s else 0.0
+
+
+def _apply_types(types: Iterable[str]) -> list:
+    # детектор "ID" выдаёт спаны конкретных типов идентификаторов
+    out = []
+    for t in types:
+        t = t.upper()
+        out.extend(ID_TYPES if t == "ID" else (t,))
+    return out
+
+
+def _windows(inp: BinaryIO, chunk_bytes: int) -> Iterator[bytes]:
+    """Окна из завершённых строк: всё, что пришло в канал к моменту чтения."""
+    read = getattr(inp, "read1", inp.read)
+    tail = b""
+    while True:
+        data = read(chunk_bytes)
+        if not data:
+            break
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            tail += data
+            continue
+        yield tail + data[:cut + 1]
+        tail = data[cut + 1:]
+    if tail:
+        yield tail  # последняя строка без перевода строки
+
+
+def _line_spans(text: str, types: Sequence[str]) -> List[Span]:
+    """Спаны детекторов внутри строк: задетые спаном через \n строки — заново, по одной."""
+    spans: List[Span] = []
+    redo: dict = {}  # начало строки -> конец
+    for s in run_detectors(text, types):
+        if "\n" not in text[s.start:s.end]:
+            spans.append(s)
+            continue
+        lo = text.rfind("\n", 0, s.start) + 1
+        while lo < s.end:
+            hi = text.find("\n", lo)
+            hi = len(text) if hi < 0 else hi
+            redo[lo] = hi
+            lo = hi + 1
+    if not redo:
+        return spans
+    seen = {(s.start, s.end, s.typ) for s in spans}
+    for lo, hi in sorted(redo.items()):
+        for s in run_detectors(text[lo:hi], types):
+            if (s.start + lo, s.end + lo, s.typ) not in seen:
+                spans.append(Span(s.start + lo, s.end + lo, s.typ, s.text, s.replacement, s.score))
+    return spans
+
+
+def redact_window(
+    text: str,
+    tokens: TokenManager,
+    types: Sequence[str] = DEFAULT_TYPES,
+    apply_types: Optional[Sequence[str]] = None,
+) -> tuple:
+    """Обезличить окно из целых строк. Возвращает (текст, число замен)."""
+    types = [t.upper() for t in types]
+    spans = _line_spans(text, types)
+    if not spans:
+        return text, 0
+    cands = detect_candidates(text, DEFAULT_PRIORITY, spans=spans)
+    res = run_candidates(text, cands, tokens=tokens,
+                         apply_types=_apply_types(apply_types or types))
+    return res.text, res.report["counts"]["applied"]
+
+
+def _candidate_lines(buf: bytes) -> List[Tuple[int, int]]:
+    """Границы строк buf (без \\n), где может быть телефон или СНИЛС.
+
+    Байты переводятся в классы (цифра → "0", разделитель → "-", прочее → "x"),
+    по ним ищется «тройка цифр, разделители, тройка цифр, ещё 4 цифры» —
+    это есть в любом совпадении PHONE_BYTES_RE (код, d1, d2, d3) и
+    SNILS_BYTES_RE. Дата со временем («2026-10-19 12:00») шаблону не отвечает.
+    Юникодные пробелы (NBSP и др.) сначала заменяются ASCII-пробелами той же
+    длины в байтах — смещения не сдвигаются.
+    """
+    view = buf
+    for lead, spaces in _SPACES_BY_LEAD.items():
+        if lead in view:
+            for sp in spaces:
+                if sp in view:
+                    view = view.replace(sp, b" " * len(sp))
+    out: List[Tuple[int, int]] = []
+    end = -1
+    for m in _PREFILTER_RE.finditer(view.translate(_CLASSES)):
+        s = m.start()
+        if s < end:
+            continue  # строка уже в списке
+        lo = buf.rfind(b"\n", 0, s) + 1
+        end = buf.find(b"\n", s)
+        if end < 0:
+            end = len(buf)
+        out.append((lo, end))
+    return out
+
+
+def redact_window_bytes(buf: bytes, tokens: TokenManager, types: Sequence[str] = tuple(BYTE_TYPES)) -> tuple:
+    """Байтовый путь для SNILS/PHONE (UTF-8). Возвращает (байты, число замен)."""
+    wanted = {t.upper() for t in types}
+    parts, pos, n = [], 0, 0
+    for lo, hi in _candidate_lines(buf):
+        # спаны не выходят за строку — перекрытия снимаются построчно
+        spans: List[Span] = []
+        if "SNILS" in wanted:
+            for sn in iter_snils_spans_bytes(buf, lo, hi):
+                spans.append(Span(start=sn.start, end=sn.end, typ="SNILS", text=sn.raw, replacement="[SNILS]",
+                                  score=1.0 if sn.is_valid else 0.2))
+        if "PHONE" in wanted:
+            for p in iter_phone_spans_bytes(buf, lo, hi):
+                spans.append(Span(start=p.start, end=p.end, typ="PHONE", text=p.raw, replacement="[PHONE]",
+                                  score=0.9))
+        for s in resolve_overlaps(spans, list(DEFAULT_PRIORITY)):
+            c = _make_candidate(s, "")
+            # токен выдаётся и неприменённым (как validate): нумерация та же, что в тексте
+            token = tokens.get(c.typ, _token_key(c.to_dict()))
+            if c.typ == "SNILS" and not c.meta.get("valid"):
+                continue
+            parts.append(buf[pos:s.start])
+            parts.append(token.encode("utf-8"))
+            pos = s.end
+            n += 1
+    if not n:
+        return buf, 0
+    parts.append(buf[pos:])
+    return b"".join(parts), n
+
+
+def filter_stream(
+    inp: BinaryIO,
+    out: BinaryIO,
+    mapping_path: str | Path = "mapping.json",
+    *,
+    types: Sequence[str] = DEFAULT_TYPES,
+    apply_types: Optional[Sequence[str]] = None,
+    encoding: str = "utf-8",
+    chunk_bytes: int = CHUNK_BYTES,
+    save_every: float = DEFAULT_SAVE_EVERY,
+) -> FilterStats:
+    """Читать inp до конца, писать обезличенные строки в out со сбросом после каждого окна."""
+    tm = TokenManager(Path(mapping_path), autosave=False)
+    by_bytes = {t.upper() for t in types} <= BYTE_TYPES and codecs.lookup(encoding).name == "utf-8" \
+        and not apply_types
+    dec = codecs.getincrementaldecoder(encoding)(errors="replace")
+    stats = FilterStats()
+    t0 = last_save = time.perf_counter()
+    try:
+        for raw in _windows(inp, chunk_bytes):
+            if by_bytes:
+                red, n = redact_window_bytes(raw, tm, types)
+            else:
+                red, n = redact_window(dec.decode(raw), tm, types, apply_types)
+                red = red.encode(encoding)
+            out.write(red)
+            out.flush()
+            stats.windows += 1
+            stats.lines += raw.count(b"\n") + (0 if raw.endswith(b"\n") else 1)
+            stats.bytes += len(raw)
+            stats.replaced += n
+            now = time.perf_counter()
+            if now - last_save >= save_every:
+                tm.save()
+                last_save = now
+    finally:
+        tm.save()
+        stats.elapsed_s = time.perf_counter() - t0
+    return stats
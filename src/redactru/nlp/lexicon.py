@@ -0,0 +1,80 @@
+"""Лексикон документа: один морфоанализ на уникальный токен с заглавной буквы.
+
+Детекторы ФИО проверяют одни и те же фамилии/имена на каждом совпадении каждого
+регэкспа, а токены в документе сильно повторяются. Лексикон собирается
+предпроходом по тексту (или по уже готовым токенам, например razdel) и хранит
+флаги Name/Surn/Patr для каждого уникального токена (через morph.name_flags:
+артефакт имён или один разбор). Падеж и род (TokenInfo) считаются по запросу
+и тоже запоминаются. Токены вне предпрохода (например, «де Крус» из регэкспа
+фамилии с частицей) анализируются при первом обращении.
+
+Примеры (doctest):
+>>> lex = DocumentLexicon("Иванов пришёл. Иванова нет, Иванову звонили.")
+>>> sorted(lex)
+['Иванов', 'Иванова', 'Иванову']
+>>> lex.is_surname("Иванову"), lex.case("Иванову")
+(True, 'datv')
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, Iterator, Optional
+
+from redactru.nlp.morph import TokenInfo, analyze, name_flags
+from redactru.nlp.namelex import NAME, SURN, PATR
+
+# Слово с заглавной (в т.ч. через дефис): всё, что могут проверять детекторы ФИО
+_CAP_TOKEN_RE = re.compile(r"(?<!\w)[А-ЯЁ][а-яё]+(?:-[А-ЯЁ][а-яё]+)*(?!\w)")
+
+
+class DocumentLexicon:
+    def __init__(self, text: str | None = None, tokens: Iterable[str] | None = None):
+        self._flags: Dict[str, int] = {}
+        self._info: Dict[str, TokenInfo] = {}
+        if text is not None:
+            self.add_tokens(m.group(0) for m in _CAP_TOKEN_RE.finditer(text))
+        if tokens is not None:
+            self.add_tokens(tokens)
+
+    def add_tokens(self, tokens: Iterable[str]) -> None:
+        """Проанализировать новые уникальные токены с заглавной буквы."""
+        flags = self._flags
+        for t in tokens:
+            if t not in flags and t[:1].isupper():
+                flags[t] = name_flags(t)
+
+    def flags(self, token: str) -> int:
+        f = self._flags.get(token)
+        if f is None:
+            f = self._flags[token] = name_flags(token)
+        return f
+
+    def info(self, token: str) -> TokenInfo:
+        i = self._info.get(token)
+        if i is None:
+            i = self._info[token] = analyze(token)
+        return i
+
+    def is_name(self, token: str) -> bool:
+        return bool(self.flags(token) & NAME)
+
+    def is_surname(self, token: str) -> bool:
+        return bool(self.flags(token) & SURN)
+
+    def is_patr(self, token: str) -> bool:
+        return bool(self.flags(token) & PATR)
+
+    def case(self, token: str) -> Optional[str]:
+        return self.info(token).case
+
+    def gender(self, token: str) -> Optional[str]:
+        return self.info(token).gender
+
+    def __contains__(self, token: object) -> bool:
+        return token in self._flags
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._flags)
+
+    def __len__(self) -> int:
+        return len(self._flags)
@@ -1,9 +1,73 @@
-"""Морфология: pymorphy3 + Petrovich (устойчиво к разным версиям petrovich)."""
+"""Морфология: pymorphy3 + Petrovich (устойчиво к разным версиям petrovich).
+
+Проверки Name/Surn/Patr сначала смотрят в готовый артефакт (redactru.nlp.namelex),
+если он подключён, и только для слов вне словаря вызывают анализатор.
+Артефакт ищется в $REDACTRU_NAME_LEXICON или data/name_lexicon.bin; сам
+pymorphy3.MorphAnalyzer создаётся лениво, при первом реальном обращении.
+"""
 from __future__ import annotations
-from typing import Optional
+import os
+import warnings
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
 import pymorphy3
 
-_morph = pymorphy3.MorphAnalyzer()
+from redactru.nlp.namelex import NAME, SURN, PATR, NameLexicon, current_stamp
+
+if TYPE_CHECKING:
+    from redactru.nlp.lexicon import DocumentLexicon
+
+class _LazyAnalyzer:
+    """MorphAnalyzer создаётся при первом обращении (словари — десятки МБ на процесс)."""
+    _inst = None
+
+    def __getattr__(self, name):
+        if _LazyAnalyzer._inst is None:
+            _LazyAnalyzer._inst = pymorphy3.MorphAnalyzer()
+        return getattr(_LazyAnalyzer._inst, name)
+
+_morph = _LazyAnalyzer()
+
+DEFAULT_NAME_LEXICON = Path("data/name_lexicon.bin")
+_names: Optional[NameLexicon] = None
+
+def load_name_lexicon(path: str | Path | None = None) -> Optional[NameLexicon]:
+    """Подключить артефакт имён. Без path: $REDACTRU_NAME_LEXICON или DEFAULT_NAME_LEXICON.
+    Несовпадение штампа (другая версия словарей) — артефакт не используется."""
+    global _names
+    p = Path(path or os.environ.get("REDACTRU_NAME_LEXICON") or DEFAULT_NAME_LEXICON)
+    lex = None
+    if p.exists():
+        lex = NameLexicon.open(p)
+        if lex.stamp != current_stamp():
+            warnings.warn(f"name lexicon {p} is stale: {lex.stamp} != {current_stamp()}")
+            lex.close()
+            lex = None
+    if _names is not None:
+        _names.close()
+    _names = lex
+    name_flags.cache_clear()
+    return lex
+
+@lru_cache(maxsize=65536)
+def name_flags(token: str) -> int:
+    """Битовая маска NAME|SURN|PATR по всем разборам токена."""
+    if _names is not None:
+        f = _names.get(token)
+        if f is not None:
+            return f
+        if _morph.word_is_known(token.lower()):
+            return 0  # словарное слово без этих граммем
+    flags = 0
+    for x in _morph.parse(token):
+        if "Name" in x.tag:
+            flags |= NAME
+        if "Surn" in x.tag:
+            flags |= SURN
+        if "Patr" in x.tag:
+            flags |= PATR
+    return flags
 
 # --- petrovich (опционально) ---
 try:
@@ -37,21 +101,49 @@ def _normalize_case(tag_or_name: str) -> Optional[str]:
         return t
     return _ALIAS_CASE.get(t)
 
+class TokenInfo(NamedTuple):
+    """Всё, что нужно детекторам ФИО о токене, из одного вызова parse()."""
+    is_name: bool
+    is_surname: bool
+    is_patr: bool
+    case: Optional[str]     # nomn/gent/... по первому разбору
+    gender: Optional[str]   # masc/femn по первому разбору
+
+def analyze(token: str) -> TokenInfo:
+    p = _morph.parse(token)
+    tag = p[0].tag
+    return TokenInfo(
+        is_name=any("Name" in x.tag for x in p),
+        is_surname=any("Surn" in x.tag for x in p),
+        is_patr=any("Patr" in x.tag for x in p),
+        case=next((c for c in ("nomn", "gent", "datv", "accs", "ablt", "loct") if c in tag), None),
+        gender="masc" if "masc" in tag else ("femn" if "femn" in tag else None),
+    )
+
 def lemma(word: str) -> str:
     return _morph.parse(word)[0].normal_form
 
-def is_person_like(token: str) -> bool:
-    p = _morph.parse(token)
-    return any(g in x.tag for x in p for g in ("Name", "Surn", "Patr"))
+def is_known_word(word: str) -> bool:
+    """Слово есть в словаре pymorphy3 (а не разобрано по аналогии)."""
+    return _morph.word_is_known(word.lower())
+
+def is_person_like(token: str, lexicon: Optional["DocumentLexicon"] = None) -> bool:
+    if lexicon is not None:
+        return lexicon.flags(token) != 0
+    return name_flags(token) != 0
 
-def detect_case(token: str) -> Optional[str]:
+def detect_case(token: str, lexicon: Optional["DocumentLexicon"] = None) -> Optional[str]:
+    if lexicon is not None:
+        return lexicon.info(token).case
     p = _morph.parse(token)[0]
     for c in ("nomn", "gent", "datv", "accs", "ablt", "loct"):
         if c in p.tag:
             return c
     return None
 
-def guess_gender_from_token(token: str) -> Optional[str]:
+def guess_gender_from_token(token: str, lexicon: Optional["DocumentLexicon"] = None) -> Optional[str]:
+    if lexicon is not None:
+        return lexicon.info(token).gender
     p = _morph.parse(token)[0]
     if "masc" in p.tag:
         return "masc"
@@ -59,6 +151,15 @@ def guess_gender_from_token(token: str) -> Optional[str]:
         return "femn"
     return None
 
+def surname_reading(token: str) -> Tuple[Optional[str], Optional[str]]:
+    """(падеж, род) фамилии по разборам с Surn; при омонимии («Иванова») — именительный."""
+    reads = [x.tag for x in _morph.parse(token) if "Surn" in x.tag]
+    if not reads:
+        return detect_case(token), guess_gender_from_token(token)
+    tag = next((t for t in reads if "nomn" in t), reads[0])
+    case = next((c for c in ("nomn", "gent", "datv", "accs", "ablt", "loct") if c in tag), None)
+    return case, "masc" if "masc" in tag else ("femn" if "femn" in tag else None)
+
 # --- адаптеры к разным enum-ам petrovich ---
 def _enum_by_value_or_name(EnumCls, value_str: str):
     """Пробуем Enum(value), затем по имени: UPPER/Cap/low."""
@@ -72,7 +173,12 @@ def _enum_by_value_or_name(EnumCls, value_str: str):
     for cand in (value_str.upper(), value_str.capitalize(), value_str):
         if cand in members:
             return members[cand]
-    # 3) не нашли
+    # 3) petrovich 2.x: обычный класс с константами (Case.GENITIVE = 0, Gender.MALE = "male")
+    for cand in (value_str.upper(), value_str.capitalize(), value_str):
+        v = getattr(EnumCls, cand, None)
+        if isinstance(v, (int, str)):
+            return v
+    # 4) не нашли
     raise ValueError(f"Enum member not found for {EnumCls} <- {value_str}")
 
 def _to_petrovich_case(target_case: str):
@@ -82,6 +188,8 @@ def _to_petrovich_case(target_case: str):
     pv = _OC2PV.get(oc)
     if pv is None:
         raise ValueError(f"unsupported case: {target_case}")
+    if oc == "nomn" and not hasattr(Case, "NOMINATIVE") and "NOMINATIVE" not in getattr(Case, "__members__", {}):
+        return None  # в petrovich 2.x именительного нет: исходная форма и есть он
     return _enum_by_value_or_name(Case, pv)
 
 def _to_petrovich_gender(g: Optional[str]):
@@ -95,16 +203,37 @@ def inflect_last(lastname: str, target_case: str, gender: Optional[str] = None)
     if not _PETROVICH_AVAILABLE:
         return lastname
     try:
-        return _pv.lastname(lastname, case=_to_petrovich_case(target_case),
+        case = _to_petrovich_case(target_case)
+        if case is None:
+            return lastname
+        return _pv.lastname(lastname, case=case,
                             gender=_to_petrovich_gender(gender or guess_gender_from_token(lastname)))
     except Exception:
         return lastname
 
+@lru_cache(maxsize=65536)
+def surname_forms(surname: str) -> Tuple[str, ...]:
+    """Все формы фамилии в нижнем регистре (оба рода, ед. и мн. число): лексема разбора Surn;
+    без него — падежи Petrovich для м. и ж. рода; иначе только само слово."""
+    w = surname.strip().lower()
+    reads = [p for p in _morph.parse(w) if "Surn" in p.tag]
+    forms: List[str] = [w]
+    if reads:
+        forms.extend(f.word for f in reads[0].lexeme)
+    else:
+        for case in ("gent", "datv", "accs", "ablt", "loct"):
+            for g in ("male", "female"):
+                forms.append(inflect_last(w, case, g).lower())
+    return tuple(dict.fromkeys(forms))
+
 def inflect_first(firstname: str, target_case: str, gender: Optional[str] = None) -> str:
     if not _PETROVICH_AVAILABLE:
         return firstname
     try:
-        return _pv.firstname(firstname, case=_to_petrovich_case(target_case),
+        case = _to_petrovich_case(target_case)
+        if case is None:
+            return firstname
+        return _pv.firstname(firstname, case=case,
                              gender=_to_petrovich_gender(gender or guess_gender_from_token(firstname)))
     except Exception:
         return firstname
@@ -113,13 +242,22 @@ def inflect_middle(middlename: str, target_case: str, gender: Optional[str] = No
     if not _PETROVICH_AVAILABLE:
         return middlename
     try:
-        return _pv.middlename(middlename, case=_to_petrovich_case(target_case),
+        case = _to_petrovich_case(target_case)
+        if case is None:
+            return middlename
+        return _pv.middlename(middlename, case=case,
                               gender=_to_petrovich_gender(gender or guess_gender_from_token(middlename)))
     except Exception:
         return middlename
 
-def is_name_token(token: str) -> bool:
-    return any("Name" in p.tag for p in _morph.parse(token))
+def is_name_token(token: str, lexicon: Optional["DocumentLexicon"] = None) -> bool:
+    if lexicon is not None:
+        return lexicon.is_name(token)
+    return bool(name_flags(token) & NAME)
+
+def is_surname_token(token: str, lexicon: Optional["DocumentLexicon"] = None) -> bool:
+    if lexicon is not None:
+        return lexicon.is_surname(token)
+    return bool(name_flags(token) & SURN)
 
-def is_surname_token(token: str) -> bool:
-    return any("Surn" in p.tag for p in _morph.parse(token))
\ No newline at end of file
+load_name_lexicon()
\ No newline at end of file
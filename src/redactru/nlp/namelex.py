@@ -0,0 +1,166 @@
+"""Готовый лексикон словоформ с граммемами Name/Surn/Patr (артефакт сборки).
+
+is_name_token/is_surname_token/is_person_like спрашивают у pymorphy3 полный
+список разборов ради трёх граммем. Шаг сборки (build_name_lexicon, CLI
+`redact build-lexicon`) один раз выгружает из словарей pymorphy3 все такие
+словоформы в компактный файл, который в рантайме отображается в память
+(mmap) и делится страницами между процессами.
+
+Формат (little-endian):
+    b"RDNL" | u32 длина штампа | штамп (JSON, UTF-8) | u32 N | (N+1) × u32 смещения | блоб
+Запись i — блоб[off[i]:off[i+1]] = ключ UTF-8 + байт флагов. Ключи — словоформы
+в нижнем регистре с «ё»→«е», отсортированы побайтно; поиск — двоичный.
+
+Штамп хранит версию формата и версию словарей pymorphy3-dicts-ru: при
+несовпадении артефакт не используется (морфология работает как раньше).
+
+Примеры (doctest):
+>>> import tempfile, os
+>>> p = os.path.join(tempfile.mkdtemp(), "names.bin")
+>>> write_name_lexicon({"иванов": SURN, "пётр": NAME}, p, stamp={"format": FORMAT_VERSION})
+2
+>>> lex = NameLexicon.open(p)
+>>> lex.get("Иванов"), lex.get("Петр"), lex.get("стол")
+(2, 1, None)
+>>> lex.close()
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+MAGIC = b"RDNL"
+FORMAT_VERSION = 1
+
+NAME, SURN, PATR = 1, 2, 4
+_GRAMMEMES = (("Name", NAME), ("Surn", SURN), ("Patr", PATR))
+
+
+def _key(word: str) -> bytes:
+    return word.lower().replace("ё", "е").encode("utf-8")
+
+
+def dicts_version() -> str:
+    """Версия пакета словарей pymorphy3 (для штампа артефакта)."""
+    try:
+        from importlib.metadata import version
+        return version("pymorphy3-dicts-ru")
+    except Exception:
+        return "unknown"
+
+
+def current_stamp() -> Dict[str, object]:
+    return {"format": FORMAT_VERSION, "dicts": dicts_version()}
+
+
+def write_name_lexicon(entries: Dict[str, int], path: str | Path, stamp: Dict[str, object] | None = None) -> int:
+    """Записать артефакт из {словоформа: флаги}. Возвращает число записей."""
+    merged: Dict[bytes, int] = {}
+    for w, f in entries.items():
+        k = _key(w)
+        merged[k] = merged.get(k, 0) | int(f)
+    keys = sorted(merged)
+    stamp_b = json.dumps(stamp or current_stamp(), ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+    offsets, blob, pos = [0], bytearray(), 0
+    for k in keys:
+        blob += k
+        blob.append(merged[k])
+        pos += len(k) + 1
+        offsets.append(pos)
+
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(stamp_b)))
+        f.write(stamp_b)
+        f.write(struct.pack("<I", len(keys)))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(blob)
+    return len(keys)
+
+
+def iter_dictionary_names(analyzer) -> Iterable[Tuple[str, int]]:
+    """(словоформа, флаги) для всех слов словаря pymorphy3 с Name/Surn/Patr."""
+    for word, tag, _nf, _para, _idx in analyzer.dictionary.iter_known_words():
+        flags = 0
+        for g, bit in _GRAMMEMES:
+            if g in tag:
+                flags |= bit
+        if flags:
+            yield word, flags
+
+
+def build_name_lexicon(path: str | Path, analyzer=None) -> int:
+    """Собрать артефакт из словарей pymorphy3 (минуты: перебор всех словоформ)."""
+    if analyzer is None:
+        import pymorphy3
+        analyzer = pymorphy3.MorphAnalyzer()
+    entries: Dict[str, int] = {}
+    for w, f in iter_dictionary_names(analyzer):
+        entries[w] = entries.get(w, 0) | f
+    return write_name_lexicon(entries, path, current_stamp())
+
+
+class NameLexicon:
+    """Поиск флагов словоформы в отображённом в память артефакте."""
+
+    def __init__(self, buf, stamp: Dict[str, object], count: int, off_pos: int, blob_pos: int, f=None):
+        self.buf = buf
+        self.stamp = stamp
+        self.count = count
+        self._off_pos = off_pos
+        self._blob_pos = blob_pos
+        self._f = f
+
+    @classmethod
+    def open(cls, path: str | Path) -> "NameLexicon":
+        f = open(path, "rb")
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            f.close()
+            raise
+        if buf[:4] != MAGIC:
+            buf.close()
+            f.close()
+            raise ValueError(f"not a name lexicon: {path}")
+        (slen,) = struct.unpack_from("<I", buf, 4)
+        stamp = json.loads(bytes(buf[8:8 + slen]).decode("utf-8"))
+        (count,) = struct.unpack_from("<I", buf, 8 + slen)
+        off_pos = 12 + slen
+        blob_pos = off_pos + 4 * (count + 1)
+        return cls(buf, stamp, count, off_pos, blob_pos, f)
+
+    def close(self) -> None:
+        self.buf.close()
+        if self._f is not None:
+            self._f.close()
+
+    def _entry(self, i: int) -> Tuple[int, int]:
+        a, b = struct.unpack_from("<2I", self.buf, self._off_pos + 4 * i)
+        return self._blob_pos + a, self._blob_pos + b
+
+    def get(self, word: str) -> Optional[int]:
+        """Флаги NAME|SURN|PATR или None, если словоформы нет в артефакте."""
+        k = _key(word)
+        lo, hi = 0, self.count
+        buf = self.buf
+        while lo < hi:
+            mid = (lo + hi) // 2
+            a, b = self._entry(mid)
+            cur = buf[a:b - 1]
+            if cur < k:
+                lo = mid + 1
+            elif cur > k:
+                hi = mid
+            else:
+                return buf[b - 1]
+        return None
+
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,319 @@
+"""Суррогатные ФИО вместо токенов [PER_###], согласованные по падежу и роду.
+
+Вместо «[PER_001] передал документы [PER_002]» получается читаемое
+«Смирнову А.И. передал документы Кузнецова Ольга». Суррогат выбирается по
+номеру токена PER (mapping.json остаётся источником истины), форма — по
+падежу упоминания (detect_case) и роду (отчество/имя/фамилия).
+
+Личность — сочетание имени, фамилии и отчества из пула (биекция номера в
+тройку индексов: первые len(пула) номеров — строки пула как есть, дальше —
+перестановки, всего len³). Разным номерам нужны и разные суррогаты в тексте:
+если упоминание в своей форме (например, одна фамилия или фамилия с
+инициалами) совпало бы с суррогатом меньшего номера той же формы, вместо
+суррогата остаётся токен [PER_###].
+
+Склонение через Petrovich медленное, поэтому для всего пула суррогатов
+заранее строятся таблицы: 6 падежей × 2 рода × (имя, фамилия, отчество).
+Таблицы кешируются на диске (data/surrogate_tables.json или
+$REDACTRU_SURROGATE_TABLES) со штампом: хеш пула + версия petrovich; при
+несовпадении перестраиваются. Замена упоминания — разбор его формы (с кешем)
+и поиск в таблице.
+
+Примеры (doctest):
+>>> t = SurrogateTables.build({"masc": [("Пётр", "Смирнов", "Ильич")], "femn": [("Анна", "Орлова", "Петровна")]})
+>>> t.form("masc", 0, "last", "nomn"), t.form("femn", 0, "first", "nomn")
+('Смирнов', 'Анна')
+>>> t.render("Иванов И.И.", 1)
+'Смирнов П.И.'
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from redactru.nlp.morph import (
+    NAME, PATR, SURN, detect_case, guess_gender_from_token, inflect_first, inflect_last,
+    inflect_middle, lemma, name_flags, surname_reading,
+)
+
+FORMAT_VERSION = 1
+CASES = ("nomn", "gent", "datv", "accs", "ablt", "loct")
+ROLES = ("first", "last", "middle")
+DEFAULT_TABLES = Path("data/surrogate_tables.json")
+
+# (имя, фамилия, отчество) в именительном падеже; пулы одинаковой длины,
+# чтобы номер токена давал одну и ту же «личность» в обоих родах;
+# строки комбинируются (SurrogateTables.identity)
+POOL: Dict[str, List[Tuple[str, str, str]]] = {
+    "masc": [
+        ("Алексей", "Смирнов", "Игоревич"), ("Андрей", "Кузнецов", "Павлович"),
+        ("Борис", "Попов", "Андреевич"), ("Вадим", "Васильев", "Олегович"),
+        ("Виктор", "Соколов", "Сергеевич"), ("Глеб", "Михайлов", "Романович"),
+        ("Денис", "Новиков", "Викторович"), ("Егор", "Фёдоров", "Денисович"),
+        ("Кирилл", "Морозов", "Антонович"), ("Леонид", "Волков", "Борисович"),
+        ("Максим", "Алексеев", "Юрьевич"), ("Никита", "Лебедев", "Максимович"),
+        ("Олег", "Семёнов", "Глебович"), ("Павел", "Егоров", "Кириллович"),
+        ("Роман", "Павлов", "Вадимович"), ("Семён", "Козлов", "Леонидович"),
+        ("Тимур", "Степанов", "Никитич"), ("Фёдор", "Николаев", "Тимурович"),
+        ("Юрий", "Орлов", "Семёнович"), ("Ярослав", "Андреев", "Фёдорович"),
+    ],
+    "femn": [
+        ("Анна", "Смирнова", "Игоревна"), ("Валерия", "Кузнецова", "Павловна"),
+        ("Галина", "Попова", "Андреевна"), ("Дарья", "Васильева", "Олеговна"),
+        ("Елена", "Соколова", "Сергеевна"), ("Жанна", "Михайлова", "Романовна"),
+        ("Зоя", "Новикова", "Викторовна"), ("Инна", "Фёдорова", "Денисовна"),
+        ("Ксения", "Морозова", "Антоновна"), ("Лариса", "Волкова", "Борисовна"),
+        ("Марина", "Алексеева", "Юрьевна"), ("Надежда", "Лебедева", "Максимовна"),
+        ("Ольга", "Семёнова", "Глебовна"), ("Полина", "Егорова", "Кирилловна"),
+        ("Раиса", "Павлова", "Вадимовна"), ("Светлана", "Козлова", "Леонидовна"),
+        ("Тамара", "Степанова", "Никитична"), ("Ульяна", "Николаева", "Тимуровна"),
+        ("Юлия", "Орлова", "Семёновна"), ("Яна", "Андреева", "Фёдоровна"),
+    ],
+}
+
+_INFLECT = {"first": inflect_first, "last": inflect_last, "middle": inflect_middle}
+
+# части упоминания: инициал, слово (в т.ч. через дефис), всё прочее — как есть
+_PIECE_RE = re.compile(r"(?P<init>[А-ЯЁA-Z]\.)|(?P<word>[А-ЯЁа-яё]+(?:-[А-ЯЁа-яё]+)*)|(?P<other>\s+|.)")
+# отчество в любом падеже: основа на -вич/-ич (м.) или -вн/-чн (ж.) + окончание
+_PATR_RE = re.compile(r"(?:ич|вн|чн)(?:а|у|е|ем|ом|ой|ы)?$", re.IGNORECASE)
+_FEMN_PATR_RE = re.compile(r"(?:вн|чн)\w*$", re.IGNORECASE)
+
+
+def _petrovich_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("petrovich")
+    except Exception:
+        return "none"
+
+
+def pool_stamp(pool: Dict[str, Sequence[Tuple[str, str, str]]]) -> Dict[str, object]:
+    """Штамп таблиц: версия формата, хеш пула, версия petrovich."""
+    blob = json.dumps({g: [list(x) for x in pool[g]] for g in sorted(pool)}, ensure_ascii=False)
+    return {
+        "format": FORMAT_VERSION,
+        "pool": hashlib.sha1(blob.encode("utf-8")).hexdigest(),
+        "petrovich": _petrovich_version(),
+    }
+
+
+class _Shape(NamedTuple):
+    """Разобранное упоминание: части (тип, текст, роль), падеж, род, ключ для токена."""
+    pieces: Tuple[Tuple[str, str, Optional[str]], ...]
+    case: str
+    gender: str
+    key: str
+
+
+def _assign_roles(words: List[str], has_initials: bool) -> List[Optional[str]]:
+    roles: List[Optional[str]] = [None] * len(words)
+    caps = [i for i, w in enumerate(words) if w[:1].isupper()]  # частицы «де», «фон» — без роли
+    if has_initials:
+        for i in caps:
+            roles[i] = "last"
+        return roles
+    rest = []
+    for i in caps:
+        w = words[i]
+        if len(caps) > 1 and i != caps[0] and (name_flags(w) & PATR or _PATR_RE.search(w)):
+            roles[i] = "middle"
+        else:
+            rest.append(i)
+    if len(rest) == 1:
+        roles[rest[0]] = "first" if name_flags(words[rest[0]]) & NAME else "last"
+    elif len(rest) >= 2:
+        a, b = rest[0], rest[-1]
+        fa, fb = name_flags(words[a]), name_flags(words[b])
+        name_first = bool(fa & NAME) and not (fa & SURN and fb & NAME and not fb & SURN)
+        if "middle" in roles:  # «Фамилия Имя Отчество» — обычный порядок документов
+            name_first = bool(fa & NAME) and not fa & SURN
+        roles[a], roles[b] = ("first", "last") if name_first else ("last", "first")
+        # остальное («Ла» в «де Ла Крус») — часть фамилии, у суррогата не нужна
+    return roles
+
+
+def _case_gender(words: List[str], roles: List[Optional[str]]) -> Tuple[str, str]:
+    """Падеж — по имени, иначе по отчеству, иначе по фамилии; род — по отчеству, имени, фамилии."""
+    by_role = {r: w for w, r in zip(words, roles) if r}
+    first, mid, last = by_role.get("first"), by_role.get("middle"), by_role.get("last")
+    case = gender = None
+    if mid:
+        gender = "femn" if _FEMN_PATR_RE.search(mid) else "masc"
+    for w in (first, mid):  # имя и отчество склоняются надёжнее фамилии
+        if w and case is None:
+            case = detect_case(w)
+    if first and gender is None:
+        gender = guess_gender_from_token(first)
+    if last and (case is None or gender is None):
+        c, g = surname_reading(last)
+        case = case or c
+        gender = gender or g
+    return case or "nomn", gender or "masc"
+
+
+@lru_cache(maxsize=65536)
+def _shape(mention: str) -> _Shape:
+    pieces: List[Tuple[str, str]] = []
+    for m in _PIECE_RE.finditer(mention):
+        kind = m.lastgroup or "other"
+        pieces.append((kind, m.group(0)))
+    words = [t for k, t in pieces if k == "word"]
+    roles = _assign_roles(words, any(k == "init" for k, _ in pieces))
+    case, gender = _case_gender(words, roles)
+
+    it = iter(roles)
+    out, key = [], []
+    for kind, t in pieces:
+        role = next(it) if kind == "word" else None
+        out.append((kind, t, role))
+        if kind == "word":
+            key.append(lemma(t) if role else t.lower())
+        elif kind == "init":
+            key.append(t)
+    return _Shape(pieces=tuple(out), case=case, gender=gender, key=" ".join(key))
+
+
+def surrogate_key(mention: str) -> str:
+    """Ключ упоминания без падежа: разные падежи одного лица дают один токен."""
+    return _shape(mention).key
+
+
+def token_number(token: str) -> int:
+    """[PER_007] -> 7 (0, если номера нет)."""
+    m = re.search(r"_(\d+)\]?$", token.strip())
+    return int(m.group(1)) if m else 0
+
+
+def _match_case(src: str, form: str) -> str:
+    if len(src) > 1 and src.isupper():
+        return form.upper()
+    return form
+
+
+class SurrogateTables:
+    """Таблицы форм: tables[род][личность][роль][падеж]."""
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Dict[str, str]]]], stamp: Dict[str, object]):
+        self.tables = tables
+        self.stamp = stamp
+        # форма упоминания -> (суррогат -> первый номер, сколько номеров уже отрисовано)
+        self._taken: Dict[tuple, Tuple[Dict[str, int], int]] = {}
+
+    @classmethod
+    def build(cls, pool: Dict[str, Sequence[Tuple[str, str, str]]] = POOL) -> "SurrogateTables":
+        tables: Dict[str, List[Dict[str, Dict[str, str]]]] = {}
+        for g, people in pool.items():
+            rows = []
+            for person in people:
+                rows.append({
+                    role: {c: _INFLECT[role](base, c, g) for c in CASES}
+                    for role, base in zip(ROLES, person)
+                })
+            tables[g] = rows
+        return cls(tables, pool_stamp(pool))
+
+    @classmethod
+    def load(cls, path: str | Path | None = None,
+             pool: Dict[str, Sequence[Tuple[str, str, str]]] = POOL) -> "SurrogateTables":
+        """Прочитать таблицы с диска; если их нет или штамп устарел — построить и записать."""
+        p = Path(path or os.environ.get("REDACTRU_SURROGATE_TABLES") or DEFAULT_TABLES)
+        stamp = pool_stamp(pool)
+        if p.exists():
+            try:
+                data = json.loads(p.read_text(encoding="utf-8"))
+                if data.get("stamp") == stamp:
+                    return cls(data["tables"], stamp)
+            except Exception:
+                pass
+        t = cls.build(pool)
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_text(json.dumps({"stamp": t.stamp, "tables": t.tables}, ensure_ascii=False), encoding="utf-8")
+        except OSError:
+            pass  # кеш — оптимизация; без записи просто строим заново в следующий раз
+        return t
+
+    def form(self, gender: str, row: int, role: str, case: str) -> str:
+        rows = self.tables.get(gender) or self.tables["masc"]
+        return rows[row % len(rows)][role].get(case) or rows[row % len(rows)][role]["nomn"]
+
+    def capacity(self, gender: str = "masc") -> int:
+        return len(self.tables.get(gender) or self.tables["masc"]) ** 3
+
+    def identity(self, ident: int, gender: str = "masc") -> Optional[Dict[str, int]]:
+        """Строки пула {роль: индекс} для номера личности; None — пул исчерпан.
+
+        ident = r + n·q: фамилия r, имя (r + q) mod n, отчество (r + q // n) mod n —
+        при ident < n это строка ident целиком, и разные ident < n³ дают разные тройки.
+        """
+        n = len(self.tables.get(gender) or self.tables["masc"])
+        if ident >= n ** 3:
+            return None
+        r, q = ident % n, ident // n
+        return {"last": r, "first": (r + q) % n, "middle": (r + q // n) % n}
+
+    def _render_ident(self, sh: _Shape, ident: int) -> Optional[str]:
+        rows = self.identity(ident, sh.gender)
+        if rows is None:
+            return None
+        out: List[str] = []
+        n_init = 0
+        for kind, t, role in sh.pieces:
+            if kind == "word":
+                if role is None:
+                    # частица фамилии («де», «фон») у суррогата не нужна
+                    continue
+                out.append(_match_case(t, self.form(sh.gender, rows[role], role, sh.case)))
+            elif kind == "init":
+                role_i = "first" if n_init == 0 else "middle"
+                n_init += 1
+                out.append(self.form(sh.gender, rows[role_i], role_i, "nomn")[0] + ".")
+            else:
+                if t.isspace() and (not out or out[-1].isspace()):
+                    continue  # пробел после выброшенной частицы
+                out.append(t)
+        return "".join(out).strip()
+
+    def render(self, mention: str, number: int) -> Optional[str]:
+        """Суррогат для упоминания: та же форма (инициалы, порядок), падеж и род.
+        number — номер токена PER (1, 2, ...), определяет «личность» из пула.
+        None — в этой форме суррогат совпал бы с суррогатом меньшего номера
+        (или пул исчерпан): такое упоминание остаётся токеном."""
+        sh = _shape(mention)
+        ident = max(number - 1, 0)
+        # суррогат зависит только от формы упоминания, не от самих слов
+        spec = (sh.case, sh.gender, tuple((k, r, t if k == "other" else len(t) > 1 and t.isupper())
+                                          for k, t, r in sh.pieces))
+        seen, done = self._taken.get(spec, ({}, 0))
+        for j in range(done, ident + 1):
+            sj = self._render_ident(sh, j)
+            if sj is not None:
+                seen.setdefault(sj, j)
+        self._taken[spec] = (seen, max(done, ident + 1))
+        text = self._render_ident(sh, ident)
+        if text is None or seen.get(text) != ident:
+            return None
+        return text
+
+
+_tables: Optional[SurrogateTables] = None
+
+
+def get_tables() -> SurrogateTables:
+    """Таблицы процесса (загружаются при первом обращении)."""
+    global _tables
+    if _tables is None:
+        _tables = SurrogateTables.load()
+    return _tables
+
+
+def render_surrogate(mention: str, token: str, tables: Optional[SurrogateTables] = None) -> str:
+    """Суррогатное ФИО для упоминания по его токену PER ([PER_003] -> третья личность пула);
+    сам токен, если в этой форме упоминания различимого суррогата нет."""
+    return (tables or get_tables()).render(mention, token_number(token)) or token
@@ -0,0 +1,196 @@
+"""Параллельный detect одного большого документа: шарды по абзацам с перекрытием.
+
+detect_candidates идёт по тексту одним процессом. Здесь текст (UTF-8) режется
+на шарды по границам абзацев (b"\\n\\n", без них — по строкам). У шарда есть
+«ядро» [cs, ce) — ядра покрывают текст без пропусков — и окно [ws, we): ядро
+плюс не меньше overlap байт с каждой стороны, тоже по границам абзацев.
+Воркер декодирует окно, прогоняет детекторы реестра и оставляет «сырые»
+спаны, начинающиеся в ядре, со смещениями относительно начала ядра и длину
+ядра в символах. Родитель переводит смещения в документные (префиксные суммы
+длин ядер) и снимает перекрытия по компонентам связности: resolve_overlaps
+решает каждую группу пересекающихся спанов независимо от остальных, поэтому
+результат совпадает с последовательным detect_candidates, а спаны на стыке
+шардов разбираются вместе.
+
+Адреса (SERIAL_TYPES) ищутся одним проходом по всему тексту в родителе, пока
+воркеры заняты шардами: совпадение ADDRESS_SPAN_RE может начинаться сколь
+угодно далеко до ядра.
+
+Текст не передаётся воркерам через pickle: для строки он один раз пишется в
+SharedMemory (UTF-8), для файла воркеры сами читают свой диапазон байт
+(detect_file_parallel). Левый контекст детекторов (метка перед телефоном,
+слово перед ФИО — до 48 символов) и совпадения через границу ядра
+укладываются в перекрытие.
+
+Пример (doctest):
+>>> from redactru.detect import detect_candidates
+>>> txt = "\\n\\n".join(f"Абзац {i}: тел. +7 (999) 123-45-{i:02d}, Иванов И.И." for i in range(40))
+>>> par = detect_parallel(txt, workers=2, shard_bytes=512, overlap_bytes=64)
+>>> par == detect_candidates(txt)
+True
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Callable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from redactru.detect import Candidate, _make_candidate
+from redactru.registry import DETECTORS, run_detectors
+from redactru.util.mapped import open_mapped
+from redactru.util.spans import DEFAULT_PRIORITY, Span, resolve_by_components
+
+DEFAULT_SHARD_BYTES = 8 << 20    # ~8 МБ UTF-8 на шард
+DEFAULT_OVERLAP_BYTES = 16 << 10
+# ADDRESS_SPAN_RE (DOTALL, «.+?») может тянуться через абзацы: отвергнутое длинное
+# совпадение сдвигает позицию поиска, и результат зависит от всего текста до шарда.
+# Такие детекторы идут одним проходом в родителе, параллельно с шардами.
+SERIAL_TYPES = ("ADDR",)
+
+
+class Shard(NamedTuple):
+    ws: int  # начало окна (байт)
+    cs: int  # начало ядра
+    ce: int  # конец ядра
+    we: int  # конец окна
+
+
+def _boundary_after(buf, pos: int) -> int:
+    """Ближайшая граница абзаца (после b"\\n\\n", иначе после b"\\n") не раньше pos; иначе конец."""
+    n = len(buf)
+    if pos >= n:
+        return n
+    for sep in (b"\n\n", b"\n"):
+        i = buf.find(sep, pos)
+        if i >= 0:
+            return i + len(sep)
+    return n
+
+
+def _boundary_before(buf, pos: int) -> int:
+    """Ближайшая граница абзаца не позже pos; иначе начало."""
+    if pos <= 0:
+        return 0
+    for sep in (b"\n\n", b"\n"):
+        i = buf.rfind(sep, 0, pos)
+        if i >= 0:
+            return i + len(sep)
+    return 0
+
+
+def plan_shards(buf, shard_bytes: int = DEFAULT_SHARD_BYTES,
+                overlap_bytes: int = DEFAULT_OVERLAP_BYTES) -> List[Shard]:
+    """Шарды для байтового буфера (bytes/mmap): ядра подряд, окна с перекрытием."""
+    n = len(buf)
+    out: List[Shard] = []
+    cs = 0
+    while cs < n:
+        ce = _boundary_after(buf, cs + max(1, shard_bytes))
+        ws = _boundary_before(buf, cs - overlap_bytes) if cs else 0
+        we = _boundary_after(buf, ce + overlap_bytes) if ce < n else n
+        out.append(Shard(ws, cs, ce, we))
+        cs = ce
+    return out
+
+
+def _detect_window(window: bytes, shard: Shard, types: Optional[Sequence[str]]) -> Tuple[int, List[Span]]:
+    text = window.decode("utf-8", errors="ignore")
+    # граница ядра — перевод строки (ASCII): декодирование по частям даёт тот же текст
+    a = len(window[:shard.cs - shard.ws].decode("utf-8", errors="ignore"))
+    b = a + len(window[shard.cs - shard.ws:shard.ce - shard.ws].decode("utf-8", errors="ignore"))
+    spans = [replace(s, start=s.start - a, end=s.end - a)
+             for s in run_detectors(text, types) if a <= s.start < b]
+    return b - a, spans
+
+
+def _shard_from_shm(name: str, shard: Shard, types) -> Tuple[int, List[Span]]:
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        window = bytes(shm.buf[shard.ws:shard.we])
+    finally:
+        shm.close()
+    return _detect_window(window, shard, types)
+
+
+def _shard_from_file(path: str, shard: Shard, types) -> Tuple[int, List[Span]]:
+    with open(path, "rb") as f:
+        f.seek(shard.ws)
+        window = f.read(shard.we - shard.ws)
+    return _detect_window(window, shard, types)
+
+
+def _detect(fn, src: str, shards: List[Shard], workers: Optional[int],
+            types: Optional[Sequence[str]], load_text: Callable[[], str]) -> List[Span]:
+    wanted = [t.upper() for t in (types or DETECTORS)]
+    sharded = [t for t in wanted if t not in SERIAL_TYPES]
+    serial = [t for t in wanted if t in SERIAL_TYPES]
+    workers = min(max(1, workers or os.cpu_count() or 1), max(1, len(shards)))
+
+    def run_serial() -> List[Span]:
+        return run_detectors(load_text(), serial) if serial else []
+
+    if not sharded or workers == 1:
+        results = [fn(src, sh, sharded) for sh in shards] if sharded else []
+        spans = run_serial()
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = pool.map(fn, [src] * len(shards), shards, [sharded] * len(shards))
+            spans = run_serial()  # пока воркеры заняты шардами
+            results = list(pending)
+    off = 0
+    for core_chars, part in results:
+        spans.extend(replace(s, start=s.start + off, end=s.end + off) for s in part)
+        off += core_chars
+    return spans
+
+
+def _candidates(spans: List[Span], priority: Iterable[str]) -> List[Candidate]:
+    return [_make_candidate(s, "") for s in resolve_by_components(spans, list(priority))]
+
+
+def detect_parallel(
+    text: str,
+    workers: Optional[int] = None,
+    priority: Iterable[str] = DEFAULT_PRIORITY,
+    *,
+    types: Optional[Sequence[str]] = None,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+    overlap_bytes: int = DEFAULT_OVERLAP_BYTES,
+) -> List[Candidate]:
+    """То же, что detect_candidates(text), шардами в пуле из workers процессов."""
+    data = text.encode("utf-8", errors="ignore")
+    shards = plan_shards(data, shard_bytes, overlap_bytes)
+    if not shards:
+        return []
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    try:
+        shm.buf[:len(data)] = data
+        del data
+        spans = _detect(_shard_from_shm, shm.name, shards, workers, types, lambda: text)
+    finally:
+        shm.close()
+        shm.unlink()
+    return _candidates(spans, priority)
+
+
+def detect_file_parallel(
+    path: str | Path,
+    workers: Optional[int] = None,
+    priority: Iterable[str] = DEFAULT_PRIORITY,
+    *,
+    types: Optional[Sequence[str]] = None,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+    overlap_bytes: int = DEFAULT_OVERLAP_BYTES,
+) -> List[Candidate]:
+    """То же, что detect_file(path) для UTF-8: воркеры читают из файла только свои окна
+    (текст целиком декодируется только в родителе — для SERIAL_TYPES)."""
+    with open_mapped(str(path)) as buf:
+        shards = plan_shards(buf, shard_bytes, overlap_bytes)
+
+    def load_text() -> str:
+        return Path(path).read_text(encoding="utf-8", errors="ignore")
+
+    return _candidates(_detect(_shard_from_file, str(path), shards, workers, types, load_text), priority)
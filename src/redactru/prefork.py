@@ -0,0 +1,136 @@
+from __future__ import annotations
+"""
+Пул предварительно разветвлённых (fork) процессов с общими моделями.
+
+Обычный пул (spawn или инициализатор в каждом процессе) грузит в каждом
+воркере свои словари pymorphy3, правила Petrovich и веса stanza: память на
+процесс ограничивает число ядер. Здесь родитель один раз загружает модели
+(preload), собирает мусор и замораживает кучу (gc.freeze — сборщик больше не
+обходит эти объекты и не трогает их страницы), а потом делает fork воркеров:
+страницы моделей остаются общими (copy-on-write), пока их никто не пишет.
+
+Задания:
+- "detect"  — redactru.detect.detect_candidates, результат — словари кандидатов;
+- "hybrid"  — HybridAnonymizer.process (модель stanza загружена в родителе, CPU).
+
+memory_report() — RSS/PSS/общая/частная память процессов пула по
+/proc/<pid>/smaps_rollup (только Linux; на других ОС отчёт пустой).
+Потоки torch в родителе фиксируются до загрузки модели (1 на процесс):
+fork после запуска пула потоков OpenMP может зависнуть.
+"""
+
+import gc
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+MODES = ("detect", "hybrid")
+_WARMUP_TEXT = "Иванову И.И. звонили по тел. +7 (999) 123-45-67, г. Казань, ул. Ленина, д. 5."
+
+# заполняется в родителе до fork; воркеры получают его готовым
+_STATE: Dict[str, Any] = {}
+
+
+@dataclass
+class ProcMemory:
+    pid: int
+    rss_kb: int       # резидентная память процесса
+    pss_kb: int       # пропорциональная доля (общие страницы делятся на число владельцев)
+    shared_kb: int    # страницы, общие с другими процессами (в том числе с родителем)
+    private_kb: int   # страницы только этого процесса
+
+
+def preload(mode: str = "detect", profile: Optional[str] = None) -> None:
+    """Загрузить модели в текущем (родительском) процессе и заморозить кучу."""
+    if mode not in MODES:
+        raise ValueError(f"unsupported mode: {mode} (known: {', '.join(MODES)})")
+    from redactru.detect import detect_candidates
+    from redactru.nlp import morph
+
+    morph.analyze("Иванов")                  # словари pymorphy3
+    morph.inflect_last("Иванов", "datv")     # правила Petrovich
+    detect_candidates(_WARMUP_TEXT)          # регэкспы, ленивые таблицы правил
+    if mode == "hybrid":
+        from hybrid.aggregator import HybridAnonymizer
+
+        kw = {"profile": profile} if profile else {}
+        az = HybridAnonymizer(device="cpu", threads=1, **kw)
+        az.process(_WARMUP_TEXT)
+        _STATE["hybrid"] = az
+    _STATE["mode"] = mode
+    gc.collect()
+    gc.freeze()
+
+
+def _run(text: str) -> List[Dict[str, Any]]:
+    if _STATE["mode"] == "hybrid":
+        return [{"start": s.start, "end": s.end, "text": s.text, "type": s.type,
+                 "score": round(s.score, 4), "meta": s.meta}
+                for s in _STATE["hybrid"].process(text)]
+    from redactru.detect import detect_candidates
+    return [c.to_dict() for c in detect_candidates(text)]
+
+
+def _pid(_: int) -> int:
+    # все воркеры ждут друг друга — каждое задание достаётся отдельному процессу
+    _STATE["barrier"].wait(timeout=60)
+    return os.getpid()
+
+
+def _smaps_rollup(pid: int) -> Optional[ProcMemory]:
+    try:
+        lines = Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()
+    except OSError:
+        return None
+    kb: Dict[str, int] = {}
+    for ln in lines:
+        parts = ln.split()
+        if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+            kb[parts[0][:-1]] = int(parts[1])
+    shared = kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0)
+    private = kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0)
+    return ProcMemory(pid, kb.get("Rss", 0), kb.get("Pss", 0), shared, private)
+
+
+class PreforkPool:
+    def __init__(self, workers: Optional[int] = None, mode: str = "detect", profile: Optional[str] = None):
+        """Загрузить модели (preload) и разветвить workers процессов (по умолчанию — число ядер)."""
+        preload(mode, profile)
+        self.mode = mode
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        ctx = get_context("fork")
+        _STATE["barrier"] = ctx.Barrier(self.workers)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+        # ProcessPoolExecutor поднимает процессы по мере заданий — поднимем все сразу,
+        # пока родитель ещё ничего не изменил в общей куче
+        self.pids = sorted(self._pool.map(_pid, range(self.workers)))
+
+    def map(self, texts: Sequence[str], chunksize: int = 1) -> List[List[Dict[str, Any]]]:
+        """Результаты по текстам в исходном порядке."""
+        return list(self._pool.map(_run, texts, chunksize=chunksize))
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Память родителя и воркеров: по процессам и суммарно (кБ)."""
+        parent = _smaps_rollup(os.getpid())
+        procs = [m for m in (_smaps_rollup(p) for p in self.pids) if m is not None]
+        return {
+            "parent": parent,
+            "workers": procs,
+            "workers_rss_kb": sum(m.rss_kb for m in procs),
+            "workers_pss_kb": sum(m.pss_kb for m in procs),
+            "workers_shared_kb": sum(m.shared_kb for m in procs),
+            "workers_private_kb": sum(m.private_kb for m in procs),
+        }
+
+    def close(self) -> None:
+        self._pool.shutdown()
+        gc.unfreeze()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,113 @@
+"""Общий реестр детекторов: одни и те же правила для redactru.detect и hybrid.
+
+Каждый детектор — функция (text, ctx) -> Iterable[Span] для одного типа;
+исключение — "ID": один проход по группам цифр выдаёт спаны всех числовых
+идентификаторов (INN, OGRN, OGRNIP, CARD, OMS, PASSPORT — redactru.util.ids).
+run_detectors прогоняет выбранные типы по тексту один раз с общим
+ContextIndex; результат (список Span) годится и для detect_candidates
+(spans=...), и для HybridAnonymizer.process (extra_regex_spans=...) — без
+повторного сканирования и без перевода в словари.
+
+Примеры (doctest):
+>>> spans = run_detectors("СНИЛС 112-233-445 95, тел. +7 (999) 123-45-67", types=("SNILS", "PHONE"))
+>>> [(s.typ, s.text) for s in spans]
+[('SNILS', '112-233-445 95'), ('PHONE', '+7 (999) 123-45-67')]
+"""
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from redactru.rules.gazetteer import iter_gazetteer_addresses
+from redactru.rules.regex_ru import iter_address_spans, iter_person_spans
+from redactru.util.context import ContextIndex
+from redactru.util.ids import id_score, iter_id_spans
+from redactru.util.phones import iter_phone_spans
+from redactru.util.snils import iter_snils_spans
+from redactru.util.spans import Span
+
+Detector = Callable[[str, Optional[ContextIndex]], Iterable[Span]]
+
+DETECTORS: Dict[str, Detector] = {}
+
+
+def register_detector(typ: str, fn: Detector) -> Detector:
+    """Зарегистрировать (или заменить) детектор типа typ. Порядок регистрации = порядок прогона."""
+    DETECTORS[typ.upper()] = fn
+    return fn
+
+
+def run_detectors(
+    text: str,
+    types: Optional[Sequence[str]] = None,
+    ctx: Optional[ContextIndex] = None,
+) -> List[Span]:
+    """Все спаны выбранных типов (по умолчанию — всех зарегистрированных), без снятия перекрытий."""
+    if ctx is None:
+        ctx = ContextIndex(text)  # общий для проверок левого контекста PHONE и PER
+    wanted = None if types is None else {t.upper() for t in types}
+    spans: List[Span] = []
+    for typ, fn in DETECTORS.items():
+        if wanted is None or typ in wanted:
+            spans.extend(fn(text, ctx))
+    return spans
+
+
+def _snils_candidates(text: str, ctx: Optional[ContextIndex] = None) -> Iterable[Span]:
+    for s in iter_snils_spans(text):
+        score = 1.0 if s.is_valid else 0.2
+        yield Span(start=s.start, end=s.end, typ="SNILS", text=text[s.start:s.end],
+                   replacement="[SNILS]", score=score)
+
+
+def _id_candidates(text: str, ctx: Optional[ContextIndex] = None) -> Iterable[Span]:
+    # один проход по группам цифр на все типы идентификаторов (см. redactru.util.ids)
+    for s in iter_id_spans(text):
+        yield Span(start=s.start, end=s.end, typ=s.typ, text=s.raw,
+                   replacement=f"[{s.typ}]", score=id_score(s))
+
+
+def _phone_candidates(text: str, ctx: Optional[ContextIndex] = None) -> Iterable[Span]:
+    for p in iter_phone_spans(text, ctx):
+        yield Span(start=p.start, end=p.end, typ="PHONE", text=text[p.start:p.end],
+                   replacement="[PHONE]", score=0.9)
+
+
+# Робастный фоллбэк для коротких адресных фраз в одном предложении
+USE_FALLBACK_ADDR = False
+_FALLBACK_ADDR_RE = re.compile(
+    r"""(?P<addr>
+        (?:г\.?|город)\s+[^\n\r.!?]{1,120}?                # город + контекст
+        (?:ул\.?|улица|пр-?кт|проспект|пер\.?|переулок)    # улица/проспект/пер.
+        [^\n\r.!?]{0,120}?
+        (?:д\.?|дом)\s*\d+[^\n\r.!?]*                      # дом N и хвост
+    )""",
+    re.VERBOSE,  # по ctx.view — регистр уже снят
+)
+
+def _addr_candidates(text: str, ctx: Optional[ContextIndex] = None) -> Iterable[Span]:
+    if ctx is None:
+        ctx = ContextIndex(text)
+    view = ctx.view  # общий нормализованный текст документа
+    for a in iter_address_spans(text, view):
+        yield Span(start=a.start, end=a.end, typ="ADDR", text=a.raw, replacement="[ADDR]", score=0.7)
+    # газеттир ФИАС/ГАР, если собран (redactru.rules.gazetteer): «Казань, Баумана 5» без маркеров
+    for a in iter_gazetteer_addresses(text, view):
+        yield Span(start=a.start, end=a.end, typ="ADDR", text=a.raw, replacement="[ADDR]", score=0.6)
+    if USE_FALLBACK_ADDR:
+        for m in _FALLBACK_ADDR_RE.finditer(view.norm):
+            s, e = view.orig_span(m.start("addr"), m.end("addr"))
+            yield Span(start=s, end=e, typ="ADDR", text=text[s:e], replacement="[ADDR]", score=0.6)
+
+
+def _per_candidates(text: str, ctx: Optional[ContextIndex] = None) -> Iterable[Span]:
+    for per in iter_person_spans(text, ctx):
+        yield Span(start=per.start, end=per.end, typ="PER", text=per.raw,
+                   replacement="[PER]", score=0.5)
+
+
+register_detector("SNILS", _snils_candidates)
+register_detector("PHONE", _phone_candidates)
+register_detector("ID", _id_candidates)
+register_detector("ADDR", _addr_candidates)
+register_detector("PER", _per_candidates)
@@ -0,0 +1,373 @@
+"""Локальный газеттир адресов: названия регионов, населённых пунктов и улиц.
+
+iter_address_spans находит адрес только по двум маркерам типа и номеру дома,
+поэтому «Казань, Баумана 5» пропускается, а ослаблять регэкспы — медленно и
+шумно. Газеттир собирается заранее (build_gazetteer, CLI `redact
+build-gazetteer`) из выгрузки ФИАС/ГАР — XML AS_ADDR_OBJ или CSV с колонками
+NAME;TYPENAME;LEVEL — в компактный бор, который в рантайме отображается в
+память (mmap) и делится страницами между процессами.
+
+Формат (little-endian):
+    b"RDGZ" | u32 длина штампа | штамп (JSON, UTF-8) | выравнивание до 4 |
+    u32 N | (N+1) × u32 first | N байт меток | N байт флагов
+Узлы бора — в порядке обхода в ширину, дети узла i — узлы first[i]..first[i+1]-1,
+отсортированы по метке (байт). Ключи — названия в нижнем регистре, «ё»→«е»,
+пробелы схлопнуты, в cp1251: одна буква — один байт, переход — bytes.find
+по меткам детей. Флаги конечного узла — REGION|AREA|LOCALITY|STREET.
+
+Поиск (Gazetteer.find) — один проход по началам слов нормализованного view
+(redactru.util.normview): от каждого слова, начинающегося в тексте с
+заглавной буквы или цифры, спуск по бору до самого длинного названия,
+кончающегося на границе слова. Адрес (iter_gazetteer_addresses) — улица, за
+которой следует номер дома (с хвостами к./стр./кв.), плюс примыкающие слева
+населённый пункт и регион. Одиночное название улицы («Мира», «Садовая»)
+адресом не считается: нужен номер дома и ещё одно подтверждение — метка
+типа (ул., д.) или населённый пункт перед улицей. Падежные формы названий не
+порождаются: ищутся формы из выгрузки.
+
+Примеры (doctest):
+>>> import tempfile, os
+>>> p = os.path.join(tempfile.mkdtemp(), "gaz.bin")
+>>> write_gazetteer({"Казань": LOCALITY, "Баумана": STREET, "Карла Маркса": STREET}, p)
+3
+>>> gaz = Gazetteer.open(p)
+>>> gaz.get("казань") == LOCALITY, gaz.get("Карла  Маркса") == STREET, gaz.get("Карла")
+(True, True, None)
+>>> [a.raw for a in iter_gazetteer_addresses("Живёт: Казань, Баумана 5, кв. 7; Баумана — улица.", gaz=gaz)]
+['Казань, Баумана 5, кв. 7']
+>>> gaz.close()
+"""
+from __future__ import annotations
+
+import csv
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from redactru.util.normview import NormalizedText, fold_key
+
+MAGIC = b"RDGZ"
+FORMAT_VERSION = 1
+ENCODING = "cp1251"  # однобайтовая: смещения в байтах = смещения в символах
+MIN_NAME_LEN = 3
+
+REGION, AREA, LOCALITY, STREET = 1, 2, 4, 8
+# уровни ГАР: 1 — субъект, 2–3 — районы, 4–6 — поселения и населённые пункты,
+# 7 — элемент планировочной структуры, 8 — улица
+LEVEL_FLAGS = {1: REGION, 2: AREA, 3: AREA, 4: LOCALITY, 5: LOCALITY, 6: LOCALITY, 7: STREET, 8: STREET}
+
+DEFAULT_GAZETTEER = Path("data/address_gazetteer.bin")
+
+
+def _key(name: str) -> Optional[bytes]:
+    k = fold_key(name).replace("ё", "е")
+    if len(k) < MIN_NAME_LEN:
+        return None
+    try:
+        return k.encode(ENCODING)
+    except UnicodeEncodeError:
+        return None
+
+
+# ===== Сборка =====
+
+def write_gazetteer(entries: Dict[str, int], path: str | Path, stamp: Dict[str, object] | None = None) -> int:
+    """Записать бор из {название: флаги}. Возвращает число названий."""
+    children: List[Dict[int, int]] = [{}]
+    flags = bytearray(1)
+    count = 0
+    for name, f in entries.items():
+        k = _key(name)
+        if k is None:
+            continue
+        node = 0
+        for c in k:
+            nxt = children[node].get(c)
+            if nxt is None:
+                nxt = len(children)
+                children[node][c] = nxt
+                children.append({})
+                flags.append(0)
+            node = nxt
+        if not flags[node]:
+            count += 1
+        flags[node] |= int(f)
+
+    # раскладка в ширину: дети каждого узла подряд, по возрастанию метки
+    order, labels = [0], bytearray(1)
+    for node in order:  # order растёт по ходу обхода
+        for c in sorted(children[node]):
+            order.append(children[node][c])
+            labels.append(c)
+    first = array("I", [0]) * (len(order) + 1)
+    pos = 1
+    for i, node in enumerate(order):
+        first[i] = pos
+        pos += len(children[node])
+    first[len(order)] = pos
+    if sys.byteorder != "little":
+        first.byteswap()
+
+    stamp_b = json.dumps(stamp or {"format": FORMAT_VERSION}, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("wb") as fh:
+        fh.write(MAGIC)
+        fh.write(struct.pack("<I", len(stamp_b)))
+        fh.write(stamp_b)
+        fh.write(b"\0" * (-(8 + len(stamp_b)) % 4))
+        fh.write(struct.pack("<I", len(order)))
+        fh.write(first.tobytes())
+        fh.write(labels)
+        fh.write(bytes(flags[n] for n in order))
+    return count
+
+
+def _iter_gar_xml(path: Path) -> Iterator[Tuple[str, str, int]]:
+    import xml.etree.ElementTree as ET
+    for _ev, el in ET.iterparse(str(path)):
+        if el.tag == "OBJECT":
+            a = el.attrib
+            if a.get("ISACTUAL", "1") == "1" and a.get("ISACTIVE", "1") == "1":
+                try:
+                    level = int(a.get("LEVEL", 0))
+                except ValueError:
+                    level = 0
+                yield a.get("NAME", ""), a.get("TYPENAME", ""), level
+        el.clear()
+
+
+def _iter_csv(path: Path) -> Iterator[Tuple[str, str, int]]:
+    with path.open("r", encoding="utf-8-sig", newline="") as fh:
+        sample = fh.read(4096)
+        fh.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+        for row in csv.DictReader(fh, dialect=dialect):
+            row = {(k or "").strip().upper(): (v or "").strip() for k, v in row.items()}
+            try:
+                level = int(row.get("LEVEL") or 0)
+            except ValueError:
+                level = 0
+            yield row.get("NAME", ""), row.get("TYPENAME", ""), level
+
+
+def iter_extract(path: str | Path) -> Iterator[Tuple[str, str, int]]:
+    """(название, тип, уровень ГАР) из выгрузки: *.xml — AS_ADDR_OBJ, иначе CSV."""
+    p = Path(path)
+    if p.suffix.lower() == ".xml":
+        return _iter_gar_xml(p)
+    return _iter_csv(p)
+
+
+def build_gazetteer(sources: Iterable[str | Path], path: str | Path) -> int:
+    """Собрать бор из выгрузок ФИАС/ГАР. Возвращает число названий."""
+    entries: Dict[str, int] = {}
+    names = [str(s) for s in sources]
+    for src in names:
+        for name, _typ, level in iter_extract(src):
+            f = LEVEL_FLAGS.get(level)
+            if f and name:
+                entries[name] = entries.get(name, 0) | f
+    stamp = {"format": FORMAT_VERSION, "sources": [Path(s).name for s in names]}
+    return write_gazetteer(entries, path, stamp)
+
+
+# ===== Поиск =====
+
+class GazetteerHit(NamedTuple):
+    start: int  # в view.norm
+    end: int
+    flags: int
+
+
+class Gazetteer:
+    """Бор названий в отображённом в память артефакте."""
+
+    def __init__(self, buf, stamp: Dict[str, object], count: int, first, lab_pos: int, flg_pos: int, f=None):
+        self.buf = buf
+        self.stamp = stamp
+        self.count = count  # узлов бора
+        self._first = first
+        self._lab = lab_pos
+        self._flg = flg_pos
+        self._f = f
+
+    @classmethod
+    def open(cls, path: str | Path) -> "Gazetteer":
+        f = open(path, "rb")
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            f.close()
+            raise
+        if buf[:4] != MAGIC:
+            buf.close()
+            f.close()
+            raise ValueError(f"not an address gazetteer: {path}")
+        (slen,) = struct.unpack_from("<I", buf, 4)
+        stamp = json.loads(bytes(buf[8:8 + slen]).decode("utf-8"))
+        pos = 8 + slen + (-(8 + slen) % 4)
+        (count,) = struct.unpack_from("<I", buf, pos)
+        pos += 4
+        end = pos + 4 * (count + 1)
+        if sys.byteorder == "little":
+            first = memoryview(buf)[pos:end].cast("I")
+        else:
+            first = array("I", buf[pos:end])
+            first.byteswap()
+        return cls(buf, stamp, count, first, end, end + count, f)
+
+    def close(self) -> None:
+        if isinstance(self._first, memoryview):
+            self._first.release()
+        self.buf.close()
+        if self._f is not None:
+            self._f.close()
+
+    def _child(self, node: int, c: bytes) -> int:
+        p = self.buf.find(c, self._lab + self._first[node], self._lab + self._first[node + 1])
+        return p - self._lab if p >= 0 else -1
+
+    def get(self, name: str) -> Optional[int]:
+        """Флаги названия или None."""
+        k = _key(name)
+        if k is None:
+            return None
+        node = 0
+        for i in range(len(k)):
+            node = self._child(node, k[i:i + 1])
+            if node < 0:
+                return None
+        return self.buf[self._flg + node] or None
+
+    def find(self, text: str, view: Optional[NormalizedText] = None) -> List[GazetteerHit]:
+        """Самые длинные названия от начал слов, без пересечений (смещения — в view.norm)."""
+        view = view or NormalizedText(text)
+        norm = view.norm
+        nb = norm.replace("ё", "е").encode(ENCODING, errors="replace")
+        n = len(nb)
+        first, buf, lab, flg = self._first, self.buf, self._lab, self._flg
+        hits: List[GazetteerHit] = []
+        last = 0
+        for m in _WORD_START_RE.finditer(norm):
+            i = m.start()
+            if i < last:
+                continue
+            ch = text[view.to_orig(i)]
+            if not (ch.isupper() or ch.isdigit()):
+                continue
+            node, best, j = 0, None, i
+            while j < n:
+                p = buf.find(nb[j:j + 1], lab + first[node], lab + first[node + 1])
+                if p < 0:
+                    break
+                node = p - lab
+                j += 1
+                if buf[flg + node] and (j == n or not norm[j].isalnum()):
+                    best = (j, buf[flg + node])
+            if best is not None:
+                hits.append(GazetteerHit(i, best[0], best[1]))
+                last = best[0]
+        return hits
+
+    def __len__(self) -> int:
+        return self.count
+
+
+_WORD_START_RE = re.compile(r"(?<![\w-])\w")
+
+# метки типа перед названием (по view.norm — нижний регистр)
+_STREET_TYPE_RE = re.compile(
+    r"(?<!\w)(?:ул\.?|улица|пр-?кт\.?|проспект|пер\.?|переулок|б-?р|бульвар|ш\.|шоссе|"
+    r"пл\.?|площадь|наб\.?|набережная|пр-?д|проезд|туп\.?|тупик) ?$"
+)
+_LOCALITY_TYPE_RE = re.compile(r"(?<!\w)(?:г\.?|город|пос\.?|посёлок|поселок|пгт\.?|с\.|село|дер\.|деревня) ?$")
+_REGION_TYPE_RE = re.compile(r"(?<!\w)(?:респ\.?|республика|обл\.?|область|край|р-?н|район) ?$")
+_GAP_RE = re.compile(r"[ ,]{0,3}")
+_HOUSE_RE = re.compile(
+    r"[ ,]{0,3}(?:(?P<mk>д\.?|дом) ?)?\d{1,4}[а-я]?(?:/\d{1,4}[а-я]?)?(?![\w/])"
+    r"(?:[ ,;]{0,3}(?:к\.?|корп\.?|корпус|стр\.?|строение|кв\.?|квартира) ?\d{1,4}[а-я]?(?![\w/]))*"
+)
+
+
+class GazetteerAddress(NamedTuple):
+    start: int
+    end: int
+    raw: str
+
+
+def _type_before(norm: str, pos: int, rx: re.Pattern) -> int:
+    m = rx.search(norm, max(0, pos - 12), pos)
+    return m.start() if m else pos
+
+
+def iter_gazetteer_addresses(
+    text: str,
+    view: Optional[NormalizedText] = None,
+    gaz: Optional[Gazetteer] = None,
+) -> Iterator[GazetteerAddress]:
+    """Адреса «[регион,] [нас. пункт,] улица дом[, кв.]» в смещениях text. gaz — иначе общий (load_gazetteer)."""
+    gaz = gaz if gaz is not None else get_gazetteer()
+    if gaz is None:
+        return
+    view = view or NormalizedText(text)
+    norm = view.norm
+    hits = gaz.find(text, view)
+    for i, h in enumerate(hits):
+        if not h.flags & STREET:
+            continue
+        house = _HOUSE_RE.match(norm, h.end)
+        if house is None:
+            continue
+        start = _type_before(norm, h.start, _STREET_TYPE_RE)
+        evidence = bool(house.group("mk")) or start < h.start
+        k = i - 1
+        while k >= 0:
+            prev = hits[k]
+            if not prev.flags & (LOCALITY | REGION | AREA):
+                break
+            g = _GAP_RE.match(norm, prev.end, start)
+            if g is None or g.end() != start:
+                break
+            rx = _LOCALITY_TYPE_RE if prev.flags & LOCALITY else _REGION_TYPE_RE
+            start = _type_before(norm, prev.start, rx)
+            evidence = True
+            k -= 1
+        if not evidence:
+            continue
+        s, e = view.orig_span(start, house.end())
+        yield GazetteerAddress(start=s, end=e, raw=text[s:e])
+
+
+_gaz: Optional[Gazetteer] = None
+_gaz_loaded = False
+
+
+def load_gazetteer(path: str | Path | None = None) -> Optional[Gazetteer]:
+    """Подключить газеттир. Без path: $REDACTRU_GAZETTEER или DEFAULT_GAZETTEER.
+    Нет файла или другой формат — газеттир не используется."""
+    global _gaz, _gaz_loaded
+    p = Path(path or os.environ.get("REDACTRU_GAZETTEER") or DEFAULT_GAZETTEER)
+    gaz = None
+    if p.exists():
+        gaz = Gazetteer.open(p)
+        if gaz.stamp.get("format") != FORMAT_VERSION:
+            gaz.close()
+            gaz = None
+    if _gaz is not None:
+        _gaz.close()
+    _gaz, _gaz_loaded = gaz, True
+    return gaz
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """Общий газеттир процесса (подключается при первом обращении)."""
+    if not _gaz_loaded:
+        load_gazetteer()
+    return _gaz
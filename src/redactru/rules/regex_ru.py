@@ -13,7 +13,10 @@ True
 """
 from __future__ import annotations
 import re
-from typing import Iterator, NamedTuple
+from typing import Iterator, NamedTuple, Optional
+
+from redactru.util.context import ContextIndex
+from redactru.util.normview import NormalizedText
 
 try:
     from redactru.nlp.morph import is_person_like as _is_person_like
@@ -27,8 +30,15 @@ except Exception:
     _is_name = lambda _t: True
     _is_surname = lambda _t: True
 
+try:
+    from redactru.nlp.lexicon import DocumentLexicon
+except Exception:
+    DocumentLexicon = None  # type: ignore  # без морфологии — фоллбэки выше
+
 _LEFT_STOP = {"когда", "если", "где", "как", "что", "почему", "зачем"}
-def _bad_left_context(text: str, start: int) -> bool:
+def _bad_left_context(text: str, start: int, ctx: Optional[ContextIndex] = None) -> bool:
+    if ctx is not None:
+        return ctx.word_before(start) in _LEFT_STOP
     left = text[max(0, start-24): start]
     m = re.search(r"([A-Za-zА-Яа-яЁё]+)\s*$", left)
     return bool(m and m.group(1).lower() in _LEFT_STOP)
@@ -63,33 +73,44 @@ class PersonSpan(NamedTuple):
 def _yield_person(m: re.Match, kind: str, text: str) -> PersonSpan:
     return PersonSpan(start=m.start(), end=m.end(), raw=text[m.start():m.end()], kind=kind)
 
-def iter_person_spans(text: str) -> Iterator[PersonSpan]:
+def iter_person_spans(
+    text: str,
+    ctx: Optional[ContextIndex] = None,
+    lexicon: Optional["DocumentLexicon"] = None,
+) -> Iterator[PersonSpan]:
+    """lexicon — лексикон документа (иначе строится здесь): один морфоанализ на токен."""
+    if ctx is None:
+        ctx = ContextIndex(text)
+    if lexicon is None and DocumentLexicon is not None:
+        lexicon = DocumentLexicon(text)
+    is_name = lexicon.is_name if lexicon is not None else _is_name
+    is_surname = lexicon.is_surname if lexicon is not None else _is_surname
     for m in RE_SURNAME_INITIALS.finditer(text):
         sn = m.group("surname")
-        if _is_surname(sn) and not _bad_left_context(text, m.start()):
+        if is_surname(sn) and not _bad_left_context(text, m.start(), ctx):
             yield _yield_person(m, "SN+I", text)
 
     for m in RE_INITIALS_SURNAME.finditer(text):
         sn = m.group("surname")
-        if _is_surname(sn) and not _bad_left_context(text, m.start()):
+        if is_surname(sn) and not _bad_left_context(text, m.start(), ctx):
             yield _yield_person(m, "I+SN", text)
 
     for m in RE_NAME_SURNAME.finditer(text):
         nm, sn = m.group("name"), m.group("surname")
-        if _is_name(nm) and _is_surname(sn) and not _bad_left_context(text, m.start()):
+        if is_name(nm) and is_surname(sn) and not _bad_left_context(text, m.start(), ctx):
             yield _yield_person(m, "N+SN", text)
 
     for m in RE_SURNAME_NAME_OPT_PATR.finditer(text):
         sn, nm = m.group("surname"), m.group("name")
-        if _is_surname(sn) and _is_name(nm) and not _bad_left_context(text, m.start()):
+        if is_surname(sn) and is_name(nm) and not _bad_left_context(text, m.start(), ctx):
             yield _yield_person(m, "SN+N(+P)", text)
     
     if ALLOW_SINGLE_NAME:
         for m in SINGLE_NAME_RE.finditer(text):
             tok = m.group(1)
-            if _bad_left_context(text, m.start()):
+            if _bad_left_context(text, m.start(), ctx):
                 continue
-            if _is_name(tok) or tok in _COMMON_SHORT_NAMES:
+            if is_name(tok) or tok in _COMMON_SHORT_NAMES:
                 yield _yield_person(m, "N", text)
 
 PER_STOPWORDS = {
@@ -108,20 +129,25 @@ _ADDRESS_TOKENS = (
     r"б-?р", r"бульвар", r"бул\.?", r"ш\.?", r"шоссе",
     r"д\.", r"дом", r"к\.", r"корп\.?", r"корпус", r"стр\.?", r"строение", r"кв\.?", r"квартира"
 )
-ADDRESS_MARKER_RE = re.compile(rf"(?<!\w)(?:{'|'.join(_ADDRESS_TOKENS)})(?!\w)", re.IGNORECASE)
+# адресные регэкспы без IGNORECASE: ищут по нормализованному view (нижний регистр, без двойников)
+ADDRESS_MARKER_RE = re.compile(rf"(?<!\w)(?:{'|'.join(_ADDRESS_TOKENS)})(?!\w)")
 
 # Ограничители адресного куска
 _MAX_ADDR_LEN = 160
 
-def _accept_address(chunk: str) -> bool:
+_CITY_MARKER_RE = re.compile(r"(?<!\w)(?:г\.|город)(?!\w)")
+
+def _accept_address(chunk: str, norm: Optional[str] = None) -> bool:
+    """chunk — кусок оригинала (длина, переводы строк), norm — он же в view (маркеры)."""
     if len(chunk) > _MAX_ADDR_LEN:
         return False
     if chunk.count("\n") > 1:
         return False
-    city_markers = len(re.findall(r"(?<!\w)(?:г\.|город)(?!\w)", chunk, flags=re.IGNORECASE))
-    if city_markers >= 2:
+    if norm is None:
+        norm = NormalizedText(chunk).norm
+    if len(_CITY_MARKER_RE.findall(norm)) >= 2:
         return False
-    if "»," in chunk or "», то" in chunk.lower():
+    if "»," in norm or "», то" in norm:
         return False
     return True
 
@@ -135,41 +161,47 @@ ADDRESS_SPAN_RE = re.compile(
         (?:\s*[,;]?\s*(?:к\.?|корп\.?|корпус|стр\.?|строение|кв\.?|квартира)\s*[A-Za-zА-Яа-я0-9/-]+)*
     )
     """,
-    re.IGNORECASE | re.VERBOSE | re.DOTALL,
+    re.VERBOSE | re.DOTALL,
 )
 # если основное совпадение закончилось ровно на метке (к/стр/кв), дотянем число справа
 _TAIL_AFTER_LABEL_RE = re.compile(r"\.?\s*\d+[A-Za-zА-Яа-я0-9/-]*")
-_LABEL_END_RE = re.compile(r"(кв\.?|к\.|корп\.?|корпус|стр\.?|строение)\s*$", re.IGNORECASE)
+_LABEL_END_RE = re.compile(r"(кв\.?|к\.|корп\.?|корпус|стр\.?|строение)\s*$")
 
 class AddressMarker(NamedTuple):
     start: int
     end: int
     token: str
 
-def has_address_markers(text: str) -> bool:
-    return ADDRESS_MARKER_RE.search(text) is not None
+def has_address_markers(text: str, view: Optional[NormalizedText] = None) -> bool:
+    return ADDRESS_MARKER_RE.search((view or NormalizedText(text)).norm) is not None
 
-def iter_address_markers(text: str) -> Iterator[AddressMarker]:
-    for m in ADDRESS_MARKER_RE.finditer(text):
-        yield AddressMarker(start=m.start(), end=m.end(), token=m.group(0))
+def iter_address_markers(text: str, view: Optional[NormalizedText] = None) -> Iterator[AddressMarker]:
+    """Маркеры в смещениях text; token — как в оригинале."""
+    view = view or NormalizedText(text)
+    for m in ADDRESS_MARKER_RE.finditer(view.norm):
+        s, e = view.orig_span(m.start(), m.end())
+        yield AddressMarker(start=s, end=e, token=text[s:e])
 
 class AddressSpan(NamedTuple):
     start: int
     end: int
     raw: str
 
-def iter_address_spans(text: str) -> Iterator[AddressSpan]:
-    for m in ADDRESS_SPAN_RE.finditer(text):
-        s, e = m.start(), m.end()
-        raw = text[s:e]
+def iter_address_spans(text: str, view: Optional[NormalizedText] = None) -> Iterator[AddressSpan]:
+    """Поиск по view.norm (общий для документа — ContextIndex.view), спаны — в смещениях text."""
+    view = view or NormalizedText(text)
+    norm = view.norm
+    for m in ADDRESS_SPAN_RE.finditer(norm):
+        a, b = m.start(), m.end()
 
         # если матч оборвался на метке — дотянуть число
-        if _LABEL_END_RE.search(raw):
-            m2 = _TAIL_AFTER_LABEL_RE.match(text, e)
+        if _LABEL_END_RE.search(norm, a, b):
+            m2 = _TAIL_AFTER_LABEL_RE.match(norm, b)
             if m2:
-                e = m2.end()
-                raw = text[s:e]
+                b = m2.end()
 
-        if _accept_address(raw):
+        s, e = view.orig_span(a, b)
+        raw = text[s:e]
+        if _accept_address(raw, norm[a:b]):
             yield AddressSpan(start=s, end=e, raw=raw)
 
@@ -0,0 +1,136 @@
+from __future__ import annotations
+"""
+Сквозной прогон detect → validate → apply в памяти, без промежуточных файлов.
+
+Для автоматических заданий без ручной проверки: кандидаты из detect_candidates
+передаются в build_candidates_document и apply_to_text напрямую, без записи
+candidates_raw.json/candidates.json и повторного разбора/проверки по схеме.
+Промежуточные артефакты можно выгрузить опционально (dump_dir) — с теми же
+именами, что и в пошаговом сценарии.
+
+apply_types переопределяет правила apply по умолчанию: применяются кандидаты
+перечисленных типов (SNILS и числовые идентификаторы — только с валидной
+контрольной суммой).
+replacement_mode="surrogate" заменяет ФИО суррогатами в падеже упоминания.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from redactru.apply import apply_to_text
+from redactru.detect import Candidate, detect_candidates
+from redactru.util.automaton import KnownEntityIndex
+from redactru.util.tokens import TokenManager
+from redactru.validate import CHECKED_TYPES, build_candidates_document
+
+
+@dataclass
+class RunResult:
+    text: str                      # текст после замен
+    candidates: List[Candidate]    # «сырые» кандидаты detect
+    document: Dict[str, Any]       # документ candidates.json
+    report: Dict[str, Any]         # отчёт report.json
+
+
+def _override_apply(doc: Dict[str, Any], apply_types: Iterable[str]) -> None:
+    wanted = {t.upper() for t in apply_types}
+    for it in doc["items"]:
+        flag = it["typ"] in wanted
+        if flag and it["typ"] in CHECKED_TYPES:
+            flag = bool((it.get("meta") or {}).get("valid"))
+        it["apply"] = flag
+
+
+def run_text(
+    text: str,
+    mapping_path: str | Path = "mapping.json",
+    *,
+    tokens: TokenManager | None = None,
+    apply_types: Iterable[str] | None = None,
+    check_schema: bool = False,
+    replacement_mode: str = "token",
+    cluster: bool = True,
+    known: KnownEntityIndex | None = None,
+) -> RunResult:
+    """Полный цикл над строкой. Возвращает RunResult.
+
+    tokens — общий TokenManager (иначе создаётся по mapping_path и сохраняется в конце).
+    known — индекс известных сущностей (обычно по тому же TokenManager): detect
+    добавляет их точные вхождения с уже выданными токенами.
+    """
+    return run_candidates(text, detect_candidates(text, known=known), mapping_path, tokens=tokens,
+                          apply_types=apply_types, check_schema=check_schema,
+                          replacement_mode=replacement_mode, cluster=cluster)
+
+
+def run_candidates(
+    text: str,
+    cands: List[Candidate],
+    mapping_path: str | Path = "mapping.json",
+    *,
+    tokens: TokenManager | None = None,
+    apply_types: Iterable[str] | None = None,
+    check_schema: bool = False,
+    replacement_mode: str = "token",
+    cluster: bool = True,
+) -> RunResult:
+    """validate → apply по уже найденным кандидатам (detect выполнен отдельно,
+    например в другом процессе). Параметры — как у run_text."""
+    raw = [c.to_dict() for c in cands]
+    if tokens is None:
+        tm = TokenManager(Path(mapping_path), autosave=False)
+    else:
+        tm = tokens
+    doc = build_candidates_document(raw, tokens=tm, check_schema=check_schema,
+                                    replacement_mode=replacement_mode, cluster=cluster)
+    if tokens is None:
+        tm.save()
+    if apply_types is not None:
+        _override_apply(doc, apply_types)
+    new_text, report = apply_to_text(text, doc, check_schema=check_schema)
+    return RunResult(text=new_text, candidates=cands, document=doc, report=report)
+
+
+def run_file(
+    input_path: str | Path,
+    out_path: str | Path,
+    report_path: str | Path,
+    mapping_path: str | Path = "mapping.json",
+    encoding: str = "utf-8",
+    dump_dir: str | Path | None = None,
+    apply_types: Iterable[str] | None = None,
+    replacement_mode: str = "token",
+    cluster: bool = True,
+    known: bool = False,
+) -> Tuple[Path, Path]:
+    """Прочитать файл, прогнать run_text, сохранить текст и отчёт. Возвращает пути.
+    dump_dir — куда выгрузить candidates_raw.json и candidates.json (по желанию).
+    known=True — искать известные сущности из mapping_path (KnownEntityIndex).
+    """
+    inp = Path(input_path)
+    out_p = Path(out_path)
+    rep_p = Path(report_path)
+
+    text = inp.read_text(encoding=encoding, errors="ignore")
+    tm = TokenManager(Path(mapping_path), autosave=False) if known else None
+    res = run_text(text, mapping_path, tokens=tm, apply_types=apply_types, replacement_mode=replacement_mode,
+                   cluster=cluster, known=KnownEntityIndex(tm) if tm is not None else None)
+    if tm is not None:
+        tm.save()
+    res.report["source_path"] = str(inp.resolve())
+    res.report["encoding"] = encoding
+
+    out_p.parent.mkdir(parents=True, exist_ok=True)
+    rep_p.parent.mkdir(parents=True, exist_ok=True)
+    out_p.write_text(res.text, encoding=encoding)
+    rep_p.write_text(json.dumps(res.report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if dump_dir is not None:
+        d = Path(dump_dir)
+        d.mkdir(parents=True, exist_ok=True)
+        raw = [c.to_dict() for c in res.candidates]
+        (d / "candidates_raw.json").write_text(json.dumps(raw, ensure_ascii=False, indent=2), encoding="utf-8")
+        (d / "candidates.json").write_text(json.dumps(res.document, ensure_ascii=False, indent=2), encoding="utf-8")
+    return out_p, rep_p
@@ -0,0 +1,306 @@
+"""
+Быстрая оценка плотности ПДн по файлам (триаж перед полным detect/NER).
+
+Только дешёвые сигналы по байтам UTF-8 (файл отображается в память, текст
+не декодируется, морфологии нет):
+
+- цифровые группы формы номера (10–11 цифр с разделителями) — СНИЛС, если
+  сходится контрольная сумма, иначе телефон, если похож на российский
+  (10 цифр или 11 с 7/8 в начале, код начинается с 3/4/8/9);
+- адресные маркеры («ул.», «г.», «д.», «кв.», «проспект», …) — строчные
+  и с заглавной;
+- пары слов кириллицей с заглавной буквы подряд («Иван Петров»), кроме
+  стоящих сразу после конца предложения или в начале строки.
+
+Оценка числа сущностей: СНИЛС + телефоны + маркеры / ADDR_MARKERS_PER_ADDRESS
++ пары × BIGRAM_WEIGHT; плотность — на 1000 байт. С max_bytes читается
+только начало файла (по границе строки), счётчики масштабируются на размер.
+Манифест — CSV (как превью detect, через «;»), файлы по убыванию плотности:
+пакетная обработка берёт верх списка и пропускает файлы без сигналов
+(ranked_paths).
+
+Пример (doctest):
+>>> st = scan_buffer("СНИЛС 112-233-445 95, тел. 8 (999) 123-45-67, г. Казань, ул. Ленина, д. 5, Петр Иванов".encode())
+>>> st.snils, st.phones, st.addr_markers, st.cap_bigrams
+(1, 1, 3, 1)
+>>> st.est_entities
+3.5
+"""
+from __future__ import annotations
+
+import csv
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from redactru.util.mapped import open_mapped
+from redactru.util.snils import _WEIGHTS
+
+ADDR_MARKERS_PER_ADDRESS = 3   # «г. … ул. … д. …»
+BIGRAM_WEIGHT = 0.5            # пара заглавных — это и ФИО, и «Российская Федерация»
+BLOCK_BYTES = 4 << 20
+MANIFEST_FIELDS = ("path", "bytes", "scanned_bytes", "snils", "phones", "addr_markers",
+                   "cap_bigrams", "est_entities", "density", "elapsed_s")
+
+# --- цифры: байты → классы (цифра "0", разделитель "-"), как префильтр redactru.filter ---
+
+
+def _digit_classes() -> bytes:
+    tab = bytearray(b"x" * 256)
+    for b in b"0123456789":
+        tab[b] = ord("0")
+    for b in b" ()-+":
+        tab[b] = ord("-")
+    return bytes(tab)
+
+
+_DIGIT_CLASSES = _digit_classes()
+# Форма номера после необязательной одиночной цифры: 3-3-2-2 (телефон) или 3-3-3-2 (СНИЛС),
+# между группами 0–2 разделителя; слитная запись — те же группы без разделителей.
+# Поиск начинается с литерала "000"; даты и время («2026-10-19 12:00») форме не отвечают.
+# Одиночная цифра перед тройкой («8 (999) …», «+7 999 …») добирается отдельно.
+_DIGITS_RE = re.compile(rb"000-{0,2}000-{0,2}(?:000|00)-{0,2}00")
+_NON_DIGIT_RE = re.compile(rb"[^0-9]")
+_RU_CODE_FIRST = (3, 4, 8, 9)  # первая цифра кода города/оператора
+
+# --- кириллица без ведущих байт: buf.translate(..., delete=b"\xd0\xd1") оставляет
+# по одному байту на букву (А–Я — 0x90–0xAF, а–п — 0xB0–0xBF, р–я — 0x80–0x8F). Ё/ё (0x81/0x91)
+# совпадают с «с»/«Б» и не сворачиваются: в маркерах адреса «ё» нет, а «с» есть («стр.») ---
+_LEADS = b"\xd0\xd1"
+
+
+def _fold_table() -> bytes:
+    """Нижний регистр (ASCII и кириллица) и пробел вместо пробельных символов и скобок/знаков."""
+    tab = bytearray(range(256))
+    for b in range(0x41, 0x5B):
+        tab[b] = b + 0x20
+    for b in range(0x90, 0xA0):   # А–П → а–п
+        tab[b] = b + 0x20
+    for b in range(0xA0, 0xB0):   # Р–Я → р–я
+        tab[b] = b - 0x20
+    for b in b" \t\r\n\x0b\x0c,;:()[]\"'!?/\\<>":
+        tab[b] = 0x20
+    return bytes(tab)
+
+
+_FOLD = _fold_table()
+
+
+def _fold(word: str) -> bytes:
+    return word.encode("utf-8").translate(_FOLD, _LEADS)
+
+
+_ADDR_WORDS = ("г.", "город", "обл.", "область", "респ.", "республика", "р-н", "район", "пос.", "пгт",
+               "ул.", "улица", "пр-кт", "проспект", "пер.", "переулок", "б-р", "бульвар", "шоссе",
+               "д.", "дом", "корп.", "корпус", "стр.", "строение", "кв.", "квартира")
+
+
+def _addr_pattern() -> re.Pattern:
+    """Маркер после пробела. Чередование — деревом по первой букве (с общей проверкой первой
+    буквы впереди): плоский список из десятков вариантов sre перебирает на каждом пробеле."""
+    groups: dict = {}
+    for w in sorted(map(_fold, _ADDR_WORDS), key=len, reverse=True):
+        # слово без точки — до пробела/точки/конца («дом», но не «домой»); с точкой — как есть («г.Казань»)
+        tail = b"" if w.endswith(b".") else rb"(?=[ .]|$)"
+        groups.setdefault(w[:1], []).append(re.escape(w[1:]) + tail)
+    first = b"[" + b"".join(re.escape(k) for k in groups) + b"]"
+    trie = b"|".join(re.escape(k) + b"(?:" + b"|".join(v) + b")" for k, v in groups.items())
+    return re.compile(rb" (?=" + first + rb")(?:" + trie + rb")")
+
+
+_ADDR_RE = _addr_pattern()
+
+
+
+def _case_classes() -> bytes:
+    """Классы байт UTF-8 для пар слов: ведущий байт кириллицы "L", продолжение
+    заглавной "U", строчной "l", пробел/таб " ", латиница и цифры "a", прочее "x"."""
+    tab = bytearray(b"x" * 256)
+    tab[0xD0] = tab[0xD1] = ord("L")
+    for b in range(0x80, 0xC0):
+        tab[b] = ord("U") if 0x90 <= b <= 0xAF else ord("l")
+    for b in b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789":
+        tab[b] = ord("a")
+    tab[ord(" ")] = tab[ord("\t")] = ord(" ")
+    return bytes(tab)
+
+
+_CASE_CLASSES = _case_classes()
+# литерал "LU" в начале — быстрый поиск даже по тексту без кириллицы
+# второе слово — в просмотре вперёд: отвергнутая пара в начале строки не съедает следующую
+_BIGRAM_RE = re.compile(rb"LU(?:Ll){2,} +(?=LU(?:Ll){2,})")
+
+
+def _prefix_digit(cls: bytes, s: int) -> int:
+    """Начало группы вместе с одиночной цифрой перед тройкой (через 0–2 разделителя)."""
+    i = s - 1
+    while i >= 0 and s - i <= 2 and cls[i] == 0x2D:
+        i -= 1
+    return i if i >= 0 and cls[i] == 0x30 else s
+
+
+@dataclass
+class ScanStats:
+    path: str = ""
+    bytes: int = 0
+    scanned_bytes: int = 0
+    snils: int = 0
+    phones: int = 0
+    addr_markers: int = 0
+    cap_bigrams: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def est_entities(self) -> float:
+        est = (self.snils + self.phones + self.addr_markers / ADDR_MARKERS_PER_ADDRESS
+               + self.cap_bigrams * BIGRAM_WEIGHT)
+        if self.scanned_bytes and self.bytes > self.scanned_bytes:
+            est *= self.bytes / self.scanned_bytes
+        return round(est, 2)
+
+    @property
+    def density(self) -> float:
+        """Оценка сущностей на 1000 байт."""
+        return round(self.est_entities * 1000 / self.bytes, 4) if self.bytes else 0.0
+
+    def to_row(self) -> dict:
+        row = asdict(self)
+        row["est_entities"] = self.est_entities
+        row["density"] = self.density
+        row["elapsed_s"] = round(self.elapsed_s, 4)
+        return {k: row[k] for k in MANIFEST_FIELDS}
+
+
+def _classify_digits(groups: List[bytes]) -> tuple:
+    """(СНИЛС, телефоны) среди групп из 10–11 цифр; контрольная сумма СНИЛС — матрицей NumPy
+    (как valid_snils_array), без цикла по группам."""
+    import numpy as np
+
+    d11 = [d for d in groups if len(d) == 11]
+    d10 = [d for d in groups if len(d) == 10]
+    snils = phones = 0
+    if d11:
+        mat = np.frombuffer(b"".join(d11), dtype=np.uint8).reshape(-1, 11).astype(np.int64) - 48
+        chk = (mat[:, :9] @ np.array(_WEIGHTS, dtype=np.int64)) % 101
+        chk[chk == 100] = 0
+        valid = (chk == mat[:, 9] * 10 + mat[:, 10]) & (mat[:, :9].sum(axis=1) != 0)
+        phone = ~valid & np.isin(mat[:, 0], (7, 8)) & np.isin(mat[:, 1], _RU_CODE_FIRST)
+        snils, phones = int(valid.sum()), int(phone.sum())
+    if d10:
+        first = np.frombuffer(b"".join(d10), dtype=np.uint8).reshape(-1, 10)[:, 0].astype(np.int64) - 48
+        phones += int(np.isin(first, _RU_CODE_FIRST).sum())
+    return snils, phones
+
+
+def _digit_groups(data: bytes) -> List[bytes]:
+    cls = data.translate(_DIGIT_CLASSES)
+    groups = []
+    for m in _DIGITS_RE.finditer(cls):
+        s, e = _prefix_digit(cls, m.start()), m.end()
+        if (s and cls[s - 1] == 0x30) or (e < len(cls) and cls[e] == 0x30):
+            continue  # часть более длинной группы цифр
+        groups.append(_NON_DIGIT_RE.sub(b"", data[s:e]))
+    return groups
+
+
+def _cap_bigrams(data: bytes) -> int:
+    cls = data.translate(_CASE_CLASSES)
+    n = 0
+    for m in _BIGRAM_RE.finditer(cls):
+        s = m.start()
+        if s and (cls[s - 1] == 0x61 or (s >= 2 and cls[s - 2] == 0x4C)):
+            continue  # середина слова
+        if s == 0 or data[s - 1] == 0x0A or data[max(0, s - 2):s] in (b". ", b"! ", b"? "):
+            continue  # начало строки или предложения
+        n += 1
+    return n
+
+
+def _blocks(buf, end: int, block_bytes: int) -> Iterator[bytes]:
+    """Куски buf[:end] по границам строк: ни один сигнал не пересекает перевод строки
+    (начало куска — начало строки)."""
+    pos = 0
+    while pos < end:
+        cut = buf.find(b"\n", pos + block_bytes, end) if pos + block_bytes < end else -1
+        nxt = end if cut < 0 else cut + 1
+        yield buf[pos:nxt]
+        pos = nxt
+
+
+def scan_buffer(buf, max_bytes: Optional[int] = None, path: str = "",
+                block_bytes: int = BLOCK_BYTES) -> ScanStats:
+    """Счётчики сигналов по байтовому буферу (bytes/mmap); в памяти — один кусок block_bytes."""
+    t0 = time.perf_counter()
+    n = len(buf)
+    end = n
+    if max_bytes is not None and n > max_bytes:
+        cut = buf.rfind(b"\n", 0, max_bytes)
+        end = cut + 1 if cut >= 0 else max_bytes
+    st = ScanStats(path=path, bytes=n, scanned_bytes=end)
+    groups: List[bytes] = []
+    for data in _blocks(buf, end, block_bytes):
+        groups.extend(_digit_groups(data))
+        if b"\xd0" not in data and b"\xd1" not in data:
+            continue  # нет кириллицы — нет маркеров и пар слов
+        # пробел в начале — маркер в самом начале куска тоже после пробела
+        st.addr_markers += sum(1 for _ in _ADDR_RE.finditer(b" " + data.translate(_FOLD, _LEADS)))
+        st.cap_bigrams += _cap_bigrams(data)
+    st.snils, st.phones = _classify_digits(groups)
+    st.elapsed_s = time.perf_counter() - t0
+    return st
+
+
+def scan_file(path: str | Path, max_bytes: Optional[int] = None) -> ScanStats:
+    with open_mapped(str(path)) as buf:
+        return scan_buffer(buf, max_bytes, str(path))
+
+
+def iter_files(inputs: Iterable[str | Path], pattern: str = "*") -> Iterator[Path]:
+    """Файлы из списка; каталоги обходятся рекурсивно (rglob(pattern))."""
+    for p in map(Path, inputs):
+        if p.is_dir():
+            yield from sorted(f for f in p.rglob(pattern) if f.is_file())
+        elif p.is_file():
+            yield p
+
+
+def _scan_one(args) -> ScanStats:
+    path, max_bytes = args
+    return scan_file(path, max_bytes)
+
+
+def scan_paths(
+    paths: Sequence[str | Path],
+    workers: int = 1,
+    max_bytes: Optional[int] = None,
+) -> List[ScanStats]:
+    """Просканировать файлы (workers > 1 — пулом процессов); результат — по убыванию плотности."""
+    jobs = [(str(p), max_bytes) for p in paths]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            out = list(pool.map(_scan_one, jobs, chunksize=max(1, len(jobs) // (workers * 8))))
+    else:
+        out = [_scan_one(j) for j in jobs]
+    out.sort(key=lambda s: (-s.density, -s.est_entities, s.path))
+    return out
+
+
+def write_manifest(stats: Sequence[ScanStats], out: str | Path) -> None:
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS, delimiter=";")
+        w.writeheader()
+        for st in stats:
+            w.writerow(st.to_row())
+
+
+def ranked_paths(manifest: str | Path, min_density: float = 0.0, top: Optional[int] = None) -> List[str]:
+    """Пути из манифеста в порядке ранга: плотность > min_density (по умолчанию — есть хоть один сигнал)."""
+    with Path(manifest).open(encoding="utf-8", newline="") as f:
+        rows = [r for r in csv.DictReader(f, delimiter=";") if float(r["density"]) > min_density]
+    return [r["path"] for r in rows[:top]]
+
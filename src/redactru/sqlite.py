@@ -0,0 +1,176 @@
+from __future__ import annotations
+"""
+Обезличивание текстовых колонок таблицы SQLite на месте, с сохранением строк.
+
+- чтение пакетами по ключу (keyset pagination): WHERE key > :last ORDER BY key
+  LIMIT :n — без OFFSET, каждый пакет стоит одинаково на любой глубине таблицы;
+- detect_candidates — в пуле процессов (workers > 1) по ячейкам пакета;
+  validate/apply и выдача токенов — в основном процессе, по порядку ключей,
+  поэтому нумерация токенов не зависит от числа процессов;
+- запись — executemany UPDATE одним пакетом в транзакции вместе с контрольной
+  точкой (последний обработанный ключ) в служебной таблице CHECKPOINT_TABLE;
+  прерванный прогон продолжается с неё (resume=True);
+- карта токенов сохраняется до фиксации транзакции: после сбоя повторный
+  прогон пакета выдаст те же токены.
+
+Ключ — rowid по умолчанию или любая колонка с уникальными упорядочиваемыми
+значениями (key=...). Обновляются только строки, где текст изменился.
+"""
+
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from redactru.detect import Candidate, detect_candidates
+from redactru.run import run_candidates
+from redactru.util.tokens import TokenManager
+
+CHECKPOINT_TABLE = "_redactru_checkpoint"
+DEFAULT_BATCH_ROWS = 1000
+
+
+@dataclass
+class SqliteStats:
+    rows: int = 0              # обработано строк в этом прогоне
+    updated: int = 0           # строк, где что-то заменено
+    last_key: Any = None       # последний обработанный ключ
+    elapsed_s: float = 0.0
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+def _q(name: str) -> str:
+    """Идентификатор SQL в двойных кавычках."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _detect_many(texts: Sequence[Optional[str]]) -> List[List[Candidate]]:
+    return [detect_candidates(t) if t else [] for t in texts]
+
+
+def _ensure_checkpoint(con: sqlite3.Connection) -> None:
+    con.execute(
+        f"CREATE TABLE IF NOT EXISTS {_q(CHECKPOINT_TABLE)} ("
+        " tbl TEXT NOT NULL, cols TEXT NOT NULL, last_key, rows INTEGER NOT NULL DEFAULT 0,"
+        " PRIMARY KEY (tbl, cols))"
+    )
+
+
+def read_checkpoint(con: sqlite3.Connection, table: str, columns: Sequence[str]) -> Tuple[Any, int]:
+    """(последний ключ, строк всего) по таблице и набору колонок; (None, 0) — начать сначала."""
+    _ensure_checkpoint(con)
+    row = con.execute(
+        f"SELECT last_key, rows FROM {_q(CHECKPOINT_TABLE)} WHERE tbl = ? AND cols = ?",
+        (table, ",".join(columns)),
+    ).fetchone()
+    return (row[0], row[1]) if row else (None, 0)
+
+
+def _batches(con: sqlite3.Connection, table: str, key: str, columns: Sequence[str],
+             last: Any, batch_rows: int) -> Iterable[List[tuple]]:
+    cols = ", ".join(_q(c) for c in columns)
+    first = f"SELECT {_q(key)}, {cols} FROM {_q(table)} ORDER BY {_q(key)} LIMIT ?"
+    nxt = f"SELECT {_q(key)}, {cols} FROM {_q(table)} WHERE {_q(key)} > ? ORDER BY {_q(key)} LIMIT ?"
+    while True:
+        if last is None:
+            rows = con.execute(first, (batch_rows,)).fetchall()
+        else:
+            rows = con.execute(nxt, (last, batch_rows)).fetchall()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def anonymize_sqlite(
+    db_path: str | Path,
+    table: str,
+    columns: Sequence[str],
+    mapping_path: str | Path = "mapping.json",
+    *,
+    key: str = "rowid",
+    tokens: TokenManager | None = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    workers: int = 1,
+    apply_types: Iterable[str] | None = None,
+    resume: bool = True,
+) -> SqliteStats:
+    """Обезличить колонки columns таблицы table на месте. Возвращает статистику прогона.
+
+    workers > 1 — detect в пуле процессов; resume=False — начать с начала,
+    не глядя на контрольную точку. apply_types — как в run_text.
+    """
+    columns = list(columns)
+    if not columns:
+        raise ValueError("at least one text column is required")
+    apply_types = list(apply_types) if apply_types is not None else None
+    tm = tokens if tokens is not None else TokenManager(Path(mapping_path), autosave=False)
+    stats = SqliteStats()
+    t0 = time.perf_counter()
+
+    con = sqlite3.connect(str(db_path), isolation_level=None)  # транзакции — вручную
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        last, total = read_checkpoint(con, table, columns) if resume else (None, 0)
+        stats.last_key = last
+        sets = ", ".join(f"{_q(c)} = ?" for c in columns)
+        update = f"UPDATE {_q(table)} SET {sets} WHERE {_q(key)} = ?"
+        upsert = (
+            f"INSERT INTO {_q(CHECKPOINT_TABLE)} (tbl, cols, last_key, rows) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (tbl, cols) DO UPDATE SET last_key = excluded.last_key, rows = excluded.rows"
+        )
+        if not resume:
+            _ensure_checkpoint(con)
+
+        for rows in _batches(con, table, key, columns, last, batch_rows):
+            # ячейки пакета по строкам: (r0c0, r0c1, ..., r1c0, ...)
+            cells = [r[1 + j] for r in rows for j in range(len(columns))]
+            texts = [c if isinstance(c, str) else None for c in cells]
+            if pool is not None:
+                step = max(1, -(-len(texts) // (workers * 4)))
+                chunks = [texts[i:i + step] for i in range(0, len(texts), step)]
+                found = [cs for part in pool.map(_detect_many, chunks) for cs in part]
+            else:
+                found = _detect_many(texts)
+
+            params = []
+            for n, r in enumerate(rows):
+                new = list(r[1:])
+                changed = False
+                for j in range(len(columns)):
+                    i = n * len(columns) + j
+                    if texts[i] is None or not found[i]:
+                        continue
+                    res = run_candidates(texts[i], found[i], tokens=tm, apply_types=apply_types)
+                    if res.text != texts[i]:
+                        new[j] = res.text
+                        changed = True
+                if changed:
+                    params.append((*new, r[0]))
+
+            tm.save()  # до фиксации: повтор пакета после сбоя выдаст те же токены
+            total += len(rows)
+            con.execute("BEGIN")
+            try:
+                con.executemany(update, params)
+                con.execute(upsert, (table, ",".join(columns), rows[-1][0], total))
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            stats.rows += len(rows)
+            stats.updated += len(params)
+            stats.last_key = rows[-1][0]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        con.close()
+    if tokens is None:
+        tm.save()
+    stats.elapsed_s = time.perf_counter() - t0
+    return stats
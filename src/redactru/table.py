@@ -0,0 +1,175 @@
+from __future__ import annotations
+"""
+Табличный режим: обезличивание CSV/TSV по колонкам, потоково.
+
+Каждой колонке назначается вид (columns: {имя колонки: вид}):
+- "snils" — ячейка целиком СНИЛС: проверка контрольной суммы, токен [SNILS_###];
+- "phone" — ячейка целиком телефон: нормализация к +7XXXXXXXXXX, токен [PHONE_###];
+- "text"  — свободный текст: полный прогон detect → validate → apply (redactru.run);
+- "keep"  — без изменений (так же ведут себя колонки, не указанные в columns).
+
+Файл читается пакетами по batch_rows строк; колонки snils/phone проверяются
+целиком по пакету векторно (valid_snils_array, normalize_phone_array — те же
+правила, что у детекторов текста), токены выдаются по уникальным значениям
+пакета. Ключи токенов совпадают с текстовым конвейером (norm), поэтому один и
+тот же СНИЛС в таблице и в тексте получает один токен при общей карте.
+Невалидные значения (СНИЛС с неверной суммой, «не телефон») остаются как есть
+и учитываются в статистике (invalid).
+"""
+
+import csv
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from redactru.util.phones import normalize_phone_array
+from redactru.util.snils import valid_snils_array
+from redactru.util.tokens import TokenManager
+
+COLUMN_KINDS = ("snils", "phone", "text", "keep")
+DEFAULT_BATCH_ROWS = 50_000
+
+
+@dataclass
+class TableStats:
+    rows: int = 0
+    columns: Dict[str, Dict[str, int]] = field(default_factory=dict)  # {колонка: {replaced, invalid, empty}}
+
+    def _add(self, col: str, key: str, n: int) -> None:
+        c = self.columns.setdefault(col, {"replaced": 0, "invalid": 0, "empty": 0})
+        c[key] += n
+
+
+def parse_columns(specs: Iterable[str]) -> Dict[str, str]:
+    """["snils=snils", "Телефон=phone"] -> {колонка: вид}. Вид без учёта регистра."""
+    out: Dict[str, str] = {}
+    for spec in specs:
+        name, sep, kind = spec.rpartition("=")
+        kind = kind.strip().lower()
+        if not sep or not name.strip():
+            raise ValueError(f"column spec must be NAME=KIND: {spec}")
+        if kind not in COLUMN_KINDS:
+            raise ValueError(f"unsupported column kind: {kind} (known: {', '.join(COLUMN_KINDS)})")
+        out[name.strip()] = kind
+    return out
+
+
+def _guess_delimiter(path: Path) -> str:
+    return "\t" if path.suffix.lower() in (".tsv", ".tab") else ","
+
+
+def _snils_column(values: List[str], tm: TokenManager, stats: TableStats, col: str) -> List[str]:
+    ok = valid_snils_array(values)
+    tokens: Dict[str, str] = {}
+    out = list(values)
+    for i in ok.nonzero()[0].tolist():
+        v = values[i]
+        tok = tokens.get(v)
+        if tok is None:
+            d = "".join(ch for ch in v if ch.isdigit())
+            # ключ — как norm у detect (normalize_snils)
+            tok = tokens[v] = tm.get("SNILS", f"{d[:3]}-{d[3:6]}-{d[6:9]} {d[9:]}")
+        out[i] = tok
+    empty = sum(1 for v in values if not v.strip())
+    stats._add(col, "replaced", int(ok.sum()))
+    stats._add(col, "empty", empty)
+    stats._add(col, "invalid", len(values) - int(ok.sum()) - empty)
+    return out
+
+
+def _phone_column(values: List[str], tm: TokenManager, stats: TableStats, col: str) -> List[str]:
+    norm = normalize_phone_array(values)
+    tokens: Dict[str, str] = {}
+    out = list(values)
+    replaced = empty = 0
+    for i, n in enumerate(norm):
+        if n is None:
+            empty += not values[i].strip()
+            continue
+        tok = tokens.get(n)
+        if tok is None:
+            tok = tokens[n] = tm.get("PHONE", n)
+        out[i] = tok
+        replaced += 1
+    stats._add(col, "replaced", replaced)
+    stats._add(col, "empty", empty)
+    stats._add(col, "invalid", len(values) - replaced - empty)
+    return out
+
+
+def _text_column(values: List[str], tm: TokenManager, stats: TableStats, col: str,
+                 apply_types: Optional[Sequence[str]]) -> List[str]:
+    from redactru.run import run_text
+
+    out = list(values)
+    for i, v in enumerate(values):
+        if not v.strip():
+            stats._add(col, "empty", 1)
+            continue
+        res = run_text(v, tokens=tm, apply_types=apply_types)
+        stats._add(col, "replaced", res.report["counts"]["applied"])
+        out[i] = res.text
+    return out
+
+
+def anonymize_table(
+    input_path: str | Path,
+    out_path: str | Path,
+    columns: Dict[str, str],
+    mapping_path: str | Path = "mapping.json",
+    *,
+    tokens: TokenManager | None = None,
+    delimiter: str | None = None,
+    encoding: str = "utf-8",
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    apply_types: Optional[Sequence[str]] = None,
+) -> TableStats:
+    """Обезличить CSV/TSV по колонкам (первая строка — заголовок). Возвращает статистику.
+
+    delimiter по умолчанию — по расширению (.tsv/.tab — табуляция, иначе запятая).
+    apply_types — для колонок "text", как в run_text.
+    """
+    inp, out_p = Path(input_path), Path(out_path)
+    delim = delimiter or _guess_delimiter(inp)
+    tm = tokens if tokens is not None else TokenManager(Path(mapping_path), autosave=False)
+    stats = TableStats()
+
+    out_p.parent.mkdir(parents=True, exist_ok=True)
+    with inp.open("r", encoding=encoding, newline="") as fi, \
+            out_p.open("w", encoding=encoding, newline="") as fo:
+        reader = csv.reader(fi, delimiter=delim)
+        writer = csv.writer(fo, delimiter=delim)
+        header = next(reader, None)
+        if header is None:
+            return stats
+        missing = [c for c in columns if c not in header]
+        if missing:
+            raise ValueError(f"columns not found in header: {', '.join(missing)}")
+        writer.writerow(header)
+        plan = [(header.index(c), c, k) for c, k in columns.items() if k != "keep"]
+
+        while True:
+            batch = list(islice(reader, batch_rows))
+            if not batch:
+                break
+            width = len(header)
+            for r in batch:  # короткие строки дополняем, чтобы колонки были на месте
+                if len(r) < width:
+                    r.extend([""] * (width - len(r)))
+            for j, col, kind in plan:
+                values = [r[j] for r in batch]
+                if kind == "snils":
+                    new = _snils_column(values, tm, stats, col)
+                elif kind == "phone":
+                    new = _phone_column(values, tm, stats, col)
+                else:
+                    new = _text_column(values, tm, stats, col, apply_types)
+                for r, v in zip(batch, new):
+                    r[j] = v
+            writer.writerows(batch)
+            stats.rows += len(batch)
+
+    if tokens is None:
+        tm.save()
+    return stats
@@ -0,0 +1,267 @@
+"""Известные сущности из mapping.json: автомат Ахо–Корасик по словам документа.
+
+TokenManager помнит все ключи, которым уже выданы токены (СНИЛС, телефоны,
+ИНН, адреса, ФИО). KnownEntityIndex собирает из них шаблоны — цепочки слов —
+в один автомат и находит все вхождения за один линейный проход по словам
+документа:
+
+- слова берутся из нормализованного view (redactru.util.normview: регистр,
+  латинские двойники, пробелы), «ё» → «е»; каждая группа цифр — слово;
+- СНИЛС, ИНН и др. — цифры ключа; телефон — с 7, с 8 и без кода страны.
+  Они ищутся не автоматом, а в цепочках групп цифр через 1–2 разделителя
+  («+7 (999) 123-45-67 2 раза»): ключ совпадает со склейкой любых подряд
+  идущих групп цепочки, так что соседнее число не мешает;
+- ADDR — слова ключа («ул ленина д 5» ↔ «ул. Ленина, д. 5»);
+- PER — все формы фамилии (nlp.morph.surname_forms) с остальными словами
+  ключа и фамилия отдельно. Шаблон из одного слова срабатывает, только если
+  в тексте оно с заглавной буквы.
+
+Слова, которые ведут к разным известным ключам (однофамильцы «Иванов И.И.»
+и «Иванов П.П.»), неоднозначны и не выдаются. Из пересекающихся вхождений
+берётся самое левое, при равенстве — самое длинное. Смещения — в исходном
+тексте, replacement — уже выданный токен.
+
+Карта растёт — индекс тоже: refresh() добавляет в бор только новые ключи
+(словари TokenManager упорядочены по времени выдачи), суффиксные ссылки
+пересчитываются один раз перед ближайшим проходом.
+
+Пример (doctest):
+>>> import tempfile
+>>> from pathlib import Path
+>>> from redactru.util.tokens import TokenManager
+>>> tm = TokenManager(Path(tempfile.mkdtemp()) / "m.json", autosave=False)
+>>> _ = tm.get("PER", "иванов и. и."), tm.get("PHONE", "+79991234567")
+>>> idx = KnownEntityIndex(tm)
+>>> [(h.typ, h.text, h.token) for h in idx.find("Звонил Иванову, тел. 8 999 123-45-67")]
+[('PER', 'Иванову', '[PER_001]'), ('PHONE', '8 999 123-45-67', '[PHONE_001]')]
+"""
+from __future__ import annotations
+
+import re
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from redactru.util.normview import NormalizedText
+from redactru.util.spans import Span
+from redactru.util.tokens import TokenManager
+
+# слово: буквы (через дефис) или группа цифр
+_WORD_RE = re.compile(r"\d+|[^\W\d_]+(?:-[^\W\d_]+)*")
+_DIGIT_SEP_RE = re.compile(r"[ \-()]{1,2}")  # между группами одного номера
+_NON_DIGIT_RE = re.compile(r"\D")
+MIN_SURNAME_LEN = 4  # более короткие фамилии отдельно не ищем («Ким», «Ли»)
+
+
+class KnownHit(NamedTuple):
+    start: int
+    end: int
+    typ: str
+    text: str
+    key: str    # ключ в mapping.json
+    token: str  # уже выданный токен
+
+    def to_span(self) -> Span:
+        return Span(start=self.start, end=self.end, typ=self.typ, text=self.text,
+                    replacement=self.token, score=1.0)
+
+
+def _words(view: NormalizedText) -> List[Tuple[int, int, str]]:
+    """(начало, конец в norm, слово) для всех слов view."""
+    return [(m.start(), m.end(), m.group(0).replace("ё", "е")) for m in _WORD_RE.finditer(view.norm)]
+
+
+def _digit_runs(words: Sequence[Tuple[int, int, str]], norm: str) -> Iterator[List[int]]:
+    """Номера слов-групп цифр, стоящих подряд через 1–2 разделителя («8 (999) 123-45-67»)."""
+    run: List[int] = []
+    for i, (s, _, w) in enumerate(words):
+        if w.isdigit() and run and _DIGIT_SEP_RE.fullmatch(norm, words[run[-1]][1], s):
+            run.append(i)
+            continue
+        if run:
+            yield run
+        run = [i] if w.isdigit() else []
+    if run:
+        yield run
+
+
+def key_words(key: str) -> List[str]:
+    """Слова ключа — той же нормализацией, что и текст документа."""
+    return [w for _, _, w in _words(NormalizedText(key))]
+
+
+class WordAutomaton:
+    """Ахо–Корасик над словами: бор с переходами dict слово → узел."""
+
+    def __init__(self):
+        self._next: List[Dict[str, int]] = [{}]
+        self._own: List[List[int]] = [[]]   # шаблоны, которые кончаются в узле
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]   # свои + по суффиксным ссылкам
+        self._lens: List[int] = []
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._lens)
+
+    def add(self, words: Sequence[str]) -> int:
+        """Добавить шаблон; вернуть его номер."""
+        node = 0
+        for w in words:
+            nxt = self._next[node].get(w)
+            if nxt is None:
+                nxt = len(self._next)
+                self._next[node][w] = nxt
+                self._next.append({})
+                self._own.append([])
+            node = nxt
+        pid = len(self._lens)
+        self._lens.append(len(words))
+        self._own[node].append(pid)
+        self._dirty = True
+        return pid
+
+    def _build(self) -> None:
+        n = len(self._next)
+        self._fail = [0] * n
+        self._out = [[] for _ in range(n)]
+        self._out[0] = list(self._own[0])
+        q = deque()
+        for child in self._next[0].values():
+            self._out[child] = list(self._own[child])
+            q.append(child)
+        while q:
+            node = q.popleft()
+            for w, child in self._next[node].items():
+                f = self._fail[node]
+                while f and w not in self._next[f]:
+                    f = self._fail[f]
+                f = self._next[f].get(w, 0)
+                self._fail[child] = f if f != child else 0
+                self._out[child] = self._own[child] + self._out[self._fail[child]]
+                q.append(child)
+        self._dirty = False
+
+    def iter_matches(self, words: Sequence[str]) -> Iterator[Tuple[int, int, int]]:
+        """(первое слово, после последнего, номер шаблона) для всех вхождений."""
+        if self._dirty:
+            self._build()
+        nxt, fail, out, lens = self._next, self._fail, self._out, self._lens
+        node = 0
+        for i, w in enumerate(words):
+            while node and w not in nxt[node]:
+                node = fail[node]
+            node = nxt[node].get(w, 0)
+            for pid in out[node]:
+                yield i + 1 - lens[pid], i + 1, pid
+
+
+class KnownEntityIndex:
+    def __init__(self, tokens: TokenManager):
+        self.tm = tokens
+        self._ac = WordAutomaton()
+        self._values: List[Tuple[str, str, bool]] = []  # по номеру шаблона: (тип, ключ, одно слово PER)
+        self._digits: Dict[str, Dict[Tuple[str, str], bool]] = {}  # цифры ключа -> (тип, ключ)
+        self._max_digits = 0
+        self._seen: Dict[str, int] = {}
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._ac) + len(self._digits)
+
+    def refresh(self) -> int:
+        """Добавить в автомат ключи, выданные с прошлого раза. Возвращает число новых ключей."""
+        added = 0
+        for typ, kv in self.tm.tokens.items():
+            seen = self._seen.get(typ, 0)
+            if len(kv) == seen:
+                continue
+            for i, key in enumerate(kv):
+                if i >= seen:
+                    self._add_key(typ, key)
+                    added += 1
+            self._seen[typ] = len(kv)
+        return added
+
+    def _add(self, words: Sequence[str], typ: str, key: str, single: bool = False) -> None:
+        if words:
+            self._ac.add(words)
+            self._values.append((typ, key, single))
+
+    def _add_key(self, typ: str, key: str) -> None:
+        if typ == "PER":
+            self._add_person(key)
+            return
+        if typ == "ADDR":
+            self._add(key_words(key), typ, key)
+            return
+        digits = _NON_DIGIT_RE.sub("", key)
+        if not digits:
+            return
+        variants = [digits]
+        if typ == "PHONE" and len(digits) == 11 and digits[0] in "78":
+            variants += ["8" + digits[1:] if digits[0] == "7" else "7" + digits[1:], digits[1:]]
+        for d in variants:
+            self._digits.setdefault(d, {})[(typ, key)] = True
+            self._max_digits = max(self._max_digits, len(d))
+
+    def _add_person(self, key: str) -> None:
+        words = key_words(key)
+        letters = [i for i, w in enumerate(words) if len(w) >= 2 and not w.isdigit()]
+        if not letters:
+            return
+        from redactru.nlp.morph import is_surname_token, surname_forms
+        si = next((i for i in letters if is_surname_token(words[i])), letters[0])
+        forms = surname_forms(words[si])
+        for f in forms:
+            self._add(words[:si] + [f] + words[si + 1:], "PER", key, single=len(words) == 1)
+            if len(words) > 1 and len(f) >= MIN_SURNAME_LEN:
+                self._add([f], "PER", key, single=True)
+
+    def find(self, text: str, view: Optional[NormalizedText] = None) -> List[KnownHit]:
+        """Вхождения известных ключей в text (без пересечений, по возрастанию start)."""
+        self.refresh()
+        if not len(self):
+            return []
+        view = view or NormalizedText(text)
+        words = _words(view)
+        # (начало, конец в словах) -> различные (тип, ключ)
+        found: Dict[Tuple[int, int], Dict[Tuple[str, str], bool]] = {}
+        for a, b, pid in self._ac.iter_matches([w for _, _, w in words]):
+            typ, key, single = self._values[pid]
+            if single:
+                s = view.to_orig(words[a][0])
+                if not text[s:s + 1].isupper():
+                    continue  # «гусь» в тексте — не фамилия Гусь
+            found.setdefault((a, b), {})[(typ, key)] = True
+        if self._digits:
+            for run in _digit_runs(words, view.norm):
+                for i, a in enumerate(run):
+                    acc = ""
+                    for b in run[i:]:
+                        acc += words[b][2]
+                        if len(acc) > self._max_digits:
+                            break
+                        keys = self._digits.get(acc)
+                        if keys:
+                            found.setdefault((a, b + 1), {}).update(keys)
+        hits: List[KnownHit] = []
+        last = 0
+        for a, b in sorted(found, key=lambda ab: (ab[0], -ab[1])):
+            if a < last:
+                continue
+            keys = found[(a, b)]
+            if len(keys) != 1:
+                continue  # однофамильцы или совпадение ключей разных типов
+            (typ, key), = keys
+            token = self.tm.lookup(typ, key)
+            if token is None:
+                continue
+            ns = words[a][0]
+            if ns and view.norm[ns - 1] in "+(" and words[a][2].isdigit():
+                ns -= 1  # «+7 …», «(999) …»
+            s, e = view.orig_span(ns, words[b - 1][1])
+            if typ == "PER" and len(words[b - 1][2]) == 1 and text[e:e + 1] == ".":
+                e += 1  # точка после последнего инициала
+            hits.append(KnownHit(s, e, typ, text[s:e], key, token))
+            last = b
+        return hits
@@ -0,0 +1,202 @@
+"""Кластеризация упоминаний PER/ADDR: один токен на кластер.
+
+Ключ токена в validate — «сырой» текст, поэтому «Иванов И.И.», «Иванова И.И.»
+и «Иванову И.И.» получали три разных [PER_###]. Здесь упоминания сводятся к
+ключам без падежа и сливаются в кластеры:
+
+1. нормализация: для PER — лемма каждого слова (с кешем на слово), инициалы
+   как есть; для ADDR — нижний регистр без пунктуации; «ё» → «е»;
+2. совпавшие ключи сливаются сразу (дальше работаем с уникальными ключами);
+3. блокировка: сравниваются только ключи одного типа с одинаковым блоком —
+   для PER это набор первых букв слов (фамилия + инициалы, порядок не важен),
+   для ADDR — первая буква и набор чисел (разные дома не сливаются);
+4. внутри блока — векторизованный отбор пар rapidfuzz.process.cdist
+   (расстояние Левенштейна ≤ 1 между ключами со словами в порядке сортировки),
+   большие блоки — полосами строк; пара сливается через union-find, только
+   если слова совпадают с точностью до перестановки или отличаются одним
+   словом на одну правку (опечатка). Такое слово не может быть инициалом или
+   числом, короче MIN_TYPO_LEN, и хотя бы одно из двух слов должно быть вне
+   словаря (pymorphy3, газеттир улиц): «Иванов»/«Иванцов» и «Мира»/«Мирная» —
+   разные люди и улицы, а не опечатки.
+
+Представитель кластера — ключ или исходный текст, у которого уже есть токен в
+карте (повторные прогоны и старые карты сохраняют нумерацию), иначе самый
+частый ключ (при равенстве — первый).
+
+Примеры (doctest):
+>>> keys = cluster_keys([("PER", "Иванов И.И."), ("PER", "Иванову И.И."), ("PER", "И.И. Иванова"),
+...                      ("PER", "Иванцов И.И."), ("ADDR", "ул. Ленина, д. 5"), ("ADDR", "ул Ленина д 5")])
+>>> keys[0] == keys[1] == keys[2], keys[3] == keys[0], keys[4] == keys[5]
+(True, False, True)
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+
+try:
+    from redactru.nlp.morph import is_known_word as _is_known_word, lemma as _lemma
+except Exception:
+    def _lemma(w: str) -> str:
+        return w.lower()  # без морфологии — только регистр
+
+    def _is_known_word(w: str) -> bool:
+        return True  # словаря нет — опечатку от другого слова не отличить, не сливаем
+
+MIN_TYPO_LEN = 4  # короче — одна правка уже другое слово («д»/«к», «пр»/«пл»)
+CLUSTER_TYPES = ("PER", "ADDR")
+_ROWS = 2048  # полоса строк cdist: память блока — _ROWS × размер блока байт
+
+_INIT_RE = re.compile(r"[А-ЯЁA-Z]\.")
+_WORD_RE = re.compile(r"[А-ЯЁа-яёA-Za-z]+(?:-[А-ЯЁа-яёA-Za-z]+)*|\d+[А-ЯЁа-яёA-Za-z]?")
+_NUM_RE = re.compile(r"\d+")
+_DIGIT_RE = re.compile(r"\d")
+
+
+@lru_cache(maxsize=131072)
+def _word_key(w: str) -> str:
+    return _lemma(w).replace("ё", "е")
+
+
+def normalize_mention(typ: str, text: str) -> str:
+    """Ключ упоминания без падежа и пунктуации."""
+    if typ == "PER":
+        parts = []
+        for m in re.finditer(rf"{_INIT_RE.pattern}|{_WORD_RE.pattern}", text):
+            t = m.group(0)
+            parts.append(t.lower() if t.endswith(".") else _word_key(t))
+        return " ".join(parts).replace("ё", "е")
+    return " ".join(w.lower().replace("ё", "е") for w in _WORD_RE.findall(text))
+
+
+def _block(typ: str, key: str) -> Tuple:
+    words = key.split()
+    if not words:
+        return (typ,)
+    if typ == "PER":
+        return (typ, "".join(sorted(w[0] for w in words)))
+    return (typ, key[0], tuple(_NUM_RE.findall(key)))
+
+
+class _DSU:
+    def __init__(self, n: int):
+        self.p = list(range(n))
+
+    def find(self, x: int) -> int:
+        p = self.p
+        while p[x] != x:
+            p[x] = p[p[x]]
+            x = p[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.p[max(ra, rb)] = min(ra, rb)
+
+
+@lru_cache(maxsize=131072)
+def _in_lexicon(w: str) -> bool:
+    """Словарное слово или название из газеттира: правка в нём — другое слово, не опечатка."""
+    if _is_known_word(w):
+        return True
+    try:
+        from redactru.rules.gazetteer import get_gazetteer
+        gaz = get_gazetteer()
+    except Exception:
+        return False
+    return gaz is not None and gaz.get(w) is not None
+
+
+def is_typo_variant(a: str, b: str) -> bool:
+    """Ключи a и b — одно упоминание с точностью до порядка слов и одной опечатки.
+
+    >>> is_typo_variant("шмыглевский а. б.", "а. б. шмыглевсккий")
+    True
+    >>> is_typo_variant("иванов и. и.", "иванцов и. и."), is_typo_variant("иванов и. и.", "иванов и. п.")
+    (False, False)
+    """
+    wa, wb = Counter(a.split()), Counter(b.split())
+    da, db = wa - wb, wb - wa
+    if not da and not db:
+        return True
+    if sum(da.values()) != 1 or sum(db.values()) != 1:
+        return False
+    x, y = next(iter(da)), next(iter(db))
+    if min(len(x), len(y)) < MIN_TYPO_LEN or x.endswith(".") or y.endswith("."):
+        return False
+    if _DIGIT_RE.search(x) or _DIGIT_RE.search(y) or Levenshtein.distance(x, y) > 1:
+        return False
+    return not (_in_lexicon(x) and _in_lexicon(y))
+
+
+def _link_block(keys: Sequence[str], idx: Sequence[int], dsu: _DSU) -> None:
+    # отбор кандидатов по ключу с отсортированными словами: одна опечатка — расстояние ≤ 1
+    sorted_keys = [" ".join(sorted(k.split())) for k in keys]
+    n = len(idx)
+    for r0 in range(0, n, _ROWS):
+        rows = sorted_keys[r0:r0 + _ROWS]
+        m = process.cdist(rows, sorted_keys, scorer=Levenshtein.distance, score_cutoff=1,
+                          dtype=np.uint8, workers=-1)
+        ii, jj = np.nonzero(m <= 1)
+        for i, j in zip(ii.tolist(), jj.tolist()):
+            i += r0
+            if i < j and is_typo_variant(keys[i], keys[j]):
+                dsu.union(idx[i], idx[j])
+
+
+def cluster_keys(
+    mentions: Sequence[Tuple[str, str]],
+    known: Optional[Callable[[str, str], bool]] = None,
+) -> List[str]:
+    """Ключ кластера для каждого (тип, текст). Типы вне CLUSTER_TYPES — ключ = текст.
+    known(typ, key) — есть ли у ключа токен в карте (такой ключ становится представителем)."""
+    norm: List[Optional[str]] = []
+    uniq: Dict[Tuple[str, str], int] = {}
+    freq: Counter = Counter()
+    texts: Dict[Tuple[str, str], Dict[str, None]] = defaultdict(dict)  # исходные тексты ключа
+    for typ, text in mentions:
+        if typ not in CLUSTER_TYPES:
+            norm.append(None)
+            continue
+        k = normalize_mention(typ, text) or text.strip().lower()
+        norm.append(k)
+        uniq.setdefault((typ, k), len(uniq))
+        freq[(typ, k)] += 1
+        if known is not None:
+            texts[(typ, k)].setdefault(text)
+
+    items = list(uniq)
+    dsu = _DSU(len(items))
+    blocks: Dict[Tuple, List[int]] = defaultdict(list)
+    for i, (typ, k) in enumerate(items):
+        blocks[_block(typ, k)].append(i)
+    for bkey, idx in blocks.items():
+        if len(idx) > 1:
+            _link_block([items[i][1] for i in idx], idx, dsu)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(items)):
+        groups[dsu.find(i)].append(i)
+    rep: Dict[int, str] = {}
+    for root, members in groups.items():
+        key = None
+        if known is not None:
+            # токен мог быть выдан по ключу кластера или (до кластеризации) по исходному тексту
+            key = next((items[i][1] for i in members if known(*items[i])), None)
+            if key is None:
+                key = next((t for i in members for t in texts[items[i]] if known(items[i][0], t)), None)
+        if key is None:
+            key = items[min(members, key=lambda i: (-freq[items[i]], i))][1]
+        rep[root] = key
+
+    out: List[str] = []
+    for (typ, text), k in zip(mentions, norm):
+        out.append(text if k is None else rep[dsu.find(uniq[(typ, k)])])
+    return out
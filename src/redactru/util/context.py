@@ -0,0 +1,147 @@
+"""Предвычисленный контекст документа для проверок «что слева/рядом».
+
+Вместо того чтобы на каждое совпадение вырезать кусок текста и гонять по нему
+регэксп, индекс один раз (лениво, при первом запросе) проходит документ одним
+регэкспом и запоминает для каждого слова его границы и конец пробелов/метки
+после него. Дальше проверки — двоичный поиск по массивам и пара сравнений.
+
+- label_before(pos)  — метка слева для телефонов (как phones._blocked_by_left_context:
+  слово из букв/точек, затем пробелы, необязательный «:», «№» или «#», пробелы);
+- word_before(pos)   — слово слева для ФИО (как regex_ru._bad_left_context);
+- has_marker_near()  — есть ли адресный маркер в окнах слева/справа
+  (как HybridAnonymizer._context_score: подстрочный поиск в нижнем регистре).
+
+Регистр и латинские двойники в метках и маркерах снимает общий для детекторов
+view (redactru.util.normview.NormalizedText) — один проход по документу.
+
+Результаты совпадают со срезовыми проверками, включая ограничения окон (48/24).
+
+Примеры (doctest):
+>>> ctx = ContextIndex("Номер договора №  7-321-654-98-76; когда Иванов", markers=("ул.", "д"))
+>>> ctx.label_before(18), ctx.word_before(41)
+('договора', 'когда')
+>>> ctx.has_marker_near(41, 47), ctx.has_marker_near(18, 33, width=2)
+(True, False)
+"""
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+from redactru.util.normview import NormalizedText
+
+# слово (буквы и точки) + пробелы + необязательная метка с пробелами
+_RUN_RE = re.compile(r"[A-Za-zА-Яа-яЁё.]+(\s*)(?:[:№#]\s*)?")
+
+LABEL_WINDOW = 48   # окно phones._blocked_by_left_context
+LABEL_MAX = 24      # максимальная длина метки
+WORD_WINDOW = 24    # окно regex_ru._bad_left_context
+
+
+def _minimal_markers(markers: Iterable[str]) -> tuple:
+    """Маркеры, не содержащие другой маркер как подстроку: их достаточно для проверки «есть ли»."""
+    ms = {m.lower() for m in markers if m}
+    return tuple(sorted((m for m in ms if not any(o != m and o in m for o in ms)), key=len))
+
+
+class ContextIndex:
+    def __init__(self, text: str, markers: Iterable[str] = ()):
+        self.text = text
+        self.markers = _minimal_markers(markers)
+        self._runs = None     # (starts, ends, ws_end, label_end)
+        self._occ = None      # (starts, ends) вхождений маркеров (позиции в view.norm)
+        self._view: Optional[NormalizedText] = None
+
+    # ---- построение ----
+
+    def _build_runs(self):
+        starts, ends, ws_end, lab_end = (array("q") for _ in range(4))
+        for m in _RUN_RE.finditer(self.text):
+            starts.append(m.start())
+            ends.append(m.start(1))
+            ws_end.append(m.end(1))
+            lab_end.append(m.end())
+        self._runs = (starts, ends, ws_end, lab_end)
+        return self._runs
+
+    @property
+    def view(self) -> NormalizedText:
+        """Нормализованный текст документа (строится при первом обращении)."""
+        if self._view is None:
+            self._view = NormalizedText(self.text)
+        return self._view
+
+    def _build_markers(self):
+        starts, ends = array("q"), array("q")
+        if self.markers:
+            rx = re.compile("(?=(" + "|".join(re.escape(m) for m in self.markers) + "))")
+            for m in rx.finditer(self.view.norm):
+                starts.append(m.start())
+                ends.append(m.end(1))
+        self._occ = (starts, ends)
+        return self._occ
+
+    # ---- запросы ----
+
+    def _run_before(self, pos: int):
+        """(start, end, ws_end, label_end) слова слева от pos; если pos внутри слова —
+        его часть до pos. None — слов левее нет."""
+        starts, ends, ws_end, lab_end = self._runs or self._build_runs()
+        i = bisect_left(starts, pos) - 1
+        if i < 0:
+            return None
+        if ends[i] > pos:
+            return starts[i], pos, pos, pos
+        return starts[i], ends[i], ws_end[i], lab_end[i]
+
+    def label_before(self, pos: int) -> Optional[str]:
+        """Метка перед pos в нижнем регистре без точки в конце или None."""
+        run = self._run_before(pos)
+        if run is None:
+            return None
+        s, e, ws_end, lab_end = run
+        if pos > lab_end or (ws_end < pos and lab_end == ws_end):
+            return None
+        a = max(s, e - LABEL_MAX, pos - LABEL_WINDOW)
+        if a >= e:
+            return None
+        return self.view.slice(a, e).strip().rstrip(".")
+
+    def word_before(self, pos: int) -> Optional[str]:
+        """Слово из букв непосредственно перед pos (через пробелы) в нижнем регистре или None."""
+        run = self._run_before(pos)
+        if run is None:
+            return None
+        s, e, ws_end, _ = run
+        if pos > ws_end or self.text[e - 1] == ".":
+            return None
+        dot = self.text.rfind(".", s, e)
+        a = max(dot + 1 if dot >= 0 else s, pos - WORD_WINDOW)
+        if a >= e:
+            return None
+        return self.view.slice(a, e)
+
+    def _marker_in(self, a: int, b: int) -> bool:
+        starts, ends = self._occ or self._build_markers()
+        j = bisect_left(starts, a)
+        while j < len(starts) and starts[j] < b:
+            if ends[j] <= b:
+                return True
+            j += 1
+        return False
+
+    def has_marker_near(self, start: int, end: int, width: int = 24) -> bool:
+        """Есть ли маркер в text[start-width:start] + text[end:end+width] (нижний регистр)."""
+        n = len(self.text)
+        v = self.view
+        # окна — в символах оригинала, поиск — по позициям view.norm
+        ls, s = v.to_norm(max(0, start - width)), v.to_norm(start)
+        e, re_ = v.to_norm(end), v.to_norm(min(n, end + width))
+        if self._marker_in(ls, s) or self._marker_in(e, re_):
+            return True
+        # маркер на стыке левого и правого окон
+        k = max(map(len, self.markers), default=1) - 1
+        joint = v.norm[max(ls, s - k):s] + v.norm[e:min(re_, e + k)]
+        return any(m in joint for m in self.markers)
@@ -0,0 +1,207 @@
+"""Числовые идентификаторы: ИНН, ОГРН/ОГРНИП, банковская карта, полис ОМС, паспорт.
+
+Один проход по тексту: регэксп находит группы цифр (цифры, разделённые
+одиночными пробелами/дефисами или знаком «№»), каждая группа режется на
+«окна» из подряд идущих кусков. Окно классифицируется по таблице RULES —
+первое правило, у которого совпали длина (форма кусков), метка слева и
+контрольная сумма:
+
+- INN      — 10 или 12 цифр подряд, контрольные разряды по весам (mod 11 mod 10);
+- OGRN     — 13 цифр, последняя = (первые 12) mod 11 mod 10;
+- OGRNIP   — 15 цифр, последняя = (первые 14) mod 13 mod 10;
+- OMS      — 16 цифр, только с меткой «полис»/«ОМС» (контрольная сумма не
+             проверяется: метка обязательна);
+- CARD     — 13–19 цифр подряд или группами по 4, алгоритм Луна;
+- PASSPORT — «45 10 123456», «4510 123456» или 10 цифр подряд, только с меткой.
+
+Метка — слово в окне LABEL_WINDOW символов слева, начинающееся с одного из
+префиксов правила. Без метки окно принимается только при верной контрольной
+сумме (для правил без суммы метка обязательна); с меткой, но с неверной
+суммой — принимается с valid=False (как SNILS с неверной суммой).
+
+Верная сумма без метки не всегда достаточна: алгоритму Луна отвечает каждая
+десятая строка цифр («Исх. № 1234567890128», «заказ 4111111111111111»). У таких
+правил есть evidence — дополнительный признак (для CARD: префикс платёжной
+системы и группировка кусков, как печатают карты). Без метки и без него
+окно остаётся кандидатом с confirmed=False: на ручную проверку, не в замену.
+
+Примеры (doctest):
+>>> [(s.typ, s.digits, s.valid) for s in iter_id_spans("ИНН 7707083893, ОГРН 1027700132195")]
+[('INN', '7707083893', True), ('OGRN', '1027700132195', True)]
+>>> [(s.typ, s.raw) for s in iter_id_spans("карта 4111 1111 1111 1111, паспорт 45 10 123456")]
+[('CARD', '4111 1111 1111 1111'), ('PASSPORT', '45 10 123456')]
+>>> is_valid_id("INN", "7707083894"), is_valid_id("CARD", "4111111111111111")
+(False, True)
+>>> [(s.raw, s.valid, s.confirmed) for s in iter_id_spans("4111 1111 1111 1111; заказ 4111111111111111")]
+[('4111 1111 1111 1111', True, True), ('4111111111111111', True, False)]
+"""
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+# группа цифр: куски через одиночный пробел/неразрывный пробел/дефис или «№»
+GROUP_RE = re.compile(r"(?<![\w.,])\d+(?:(?:[ \u00a0-]|\s?№\s?)\d+)*(?![\w])")
+_CHUNK_RE = re.compile(r"\d+")
+_WORD_RE = re.compile(r"[a-zа-яё]+")
+
+LABEL_WINDOW = 32   # сколько символов слева смотреть на метку
+MAX_DIGITS = 19     # длиннее идентификаторов нет
+
+_INN10 = (2, 4, 10, 3, 5, 9, 4, 6, 8)
+_INN11 = (7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+_INN12 = (3, 7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+
+
+def _weighted(digits: str, weights: Sequence[int]) -> int:
+    return sum(int(d) * w for d, w in zip(digits, weights)) % 11 % 10
+
+
+def _check_inn(d: str) -> bool:
+    if len(d) == 10:
+        return _weighted(d, _INN10) == int(d[9])
+    return _weighted(d, _INN11) == int(d[10]) and _weighted(d, _INN12) == int(d[11])
+
+
+def _check_ogrn(d: str) -> bool:
+    return int(d[:12]) % 11 % 10 == int(d[12])
+
+
+def _check_ogrnip(d: str) -> bool:
+    return int(d[:14]) % 13 % 10 == int(d[14])
+
+
+def _check_luhn(d: str) -> bool:
+    total = 0
+    for i, ch in enumerate(reversed(d)):
+        x = int(ch)
+        if i % 2:
+            x = x * 2 - 9 if x > 4 else x * 2
+        total += x
+    return total % 10 == 0
+
+
+CHECKSUMS: Dict[str, Callable[[str], bool]] = {
+    "inn": _check_inn,
+    "ogrn": _check_ogrn,
+    "ogrnip": _check_ogrnip,
+    "luhn": _check_luhn,
+}
+
+# префиксы (IIN) платёжных систем: Visa, Mastercard, Мир, AmEx, JCB, UnionPay, Discover, Maestro
+_CARD_IIN_RE = re.compile(r"4|5[0-8]|2(?:20[0-4]|22[1-9]|2[3-9]\d|[3-6]\d\d|7[01]\d|720)|3[47]|35(?:2[89]|[3-8]\d)"
+                          r"|6(?:2|011|4[4-9]|5|3|7)")
+
+
+def _card_evidence(d: str, shape: Tuple[int, ...]) -> bool:
+    """Карта без метки: номер записан группами (4-4-4-4 и т.п.) и начинается с IIN платёжной системы."""
+    return len(shape) > 1 and _CARD_IIN_RE.match(d) is not None
+
+
+EVIDENCE: Dict[str, Callable[[str, Tuple[int, ...]], bool]] = {
+    "card": _card_evidence,
+}
+
+
+class IdRule(NamedTuple):
+    typ: str
+    shapes: Tuple[Tuple[int, ...], ...]  # допустимые длины кусков, (n,) — n цифр подряд
+    check: Optional[str]                 # ключ CHECKSUMS или None
+    labels: Tuple[str, ...]              # префиксы слов-меток слева
+    need_label: bool = False
+    evidence: Optional[str] = None       # ключ EVIDENCE: без метки нужен ещё и он
+
+
+_CARD_SHAPES = tuple((n,) for n in range(13, 20)) + ((4, 4, 4, 4), (4, 4, 4, 4, 3), (4, 6, 5), (4, 6, 4))
+
+# порядок важен: первое подошедшее правило определяет тип окна
+RULES: Tuple[IdRule, ...] = (
+    IdRule("PASSPORT", ((2, 2, 6), (4, 6), (10,)), None, ("паспорт", "серия"), need_label=True),
+    IdRule("OMS", ((16,), (4, 4, 4, 4)), None, ("омс", "полис"), need_label=True),
+    IdRule("INN", ((10,), (12,)), "inn", ("инн",)),
+    IdRule("OGRNIP", ((15,),), "ogrnip", ("огрнип",)),
+    IdRule("OGRN", ((13,),), "ogrn", ("огрн",)),
+    IdRule("CARD", _CARD_SHAPES, "luhn", ("карт", "card"), evidence="card"),
+)
+ID_TYPES: Tuple[str, ...] = tuple(dict.fromkeys(r.typ for r in RULES))
+_BY_TYP: Dict[str, List[IdRule]] = {}
+for _r in RULES:
+    _BY_TYP.setdefault(_r.typ, []).append(_r)
+
+
+class IdSpan(NamedTuple):
+    start: int
+    end: int
+    raw: str
+    typ: str
+    digits: str
+    valid: bool      # контрольная сумма верна (или у типа её нет)
+    labelled: bool   # перед номером есть метка типа
+    confirmed: bool  # метка или признак правила (evidence): можно заменять без проверки
+
+
+# score спанов в реестре детекторов: с меткой / подтверждён / только сумма / неверная сумма
+SCORE_LABELLED, SCORE_CONFIRMED, SCORE_UNCONFIRMED, SCORE_INVALID = 1.0, 0.9, 0.5, 0.3
+
+
+def id_score(s: IdSpan) -> float:
+    if not s.valid:
+        return SCORE_INVALID
+    if s.labelled:
+        return SCORE_LABELLED
+    return SCORE_CONFIRMED if s.confirmed else SCORE_UNCONFIRMED
+
+
+def is_valid_id(typ: str, value: str) -> bool:
+    """Проверка длины и контрольной суммы по таблице RULES (типы без суммы — только длина)."""
+    d = re.sub(r"\D", "", value)
+    for r in _BY_TYP.get(typ.upper(), ()):
+        if any(sum(s) == len(d) for s in r.shapes):
+            return r.check is None or CHECKSUMS[r.check](d)
+    return False
+
+
+def _has_label(text: str, pos: int, labels: Sequence[str]) -> bool:
+    window = text[max(0, pos - LABEL_WINDOW):pos].lower()
+    return any(w.startswith(labels) for w in _WORD_RE.findall(window))
+
+
+def _classify(text: str, start: int, shape: Tuple[int, ...], digits: str,
+              types: Optional[frozenset]) -> Optional[Tuple[IdRule, bool, bool, bool]]:
+    for r in RULES:
+        if (types is not None and r.typ not in types) or shape not in r.shapes:
+            continue
+        labelled = _has_label(text, start, r.labels)
+        if r.need_label and not labelled:
+            continue
+        valid = r.check is None or CHECKSUMS[r.check](digits)
+        if valid or labelled:
+            confirmed = labelled or r.evidence is None or EVIDENCE[r.evidence](digits, shape)
+            return r, valid, labelled, confirmed
+    return None
+
+
+def iter_id_spans(text: str, types: Optional[Sequence[str]] = None) -> Iterator[IdSpan]:
+    """Все идентификаторы в тексте (без перекрытий, слева направо). types — ограничить типы."""
+    wanted = None if types is None else frozenset(t.upper() for t in types)
+    for g in GROUP_RE.finditer(text):
+        chunks = [(m.start(), m.end()) for m in _CHUNK_RE.finditer(text, g.start(), g.end())]
+        i, n = 0, len(chunks)
+        while i < n:
+            # самое длинное окно, начинающееся с куска i
+            hit = None
+            j, total = i, 0
+            while j < n and total + chunks[j][1] - chunks[j][0] <= MAX_DIGITS:
+                total += chunks[j][1] - chunks[j][0]
+                j += 1
+            for k in range(j, i, -1):
+                a, b = chunks[i][0], chunks[k - 1][1]
+                shape = tuple(e - s for s, e in chunks[i:k])
+                digits = "".join(text[s:e] for s, e in chunks[i:k])
+                res = _classify(text, a, shape, digits, wanted)
+                if res is not None:
+                    r, valid, labelled, confirmed = res
+                    hit = k
+                    yield IdSpan(a, b, text[a:b], r.typ, digits, valid, labelled, confirmed)
+                    break
+            i = hit if hit is not None else i + 1
@@ -0,0 +1,97 @@
+"""Отображение файла в память и разреженный индекс байт↔символ для UTF-8.
+
+Нужен для режима detect без декодирования всего файла: цифровые детекторы
+(SNILS/PHONE) работают байтовыми шаблонами прямо по mmap-буферу, а смещения
+в символах (как у detect_file) восстанавливаются через ByteCharIndex.
+
+Индекс хранит контрольные точки (байт, символ) примерно через каждые `stride`
+байт, выровненные на начало символа. Между точками символы досчитываются
+декодированием короткого куска (не больше stride байт). Последовательные
+запросы идут от курсора, так что проход по всем совпадениям по возрастанию —
+O(размер файла) суммарно. Недопустимые байты пропускаются (errors="ignore"),
+как и при чтении текста в detect_file.
+
+Примеры (doctest):
+>>> buf = "Тел: +7 999".encode("utf-8")
+>>> idx = ByteCharIndex(buf, stride=4)
+>>> idx.char_at(buf.index(b"+")), idx.byte_at(5)
+(5, 8)
+"""
+from __future__ import annotations
+
+import mmap
+from array import array
+from bisect import bisect_right
+from contextlib import contextmanager
+from typing import Iterator
+
+DEFAULT_STRIDE = 16384
+
+
+def _is_cont(b: int) -> bool:
+    return 0x80 <= b <= 0xBF
+
+
+class ByteCharIndex:
+    def __init__(self, buf, stride: int = DEFAULT_STRIDE):
+        self.buf = buf
+        self.stride = max(4, int(stride))
+        self._bytes = array("q", [0])
+        self._chars = array("q", [0])
+        self._cur_b = 0
+        self._cur_c = 0
+
+    def _count(self, b0: int, b1: int) -> int:
+        return len(self.buf[b0:b1].decode("utf-8", errors="ignore"))
+
+    def _extend(self) -> bool:
+        """Добавить следующую контрольную точку. False — дошли до конца буфера."""
+        n = len(self.buf)
+        b0 = self._bytes[-1]
+        if b0 >= n:
+            return False
+        b1 = min(n, b0 + self.stride)
+        while b1 < n and _is_cont(self.buf[b1]):
+            b1 += 1
+        self._bytes.append(b1)
+        self._chars.append(self._chars[-1] + self._count(b0, b1))
+        return True
+
+    def char_at(self, byte_off: int) -> int:
+        """Символьное смещение для байтового (на границе символа)."""
+        b = max(0, min(int(byte_off), len(self.buf)))
+        while self._bytes[-1] < b and self._extend():
+            pass
+        i = bisect_right(self._bytes, b) - 1
+        ck_b, ck_c = self._bytes[i], self._chars[i]
+        if ck_b <= self._cur_b <= b:
+            ck_b, ck_c = self._cur_b, self._cur_c
+        c = ck_c + self._count(ck_b, b)
+        self._cur_b, self._cur_c = b, c
+        return c
+
+    def byte_at(self, char_off: int) -> int:
+        """Байтовое смещение для символьного."""
+        c = max(0, int(char_off))
+        while self._chars[-1] < c and self._extend():
+            pass
+        i = bisect_right(self._chars, c) - 1
+        ck_b, ck_c = self._bytes[i], self._chars[i]
+        end = self._bytes[i + 1] if i + 1 < len(self._bytes) else len(self.buf)
+        seg = self.buf[ck_b:end].decode("utf-8", errors="ignore")
+        return ck_b + len(seg[: c - ck_c].encode("utf-8"))
+
+
+@contextmanager
+def open_mapped(path: str) -> Iterator[bytes | mmap.mmap]:
+    """Отобразить файл в память только для чтения (пустой файл — b"")."""
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # пустой файл нельзя отобразить
+            yield b""
+            return
+        try:
+            yield mm
+        finally:
+            mm.close()
@@ -0,0 +1,140 @@
+"""Нормализованное представление текста с картой смещений к оригиналу.
+
+Один проход по документу вместо IGNORECASE в регэкспах и повторных .lower()
+кусков текста в проверках контекста:
+
+- нижний регистр (str.lower; если он меняет длину строки — посимвольно,
+  такие символы остаются как есть);
+- латинские двойники кириллицы (a, c, e, o, p, x, y, k, m, t, h, b) — в
+  кириллицу, но только внутри слов, где уже есть кириллица: «yл.» → «ул.»,
+  а «ext», «snils» и адреса почты не трогаются;
+- серии пробельных символов без перевода строки → один пробел; одиночный
+  таб или неразрывный пробел → пробел. Переводы строк сохраняются.
+
+Детекторы ищут по norm регэкспами без IGNORECASE и переводят спаны в
+смещения оригинала (orig_span); проверки по оригинальным позициям берут
+нормализованные куски через slice. Карта хранит только схлопнутые серии
+пробелов, так что для текста без двойных пробелов она пустая.
+
+Примеры (doctest):
+>>> v = NormalizedText("Адрес:  Г. Казань,\\tУЛ. Лeнина")   # «e» в «Лeнина» — латинская
+>>> v.norm
+'адрес: г. казань, ул. ленина'
+>>> a = v.norm.index("ул.")
+>>> v.orig_span(a, len(v.norm))
+(19, 29)
+>>> v.text[19:29], v.slice(0, 6)
+('УЛ. Лeнина', 'адрес:')
+>>> fold_key("  Ул.  Лeнина\\n д 5 ")
+'ул. ленина д 5'
+"""
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import Optional, Tuple
+
+# латиница, которая в кириллическом слове почти наверняка опечатка/подмена
+_LATIN = "aAcCeEoOpPxXyYkKmMtThHbB"
+_CYRIL = "аАсСеЕоОрРхХуУкКмМтТнНвВ"
+_HOMOGLYPHS = str.maketrans(dict(zip(_LATIN, _CYRIL)))
+_HAS_LATIN_RE = re.compile(r"[A-Za-z]")
+# слово, где есть и латиница, и кириллица
+_MIXED_RE = re.compile(r"[^\W\d_]*(?:[a-z][^\W\d_]*[а-яё]|[а-яё][^\W\d_]*[a-z])[^\W\d_]*")
+# что меняется в пробелах: серия из 2+ пробельных (без \n) или одиночный не-пробел (таб, NBSP, \r)
+_WS_RE = re.compile(r"[^\S\n]{2,}|[^\S\n ]")
+_ANY_WS_RE = re.compile(r"\s+")
+
+# пробельные символы вне ASCII (NBSP, узкие и типографские пробелы), которые view
+# сводит к пробелу, — в UTF-8: для байтовых регэкспов по mmap-буферу
+UTF8_SPACES = tuple(chr(c).encode("utf-8") for c in range(0x80, 0x3001) if chr(c).isspace())
+# фрагмент байтового регэкспа: любой пробельный символ (\s в bytes — только ASCII)
+SPACE_BYTES = rb"(?:\s|" + b"|".join(re.escape(sp) for sp in UTF8_SPACES) + rb")"
+
+
+def case_bytes(word: str) -> bytes:
+    """Фрагмент байтового регэкспа: word (нижний регистр) в любом регистре и с латинскими
+    двойниками — всё, что view сводит к word (IGNORECASE в bytes — только ASCII).
+
+    >>> re.fullmatch(case_bytes("доб"), "дOБ".encode()) is not None   # «O» — латинская
+    True
+    """
+    parts = []
+    for ch in word:
+        alts = {ch, ch.upper()} | {lat for lat, cyr in zip(_LATIN, _CYRIL) if cyr.lower() == ch}
+        parts.append(b"(?:" + b"|".join(re.escape(a.encode("utf-8")) for a in sorted(alts)) + b")")
+    return b"".join(parts)
+
+
+def _lower(text: str) -> str:
+    low = text.lower()
+    if len(low) == len(text):
+        return low
+    return "".join(lc if len(lc) == 1 else ch for ch, lc in ((ch, ch.lower()) for ch in text))
+
+
+def _fold_homoglyphs(low: str) -> str:
+    if not _HAS_LATIN_RE.search(low):
+        return low
+    return _MIXED_RE.sub(lambda m: m.group(0).translate(_HOMOGLYPHS), low)
+
+
+class NormalizedText:
+    def __init__(self, text: str):
+        self.text = text
+        folded = _fold_homoglyphs(_lower(text))
+        # схлопнутые серии: norm-позиция после пробела-заменителя и сколько символов выкинуто до неё
+        self._norm_at = array("q")
+        self._orig_at = array("q")   # конец серии в оригинале
+        self._removed = array("q")
+        parts, pos, removed = [], 0, 0
+        for m in _WS_RE.finditer(folded):
+            a, b = m.span()
+            parts.append(folded[pos:a])
+            parts.append(" ")
+            pos = b
+            if b - a > 1:
+                removed += b - a - 1
+                self._norm_at.append(b - removed)
+                self._orig_at.append(b)
+                self._removed.append(removed)
+        parts.append(folded[pos:])
+        self.norm = "".join(parts) if parts[:-1] else folded
+
+    def __len__(self) -> int:
+        return len(self.norm)
+
+    def to_orig(self, j: int) -> int:
+        """Позиция символа norm[j] в оригинале (для j == len(norm) — len(text))."""
+        k = bisect_right(self._norm_at, j) - 1
+        return j + (self._removed[k] if k >= 0 else 0)
+
+    def to_norm(self, i: int) -> int:
+        """Граница i оригинала в norm; внутри схлопнутой серии — после её пробела."""
+        k = bisect_right(self._orig_at, i) - 1
+        removed = self._removed[k] if k >= 0 else 0
+        nk = k + 1
+        if nk < len(self._orig_at):
+            # i внутри следующей серии: её пробел стоит на norm_at - 1
+            run_start = self._orig_at[nk] - (self._removed[nk] - removed) - 1
+            if run_start < i < self._orig_at[nk]:
+                return self._norm_at[nk]
+        return i - removed
+
+    def orig_span(self, a: int, b: int) -> Tuple[int, int]:
+        """Спан [a, b) из norm -> [start, end) оригинала."""
+        if b <= a:
+            s = self.to_orig(a)
+            return s, s
+        return self.to_orig(a), self.to_orig(b - 1) + 1
+
+    def slice(self, start: int, end: int) -> str:
+        """Нормализованный кусок по оригинальным позициям [start, end)."""
+        return self.norm[self.to_norm(start):self.to_norm(end)]
+
+
+def fold_key(text: str, view: Optional[NormalizedText] = None) -> str:
+    """Ключ для сравнения строк: нормализация как у NormalizedText, любые пробелы → один пробел."""
+    norm = view.norm if view is not None else NormalizedText(text).norm
+    return _ANY_WS_RE.sub(" ", norm).strip()
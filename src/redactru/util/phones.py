@@ -19,11 +19,16 @@ True
 (1, '89991234567', '+79991234567', False)
 >>> list(iter_phone_spans("Номер договора: 7-321-654-98-76 не является телефоном."))
 []
+>>> normalize_phone_array(["8 (999) 123-45-67", "999 123 45 67", "123-45-67", ""])
+['+79991234567', '+79991234567', None, None]
 """
 from __future__ import annotations
 
 import re
-from typing import Iterator, NamedTuple, Optional
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+from redactru.util.context import ContextIndex
+from redactru.util.normview import SPACE_BYTES, case_bytes
 
 # Основной шаблон: компактный вариант или вариант с маской и/или скобками
 PHONE_RE = re.compile(
@@ -39,7 +44,7 @@ PHONE_RE = re.compile(
     (?:\s*(?:доб\.?|ext\.?)\s*(?P<ext>\d{1,6}))?
     (?!\d)
     """,
-    re.VERBOSE | re.IGNORECASE,
+    re.VERBOSE,  # без IGNORECASE: ищем по ContextIndex.view (нижний регистр)
 )
 
 # Слова в левом контексте, при которых совпадение игнорируем
@@ -59,8 +64,11 @@ class PhoneSpan(NamedTuple):
     ext: Optional[str]   # добавочный, если есть
     has_ext: bool
 
+# только ASCII-цифры: \D оставил бы «９» и др., а ключ телефона — строго +7 и 10 цифр 0-9
+_NON_DIGIT_RE = re.compile(r"[^0-9]")
+
 def _only_digits(s: str) -> str:
-    return re.sub(r"\D", "", s)
+    return _NON_DIGIT_RE.sub("", s)
 
 def _normalize(digits: str) -> Optional[str]:
     """Вернёт '+7XXXXXXXXXX' или None, если число не похоже на RU."""
@@ -71,6 +79,28 @@ def _normalize(digits: str) -> Optional[str]:
         return "+7" + digits
     return None
 
+def normalize_phone_array(values: Sequence[str]) -> List[Optional[str]]:
+    """Векторная _normalize по столбцу значений (ячейка — один номер, как есть в таблице).
+
+    Правила те же: 11 цифр с 7/8 в начале или 10 цифр -> "+7" + 10 цифр, иначе None.
+    Проверка длины/префикса и сборка результата — над массивами NumPy.
+    """
+    import numpy as np
+
+    digits = [_NON_DIGIT_RE.sub("", v) for v in values]
+    n = len(digits)
+    if n == 0:
+        return []
+    lens = np.fromiter(map(len, digits), dtype=np.int64, count=n)
+    mat = np.array(digits, dtype="S11").view("S1").reshape(n, 11)
+    ok11 = (lens == 11) & ((mat[:, 0] == b"7") | (mat[:, 0] == b"8"))
+    ok10 = lens == 10
+    core = np.where(ok11[:, None], mat[:, 1:], mat[:, :10])
+    core = np.ascontiguousarray(core).view("S10").ravel()
+    out = np.char.add(b"+7", core).astype("U12").astype(object)
+    out[~(ok11 | ok10)] = None
+    return out.tolist()
+
 def is_probable_ru_phone(text: str) -> bool:
     """Грубая проверка по цифрам и префиксу."""
     d = _only_digits(text)
@@ -80,7 +110,10 @@ def is_probable_ru_phone(text: str) -> bool:
         return True
     return False
 
-def _blocked_by_left_context(full_text: str, start: int) -> bool:
+def _blocked_by_left_context(full_text: str, start: int, ctx: Optional[ContextIndex] = None) -> bool:
+    if ctx is not None:
+        label = ctx.label_before(start)
+        return label is not None and any(label.startswith(pfx) for pfx in LABEL_PREFIXES)
     left = full_text[max(0, start - 48): start]
     m = re.search(r"([A-Za-zА-Яа-яЁё\.]{1,24})\s*[:№#]?\s*$", left)
     if not m:
@@ -88,32 +121,90 @@ def _blocked_by_left_context(full_text: str, start: int) -> bool:
     label = m.group(1).lower().strip().rstrip(".")
     return any(label.startswith(pfx) for pfx in LABEL_PREFIXES)
 
-def iter_phone_spans(text: str) -> Iterator[PhoneSpan]:
-    """Итератор по телефонным вхождениям с нормализацией к E.164 (+7...)."""
-    for m in PHONE_RE.finditer(text):
-        if _blocked_by_left_context(text, m.start()):
+def _match_digits(group) -> str:
+    """Цифры номера по группам совпадения; group(name) -> str | None."""
+    compact = group("compact")
+    if compact:
+        return _only_digits(compact)
+    prefix = group("prefix") or ""
+    area = group("area") or group("area2") or ""
+    return _only_digits(prefix + area + group("d1") + group("d2") + group("d3"))
+
+def iter_phone_spans(text: str, ctx: Optional[ContextIndex] = None) -> Iterator[PhoneSpan]:
+    """Итератор по телефонным вхождениям с нормализацией к E.164 (+7...).
+    ctx — общий ContextIndex документа (иначе строится свой, лениво)."""
+    if ctx is None:
+        ctx = ContextIndex(text)
+    view = ctx.view
+    for m in PHONE_RE.finditer(view.norm):
+        start, end = view.orig_span(m.start(), m.end())
+        if _blocked_by_left_context(text, start, ctx):
             continue
 
-        raw = text[m.start(): m.end()].strip()
+        raw = text[start:end].strip()
         ext = m.group("ext")
-        compact = m.group("compact")
+        digits = _match_digits(m.group)
 
-        if compact:
-            digits = _only_digits(compact)
-        else:
-            prefix = m.group("prefix") or ""
-            area = m.group("area") or m.group("area2") or ""
-            d1, d2, d3 = m.group("d1"), m.group("d2"), m.group("d3")
-            digits = _only_digits(prefix + area + d1 + d2 + d3)
+        normalized = _normalize(digits)
+        if not normalized:
+            continue
 
+        yield PhoneSpan(
+            start=start,
+            end=end,
+            raw=raw,
+            digits=digits,
+            normalized=normalized,
+            ext=ext if ext else None,
+            has_ext=bool(ext),
+        )
+
+# Байтовый вариант PHONE_RE для буфера UTF-8 (mmap). IGNORECASE в bytes-режиме
+# действует только на ASCII, поэтому «доб» — по буквам в любом регистре (case_bytes,
+# «дОб» и латинская «o» — как сводит view); \s — тоже только ASCII, поэтому
+# пробелы — SPACE_BYTES (с NBSP и др.).
+PHONE_BYTES_RE = re.compile(
+    r"""
+    (?<![0-9])
+    (?:
+        (?P<compact>(?:\+7|8|7)[0-9]{10})
+      |
+        (?:(?P<prefix>\+7|8|7)WS*[- ]*)?
+        (?:\(WS*(?P<area>[0-9]{3})WS*\)|(?P<area2>[0-9]{3}))
+        WS*[- ]*(?P<d1>[0-9]{3})WS*[- ]*(?P<d2>[0-9]{2})WS*[- ]*(?P<d3>[0-9]{2})
+    )
+    (?:WS*(?:DOB\.?|ext\.?)WS*(?P<ext>[0-9]{1,6}))?
+    (?![0-9])
+    """.encode("utf-8").replace(b"WS", SPACE_BYTES).replace(b"DOB", case_bytes("доб")),
+    re.VERBOSE | re.IGNORECASE,
+)
+
+# Сколько байт слева декодировать для проверки контекста: 48 символов по 4 байта максимум
+_LEFT_BYTES = 48 * 4
+
+def iter_phone_spans_bytes(buf, pos: int = 0, endpos: Optional[int] = None) -> Iterator[PhoneSpan]:
+    """То же по байтовому буферу (bytes/mmap). start/end — байтовые смещения.
+    pos/endpos — искать только в buf[pos:endpos] (левый контекст смотрится и до pos)."""
+    for m in PHONE_BYTES_RE.finditer(buf, pos, len(buf) if endpos is None else endpos):
+        s = m.start()
+        left = buf[max(0, s - _LEFT_BYTES): s].decode("utf-8", errors="ignore")
+        if _blocked_by_left_context(left, len(left)):
+            continue
+
+        def group(name: str) -> Optional[str]:
+            g = m.group(name)
+            return g.decode("utf-8") if g is not None else None
+
+        digits = _match_digits(group)
         normalized = _normalize(digits)
         if not normalized:
             continue
 
+        ext = group("ext")
         yield PhoneSpan(
-            start=m.start(),
+            start=s,
             end=m.end(),
-            raw=raw,
+            raw=m.group(0).decode("utf-8").strip(),
             digits=digits,
             normalized=normalized,
             ext=ext if ext else None,
@@ -15,13 +15,22 @@ False
 >>> spans = list(iter_snils_spans("СНИЛС сотрудника: 11223344595."))
 >>> len(spans), spans[0].digits, spans[0].is_valid
 (1, '11223344595', True)
+>>> valid_snils_array(["112-233-445 95", "112 233 445 96", "000-000-000 00", "нет"]).tolist()
+[True, False, False, False]
 """
 from __future__ import annotations
 
 import re
-from typing import Iterator, NamedTuple
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+from redactru.util.normview import SPACE_BYTES
 
 SNILS_RE = re.compile(r"(?<!\d)(\d{3})[-\s]?(\d{3})[-\s]?(\d{3})\s?(\d{2})(?!\d)")
+# Тот же шаблон для байтового буфера UTF-8 (mmap): ASCII-цифры, пробелы — и юникодные (NBSP и др.)
+SNILS_BYTES_RE = re.compile(
+    rb"(?<![0-9])([0-9]{3})(?:-|%(ws)s)?([0-9]{3})(?:-|%(ws)s)?([0-9]{3})%(ws)s?([0-9]{2})(?![0-9])"
+    % {b"ws": SPACE_BYTES}
+)
 
 class SnilsSpan(NamedTuple):
     start: int
@@ -32,9 +41,12 @@ class SnilsSpan(NamedTuple):
     checksum: str
     is_valid: bool
 
+_WEIGHTS = tuple(range(9, 0, -1))
+# только ASCII-цифры: \D оставил бы полноширинные «１» (np.array(..., "S11") на них падает)
+_NON_DIGIT_RE = re.compile(r"[^0-9]")
+
 def _checksum(d9: str) -> str:
-    weights = range(9, 0, -1)
-    s = sum(int(d) * w for d, w in zip(d9, weights))
+    s = sum(int(d) * w for d, w in zip(d9, _WEIGHTS))
     if s < 100:
         chk = s
     elif s in (100, 101):
@@ -55,7 +67,7 @@ def normalize_snils(text: str) -> str | None:
 
 def is_valid_snils(snils: str) -> bool:
     """Проверка по формату и контрольной сумме. Дополнительно запрещаем 000-000-000 00."""
-    digits = re.sub(r"\D", "", snils)
+    digits = _NON_DIGIT_RE.sub("", snils)
     if len(digits) != 11:
         return False
     d9, d2 = digits[:9], digits[9:]
@@ -63,6 +75,29 @@ def is_valid_snils(snils: str) -> bool:
         return False
     return _checksum(d9) == d2
 
+def valid_snils_array(values: Sequence[str]):
+    """Векторная is_valid_snils по столбцу значений -> np.ndarray[bool].
+
+    Те же правила, что у _checksum: сумма цифр с весами 9..1 по модулю 101
+    (100 и 101 дают 00), 000-000-000 00 запрещён. Цифры выделяются по ячейке,
+    дальше вся арифметика — над матрицей n×11 без цикла по строкам.
+    """
+    import numpy as np
+
+    digits = [_NON_DIGIT_RE.sub("", v) for v in values]
+    n = len(digits)
+    lens = np.fromiter(map(len, digits), dtype=np.int64, count=n)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    # фиксированная ширина 11: длинные значения обрезаются, но их отсекает lens == 11
+    mat = np.frombuffer(np.array(digits, dtype="S11").tobytes(), dtype=np.uint8).reshape(n, 11)
+    mat = mat.astype(np.int64) - 48
+    s = mat[:, :9] @ np.array(_WEIGHTS, dtype=np.int64)
+    chk = s % 101
+    chk[chk == 100] = 0
+    ok = (lens == 11) & (chk == mat[:, 9] * 10 + mat[:, 10])
+    return ok & (mat[:, :9].sum(axis=1) != 0)
+
 def iter_snils_spans(text: str) -> Iterator[SnilsSpan]:
     """Итератор по всем SNILS-вхождениям в тексте."""
     for m in SNILS_RE.finditer(text):
@@ -80,3 +115,19 @@ def iter_snils_spans(text: str) -> Iterator[SnilsSpan]:
             checksum=g4,
             is_valid=valid,
         )
+
+def iter_snils_spans_bytes(buf, pos: int = 0, endpos: Optional[int] = None) -> Iterator[SnilsSpan]:
+    """То же по байтовому буферу (bytes/mmap). start/end — байтовые смещения.
+    pos/endpos — искать только в buf[pos:endpos]."""
+    for m in SNILS_BYTES_RE.finditer(buf, pos, len(buf) if endpos is None else endpos):
+        g1, g2, g3, g4 = (g.decode("ascii") for g in m.groups())
+        digits = f"{g1}{g2}{g3}{g4}"
+        yield SnilsSpan(
+            start=m.start(),
+            end=m.end(),
+            raw=m.group(0).decode("utf-8"),
+            digits=digits,
+            normalized=f"{g1}-{g2}-{g3} {g4}",
+            checksum=g4,
+            is_valid=is_valid_snils(digits),
+        )
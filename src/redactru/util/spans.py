@@ -22,8 +22,12 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Iterable, List, Sequence, Tuple, Dict
 
-# Приоритет типов по умолчанию
-DEFAULT_PRIORITY: Tuple[str, ...] = ("SNILS", "PHONE", "ADDR", "PER")
+# Приоритет типов по умолчанию. Числовые идентификаторы — после PHONE: номер с
+# меткой «ИНН»/«паспорт» телефоном и так не считается, а 10 цифр без метки
+# (с верной суммой ИНН по случайности) остаются телефоном, как раньше.
+DEFAULT_PRIORITY: Tuple[str, ...] = (
+    "SNILS", "PHONE", "PASSPORT", "INN", "OGRNIP", "OGRN", "OMS", "CARD", "ADDR", "PER",
+)
 
 
 @dataclass(frozen=True)
@@ -116,6 +120,30 @@ def resolve_overlaps(
     return chosen
 
 
+def resolve_by_components(
+    spans: Iterable[Span],
+    priority: Sequence[str] = DEFAULT_PRIORITY,
+) -> List[Span]:
+    """То же, что resolve_overlaps, по группам связанных пересечениями спанов.
+
+    resolve_overlaps сравнивает только пересекающиеся спаны, поэтому каждую
+    группу можно решать отдельно — без квадратичного прохода по всему документу.
+    """
+    items = sorted((s for s in spans if s.length > 0), key=lambda s: (s.start, -s.length))
+    out: List[Span] = []
+    group: List[Span] = []
+    end = -1
+    for s in items:
+        if group and s.start >= end:  # с предыдущей группой не пересекается
+            out.extend(resolve_overlaps(group, priority))
+            group, end = [], -1
+        group.append(s)
+        end = max(end, s.end)
+    if group:
+        out.extend(resolve_overlaps(group, priority))
+    return out
+
+
 def apply_spans(text: str, spans: Iterable[Span]) -> Tuple[str, List[Dict[str, object]]]:
     """Применить замены к тексту. Возвращает (новый_текст, операции).
 
@@ -4,8 +4,11 @@
 - Токен однозначно определяется парой (type, key).
 - При первом запросе пары создаётся новый индекс по типу и токен [TYPE_###].
 - Карта хранится на диске в JSON. Повторный запуск сохраняет нумерацию.
+- При autosave=False карта пишется на диск только по явному save() — удобно для
+  пакетной выдачи многих токенов за один прогон.
 
-Типы по умолчанию: PER, PHONE, SNILS, ADDR.
+Типы по умолчанию: PER, PHONE, SNILS, ADDR и числовые идентификаторы
+(INN, OGRN, OGRNIP, CARD, OMS, PASSPORT).
 """
 
 from __future__ import annotations
@@ -15,7 +18,7 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Tuple
 
-_ALLOWED = {"PER", "PHONE", "SNILS", "ADDR"}
+_ALLOWED = {"PER", "PHONE", "SNILS", "ADDR", "INN", "OGRN", "OGRNIP", "CARD", "OMS", "PASSPORT"}
 
 def _slug_key(key: str) -> str:
     """Нормализованный ключ (для устойчивого совпадения)."""
@@ -31,6 +34,8 @@ class TokenManager:
     path: Path
     tokens: Dict[str, Dict[str, str]] = field(default_factory=dict)   # {type: {key: token}}
     counters: Dict[str, int] = field(default_factory=dict)            # {type: last_index}
+    autosave: bool = True
+    _dirty: bool = field(default=False, repr=False)
 
     def __post_init__(self) -> None:
         if self.path.exists():
@@ -55,7 +60,10 @@ class TokenManager:
         self.counters[t] = idx
         tok = f"[{t}_{_next_label(idx)}]"
         self.tokens[t][skey] = tok
-        self._save()
+        if self.autosave:
+            self._save()
+        else:
+            self._dirty = True
         return tok
 
     def lookup(self, typ: str, key: str) -> str | None:
@@ -69,6 +77,11 @@ class TokenManager:
         """Глубокая копия словаря (для отчётов)."""
         return {t: dict(kv) for t, kv in self.tokens.items()}
 
+    def save(self) -> None:
+        """Записать карту на диск, если с прошлой записи появились новые токены."""
+        if self._dirty:
+            self._save()
+
     # ---- io ----
 
     def _load(self) -> None:
@@ -83,6 +96,7 @@ class TokenManager:
         data = {"tokens": self.tokens, "counters": self.counters}
         self.path.parent.mkdir(parents=True, exist_ok=True)
         self.path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        self._dirty = False
 
     # ---- helpers ----
 
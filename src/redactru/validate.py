@@ -2,10 +2,21 @@ from __future__ import annotations
 """
 Преобразование результатов detect (JSON или CSV) в валидированный документ candidates.json по схеме.
 Добавляет поля: apply, replacement. Токены — через TokenManager (mapping.json).
+Упоминания PER/ADDR перед выдачей токенов кластеризуются (redactru.util.cluster):
+«Иванов И.И.», «Иванову И.И.», «Иванова И.И.» получают один токен.
+
+Режим замены (replacement_mode):
+- "token" (по умолчанию) — токены [TYPE_###];
+- "surrogate" — для PER читаемое суррогатное ФИО в падеже и роде упоминания
+  (redactru.nlp.surrogates); токен PER по-прежнему выдаётся и пишется в meta.token.
 
 Правила по умолчанию:
 - SNILS: apply = True, если meta.valid == True
 - PHONE: apply = True
+- INN, OGRN, OGRNIP, CARD, OMS, PASSPORT: apply = True, если meta.valid == True
+  (контрольная сумма верна; у OMS/PASSPORT суммы нет — достаточно метки) и нет
+  meta.review (верная сумма без метки и без признаков типа — например, номер
+  «заказа» по Луну — ждёт ручной проверки; --apply CARD в run включает и такие)
 - ADDR, PER: apply = False (для ручной проверки)
 
 CSV поддерживается формата превью из CLI detect: ;-разделитель, с колонками:
@@ -15,17 +26,25 @@ id;type;start;end;text;norm;score[;apply][;replacement]
 import csv
 import json
 from dataclasses import asdict
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable, List, Dict, Any
 
 from jsonschema import validate as js_validate
 
+from redactru.util.cluster import cluster_keys
+from redactru.util.ids import ID_TYPES
 from redactru.util.tokens import TokenManager
 
 
 SCHEMA_PATH = Path("schemas/candidates.schema.json")
+REPLACEMENT_MODES = ("token", "surrogate")
+KNOWN_TYPES = {"SNILS", "PHONE", "ADDR", "PER", *ID_TYPES}
+# типы, у которых apply по умолчанию зависит от meta.valid
+CHECKED_TYPES = {"SNILS", *ID_TYPES}
 
 
+@lru_cache(maxsize=None)
 def _read_schema() -> Dict[str, Any]:
     return json.loads(SCHEMA_PATH.read_text(encoding="utf-8"))
 
@@ -78,12 +97,13 @@ def _coerce_bool(v: Any) -> bool | None:
 
 def _default_apply(item: Dict[str, Any]) -> bool:
     t = (item.get("typ") or "").upper()
-    if t == "SNILS":
+    if t in CHECKED_TYPES:
         # meta.valid может отсутствовать, тогда осторожно
         valid = False
         meta = item.get("meta") or {}
         if isinstance(meta, dict):
-            valid = bool(meta.get("valid"))
+            # meta.review — сумма верна, но без метки: только ручная проверка
+            valid = bool(meta.get("valid")) and not meta.get("review")
         return valid
     if t == "PHONE":
         return True
@@ -101,28 +121,65 @@ def _token_type(item: Dict[str, Any]) -> str:
 
 def build_candidates_document(
     raw_items: Iterable[Dict[str, Any]],
-    mapping_path: Path,
+    mapping_path: Path | None = None,
+    *,
+    tokens: TokenManager | None = None,
+    check_schema: bool = True,
+    replacement_mode: str = "token",
+    cluster: bool = True,
 ) -> Dict[str, Any]:
     """
     Преобразовать список «сырых» кандидатов (из detect JSON или CSV превью) к документу по схеме.
     Создаёт/обновляет mapping.json и заполняет replacement токенами.
+
+    tokens — готовый TokenManager (например, общий на пакет документов); тогда
+    mapping_path не нужен, а сохранение карты — забота вызывающего.
+    check_schema=False пропускает проверку по схеме (документ собран в памяти из detect).
+    replacement_mode="surrogate" — суррогатные ФИО для PER (см. описание модуля).
+    cluster=False — ключ токена по «сырому» тексту, без кластеризации PER/ADDR.
     """
-    tm = TokenManager(mapping_path)
+    if replacement_mode not in REPLACEMENT_MODES:
+        raise ValueError(f"unsupported replacement mode: {replacement_mode}")
+    render = None
+    if replacement_mode == "surrogate":
+        from redactru.nlp.surrogates import render_surrogate, surrogate_key
+        render = render_surrogate
+    own_tm = tokens is None
+    if own_tm:
+        if mapping_path is None:
+            raise ValueError("mapping_path or tokens is required")
+        tm = TokenManager(Path(mapping_path), autosave=False)
+    else:
+        tm = tokens
+
+    raw = [it for it in raw_items if _token_type(it) in KNOWN_TYPES]
+    cluster_of = None
+    if cluster:
+        # падежные и орфографические варианты PER/ADDR — один ключ (и один токен) на кластер
+        cluster_of = cluster_keys(
+            [(_token_type(it), _token_key(it)) for it in raw],
+            known=lambda t, k: tm.lookup(t, k) is not None,
+        )
 
     items: List[Dict[str, Any]] = []
-    for it in raw_items:
+    for n, it in enumerate(raw):
         typ = _token_type(it)
-        if typ not in {"SNILS", "PHONE", "ADDR", "PER"}:
-            continue
 
         apply_flag = it.get("apply")
         if apply_flag is None:
             apply_flag = _default_apply(it)
 
+        meta = it.get("meta") or {}
         replacement = it.get("replacement")
         if not replacement:
-            key = _token_key(it) or f"{typ}:{it.get('start')}-{it.get('end')}"
-            replacement = tm.get(typ, key)
+            if render is not None and typ == "PER" and it.get("text"):
+                # разные падежи одного ФИО — один токен и один суррогат
+                token = tm.get(typ, cluster_of[n] if cluster_of else surrogate_key(it["text"]))
+                replacement = render(it["text"], token)
+                meta = {**meta, "token": token}
+            else:
+                key = (cluster_of[n] if cluster_of else _token_key(it)) or f"{typ}:{it.get('start')}-{it.get('end')}"
+                replacement = tm.get(typ, key)
 
         items.append(
             {
@@ -135,12 +192,16 @@ def build_candidates_document(
                 "score": float(it.get("score", 0) or 0.0),
                 "apply": bool(apply_flag),
                 "replacement": replacement,
-                "meta": it.get("meta") or {},
+                "meta": meta,
             }
         )
 
+    if own_tm:
+        tm.save()
+
     doc = {"version": "1", "items": items}
-    js_validate(instance=doc, schema=_read_schema())
+    if check_schema:
+        js_validate(instance=doc, schema=_read_schema())
     return doc
 
 
@@ -148,6 +209,8 @@ def validate_file(
     input_path: str | Path,
     out_path: str | Path,
     mapping_path: str | Path = "mapping.json",
+    replacement_mode: str = "token",
+    cluster: bool = True,
 ) -> Path:
     """
     Загрузить кандидатов из JSON или CSV, построить документ по схеме и сохранить.
@@ -161,7 +224,8 @@ def validate_file(
     else:
         raw = _load_items_from_json(in_p)
 
-    doc = build_candidates_document(raw, Path(mapping_path))
+    doc = build_candidates_document(raw, Path(mapping_path), replacement_mode=replacement_mode,
+                                     cluster=cluster)
     out_p = Path(out_path)
     out_p.parent.mkdir(parents=True, exist_ok=True)
     out_p.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -0,0 +1,43 @@
+from pathlib import Path
+import json
+
+from redactru.apply import apply_file, apply_file_stream
+from redactru.validate import build_candidates_document
+
+TXT = "СНИЛС 112-233-445 95; Тел: +7 (999) 123-45-67; г. Казань, ул. Ленина, д 5; Иванов И.И.\n" * 40
+
+def _doc(tmp_path: Path, shift: int = 0) -> Path:
+    raw = []
+    line = len(TXT) // 40
+    for k in range(40):
+        base = k * line
+        raw.append({"typ": "SNILS", "start": base + 6 + shift, "end": base + 20 + shift, "text": "112-233-445 95",
+                    "norm": "112-233-445 95", "score": 1.0, "meta": {"valid": True}})
+        raw.append({"typ": "PHONE", "start": base + 27, "end": base + 45, "text": "+7 (999) 123-45-67",
+                    "norm": "+79991234567", "score": 0.9, "meta": {}})
+        raw.append({"typ": "PER", "start": base + 76, "end": base + 87, "text": "Иванов И.И.", "score": 0.5, "meta": {}})
+    doc = build_candidates_document(raw, tmp_path / "mapping.json")
+    p = tmp_path / "candidates.json"
+    p.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+    return p
+
+def test_stream_equals_in_memory(tmp_path: Path):
+    src = tmp_path / "in.txt"
+    src.write_text(TXT, encoding="utf-8")
+    cand = _doc(tmp_path)
+    a_out, a_rep = apply_file(src, cand, tmp_path / "a.txt", tmp_path / "a.json")
+    b_out, b_rep = apply_file_stream(src, cand, tmp_path / "b.txt", tmp_path / "b.json", block=16)
+    assert a_out.read_text(encoding="utf-8") == b_out.read_text(encoding="utf-8")
+    ra = json.loads(a_rep.read_text(encoding="utf-8"))
+    rb = json.loads(b_rep.read_text(encoding="utf-8"))
+    assert ra["counts"] == rb["counts"]
+    key = lambda it: (it["start"], it["typ"])
+    assert sorted(ra["items"], key=key) == sorted(rb["items"], key=key)
+
+def test_stream_aligns_within_window(tmp_path: Path):
+    src = tmp_path / "in.txt"
+    src.write_text(TXT, encoding="utf-8")
+    cand = _doc(tmp_path, shift=7)
+    out, rep = apply_file_stream(src, cand, tmp_path / "b.txt", tmp_path / "b.json", block=32)
+    assert "112-233-445 95" not in out.read_text(encoding="utf-8")
+    assert all(it["ok_slice"] for it in json.loads(rep.read_text(encoding="utf-8"))["items"])
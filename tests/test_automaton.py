@@ -0,0 +1,71 @@
+from redactru.detect import detect_candidates
+from redactru.run import run_text
+from redactru.util.automaton import KnownEntityIndex, WordAutomaton
+from redactru.util.tokens import TokenManager
+
+
+def _tm(tmp_path, **keys):
+    tm = TokenManager(tmp_path / "mapping.json", autosave=False)
+    for typ, vals in keys.items():
+        for v in vals:
+            tm.get(typ, v)
+    return tm
+
+
+def test_word_automaton_overlapping_patterns():
+    ac = WordAutomaton()
+    a, b, c = ac.add(["ул", "ленина"]), ac.add(["ленина", "д", "5"]), ac.add(["д"])
+    got = sorted(ac.iter_matches(["ул", "ленина", "д", "5"]))
+    assert got == [(0, 2, a), (1, 4, b), (2, 3, c)]
+
+
+def test_surname_forms_and_capital_letter(tmp_path):
+    idx = KnownEntityIndex(_tm(tmp_path, PER=["петров а. с."]))
+    txt = "Письмо Петрову А.С.; копия Петровым. Петрова нет, а петрова слобода — нет."
+    hits = idx.find(txt)
+    assert [h.text for h in hits] == ["Петрову А.С.", "Петровым", "Петрова"]
+    assert {h.token for h in hits} == {"[PER_001]"}
+
+
+def test_phone_and_snils_formats(tmp_path):
+    idx = KnownEntityIndex(_tm(tmp_path, PHONE=["+79991234567"], SNILS=["11223344595"]))
+    txt = "т. 8 (999) 123-45-67, 999 1234567, +7-999-123-45-67; СНИЛС 112-233-445 95"
+    hits = idx.find(txt)
+    assert [(h.typ, h.text) for h in hits] == [
+        ("PHONE", "8 (999) 123-45-67"), ("PHONE", "999 1234567"),
+        ("PHONE", "+7-999-123-45-67"), ("SNILS", "112-233-445 95")]
+
+
+def test_namesakes_are_ambiguous(tmp_path):
+    idx = KnownEntityIndex(_tm(tmp_path, PER=["сидоров и. и.", "сидоров п. п."]))
+    hits = idx.find("Сидоров П.П. и просто Сидорову")
+    assert [(h.text, h.token) for h in hits] == [("Сидоров П.П.", "[PER_002]")]
+
+
+def test_refresh_picks_up_new_keys(tmp_path):
+    tm = _tm(tmp_path, ADDR=["ул ленина д 5"])
+    idx = KnownEntityIndex(tm)
+    assert [h.text for h in idx.find("ул. Ленина, д. 5")] == ["ул. Ленина, д. 5"]
+    assert idx.find("тел. 89991234567") == []
+    tm.get("PHONE", "+79991234567")
+    assert [h.typ for h in idx.find("тел. 89991234567")] == ["PHONE"]
+    assert idx.refresh() == 0
+
+
+def test_run_text_reuses_known_tokens(tmp_path):
+    tm = _tm(tmp_path, PER=["гусев и. и."], PHONE=["+79990000000", "+79991234567"])
+    idx = KnownEntityIndex(tm)
+    txt = "Позвонить Гусеву, номер 8 999 123 45 67."
+    cands = detect_candidates(txt, known=idx)
+    known = [c for c in cands if (c.meta or {}).get("known")]
+    assert [(c.typ, c.meta["token"]) for c in known] == [("PER", "[PER_001]"), ("PHONE", "[PHONE_002]")]
+    res = run_text(txt, tokens=tm, known=idx)
+    assert "[PHONE_002]" in res.text
+
+
+def test_number_followed_by_another_number(tmp_path):
+    # соседнее число через пробел не склеивается с известным номером
+    idx = KnownEntityIndex(_tm(tmp_path, PHONE=["+79991234567"], SNILS=["11223344595"]))
+    assert [h.text for h in idx.find("тел. 8 999 123-45-67 2 раза")] == ["8 999 123-45-67"]
+    assert [h.text for h in idx.find("СНИЛС 112-233-445 95 12.03.2020")] == ["112-233-445 95"]
+    assert [h.text for h in idx.find("исх. 15 +7 999 123 45 67")] == ["+7 999 123 45 67"]
@@ -0,0 +1,77 @@
+import re
+import threading
+import time
+
+import hybrid.aggregator as agg
+from hybrid.aggregator import HybridAnonymizer
+from hybrid.batching import NerBatcher
+from hybrid.ner_stanza import NerSpan
+
+
+class BatchNER:
+    """Фейковая модель с пакетным интерфейсом: фиксированная цена вызова + запись размеров пакетов."""
+    def __init__(self, *a, **k):
+        self.batches = []
+
+    def _one(self, text):
+        return [NerSpan(m.start(), m.end(), m.group(), "PER", 0.99) for m in re.finditer(r"Иван|Анна", text)]
+
+    def find(self, text):
+        return self._one(text)
+
+    def find_many(self, texts):
+        self.batches.append([len(t) for t in texts])
+        time.sleep(0.01)
+        return [self._one(t) for t in texts]
+
+
+DOCS = [f"Звонил Иван ({i}). Анна перезвонила через {i} минут. Конец." for i in range(24)]
+
+
+def test_concurrent_callers_share_batches():
+    model = BatchNER()
+    with NerBatcher(model, max_batch=32, max_wait_ms=20) as b:
+        results = [None] * len(DOCS)
+
+        def call(i):
+            results[i] = b.find(DOCS[i])
+
+        ts = [threading.Thread(target=call, args=(i,)) for i in range(len(DOCS))]
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join()
+        st = b.stats()
+    for doc, got in zip(DOCS, results):
+        assert [(s.start, s.end, s.text) for s in got] == [(s.start, s.end, s.text) for s in model._one(doc)]
+    assert st["sentences"] == 3 * len(DOCS)
+    assert st["batches"] < len(DOCS) and st["avg_batch"] > 3  # пакеты общие для запросов
+    assert all(bs == sorted(bs) and len(bs) <= 32 for bs in model.batches)
+    assert st["max_queue_depth"] >= 1
+
+
+def test_model_error_reaches_callers():
+    class Broken(BatchNER):
+        def find_many(self, texts):
+            raise RuntimeError("cuda oom")
+
+    b = NerBatcher(Broken(), max_wait_ms=1)
+    try:
+        b.find("Иван пришёл.")
+    except RuntimeError as e:
+        assert "oom" in str(e)
+    else:
+        raise AssertionError("error expected")
+    assert b.find("") == []
+    b.close()
+
+
+def test_hybrid_with_micro_batching(monkeypatch):
+    monkeypatch.setattr(agg, "StanzaNER", BatchNER)
+    az = HybridAnonymizer(device="cpu", batch_wait_ms=5)
+    plain = HybridAnonymizer(device="cpu")
+    for doc in DOCS[:3]:
+        assert [(s.start, s.end, s.type) for s in az.process(doc)] == \
+            [(s.start, s.end, s.type) for s in plain.process(doc)]
+    assert az.ner.stats()["batches"] >= 1
+    az.close()
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from redactru.util.cluster import cluster_keys
+from redactru.util.tokens import TokenManager
+from redactru.validate import build_candidates_document
+
+def _raw(typ, text, i):
+    return {"id": f"{typ}:{i}", "typ": typ, "start": i, "end": i + len(text), "text": text, "score": 0.5}
+
+def test_inflected_variants_share_token(tmp_path: Path):
+    raw = [_raw("PER", t, i * 20) for i, t in enumerate(["Иванов И.И.", "Иванова И.И.", "Иванову И.И.", "Иванов И.П."])]
+    doc = build_candidates_document(raw, tmp_path / "mapping.json")
+    reps = [it["replacement"] for it in doc["items"]]
+    assert reps[0] == reps[1] == reps[2] == "[PER_001]"
+    assert reps[3] == "[PER_002]"  # другие инициалы — другой кластер
+    off = build_candidates_document(raw, tmp_path / "raw.json", cluster=False)
+    assert len({it["replacement"] for it in off["items"]}) == 4
+
+def test_existing_token_is_kept(tmp_path: Path):
+    tm = TokenManager(tmp_path / "mapping.json", autosave=False)
+    tm.get("PER", "Петров А.А.")
+    tm.get("PER", "Сидорову П.П.")  # токен из прошлого прогона (ключ — исходный текст)
+    doc = build_candidates_document([_raw("PER", "Сидоров П.П.", 0), _raw("PER", "Сидорову П.П.", 20)], tokens=tm)
+    assert [it["replacement"] for it in doc["items"]] == ["[PER_002]", "[PER_002]"]
+
+def test_fuzzy_typos_and_address_numbers():
+    keys = cluster_keys([
+        ("PER", "Шмыглевскому А.Б."), ("PER", "Шмыглевский А.Б."), ("PER", "Шмыглевсккий А.Б."),
+        ("ADDR", "г. Казань, ул. Ленина, д. 5"), ("ADDR", "г Казань ул. Ленина д.5"),
+        ("ADDR", "г. Казань, ул. Ленина, д. 7"), ("PHONE", "+79991234567"),
+    ])
+    assert keys[0] == keys[1] == keys[2]
+    assert keys[3] == keys[4] != keys[5]
+    assert keys[6] == "+79991234567"
+
+def test_different_entities_stay_apart():
+    # одна-две правки между словарными фамилиями/улицами — разные люди и адреса
+    pairs = [("PER", "Иванов И.И.", "Иванцов И.И."), ("PER", "Петров П.П.", "Петраков П.П."),
+             ("ADDR", "ул. Мира, д. 5", "ул. Мирная, д. 5"), ("ADDR", "ул. Ленина, д. 5а", "ул. Ленина, д. 5б")]
+    for typ, a, b in pairs:
+        ka, kb = cluster_keys([(typ, a), (typ, b)])
+        assert ka != kb, (a, b)
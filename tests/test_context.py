@@ -0,0 +1,21 @@
+from redactru.util.context import ContextIndex
+from redactru.util.phones import _blocked_by_left_context
+from redactru.rules.regex_ru import _bad_left_context
+
+TXT = "СНИЛС: 112-233-445 95, договор №7-321-654-98-76; т.е.когда Иванов И.И. пришёл, ул. Ленина"
+
+def test_label_and_word_before_match_slicing():
+    ctx = ContextIndex(TXT)
+    for pos in range(len(TXT) + 1):
+        assert _blocked_by_left_context(TXT, pos, ctx) == _blocked_by_left_context(TXT, pos)
+        assert _bad_left_context(TXT, pos, ctx) == _bad_left_context(TXT, pos)
+    assert ctx.label_before(TXT.index("7-321")) == "договор"
+    assert ctx.word_before(TXT.index("Иванов")) == "когда"
+
+def test_marker_near_matches_substring_scan():
+    markers = {"ул", "ул.", "г.", "д", "пр-кт", "кв."}
+    ctx = ContextIndex(TXT, markers=markers)
+    for s in range(0, len(TXT), 3):
+        e = min(len(TXT), s + 5)
+        window = TXT[max(0, s - 24):s].lower() + TXT[e:e + 24].lower()
+        assert ctx.has_marker_near(s, e) == any(m in window for m in markers)
@@ -0,0 +1,110 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from redactru.filter import _candidate_lines, filter_stream, redact_window, redact_window_bytes
+from redactru.util.tokens import TokenManager
+from redactru.run import run_text
+
+LINES = [
+    "2026-10-19 12:00:01 INFO GET /api/v1/items/123456 status=200",
+    "2026-10-19 12:00:02 WARN callback +7 (999) 123-45-67 failed",
+    "2026-10-19 12:00:03 INFO snils=112-233-445 95 checked",
+    "2026-10-19 12:00:04 INFO договор № 8 999 765-43-21",
+    "2026-10-19 12:00:05 WARN retry 8 999 123 45 67",
+    "2026-10-19 12:00:06 INFO snils=112\xa0233\xa0445\xa095 tel=+7\xa0999\xa0765\xa043\xa021",
+]
+LOG = ("\n".join(LINES) + "\n").encode("utf-8")
+
+
+def _run(data: bytes, mapping: Path, **kw) -> bytes:
+    out = io.BytesIO()
+    filter_stream(io.BytesIO(data), out, mapping, **kw)
+    return out.getvalue()
+
+
+def test_prefilter_keeps_number_lines_only():
+    lines = [LOG[a:b].decode() for a, b in _candidate_lines(LOG)]
+    assert lines == LINES[1:]  # дата со временем и короткие числа — не кандидаты
+
+
+def test_byte_path_matches_text_pipeline(tmp_path: Path):
+    got = _run(LOG, tmp_path / "m.json", types=("SNILS", "PHONE")).decode().splitlines()
+    want = run_text(LOG.decode(), tmp_path / "ref.json").text.splitlines()
+    assert got == want
+    assert got[1].endswith("callback [PHONE_001] failed") and got[4].endswith("retry [PHONE_001]")
+    assert "[SNILS_001]" in got[2] and got[3] == LINES[3]  # номер договора — не телефон
+    assert got[5].endswith("snils=[SNILS_001] tel=[PHONE_002]")  # NBSP внутри номеров
+
+
+PHONE_FORMATS = [
+    "+7 999 123 45 67 доб. 12",
+    "+79991234567",
+    "8 (999) 123-45-67",
+    "+7 (999) 123-45-67 ext 345",
+    "+7\xa0999\xa0123\xa045\xa067",
+    "8\xa0999\xa0123-45-67 ДОБ.\xa012",
+    "999 123 45 67",
+    "СНИЛС 112\xa0233\xa0445\xa095, 112-233-445 96",
+]
+
+
+def test_byte_path_keys_match_text_path(tmp_path: Path):
+    buf = "".join(f"2026-10-19 12:00:{i:02d} call {f} done\n" for i, f in enumerate(PHONE_FORMATS)).encode()
+    tm_b = TokenManager(tmp_path / "b.json", autosave=False)
+    got, n = redact_window_bytes(buf, tm_b)
+    for types in (("SNILS", "PHONE"), ("SNILS", "PHONE", "ADDR")):
+        tm_t = TokenManager(tmp_path / "t.json", autosave=False)
+        want, m = redact_window(buf.decode(), tm_t, types)
+        assert got.decode() == want and n == m
+        assert tm_b.tokens == tm_t.tokens
+    # с добавочным — отдельный ключ (по тексту), как в validate
+    assert got.decode().splitlines()[0].endswith("call [PHONE_001] done")
+    assert "call [PHONE_002] done" in got.decode().splitlines()[2]
+
+
+def test_span_across_newline_is_redetected_per_line(tmp_path: Path):
+    # «\s*доб.» захватывает перевод строки: спан отбрасывается, но телефон в строке остаётся найденным
+    buf = "звонил 8 999 123 45 67\nдоб. 12 позже\n".encode()
+    tm_b = TokenManager(tmp_path / "b.json", autosave=False)
+    got, n = redact_window_bytes(buf, tm_b)
+    tm_t = TokenManager(tmp_path / "t.json", autosave=False)
+    want, m = redact_window(buf.decode(), tm_t, ("SNILS", "PHONE"))
+    assert want == got.decode() == "звонил [PHONE_001]\nдоб. 12 позже\n" and n == m == 1
+    assert tm_b.tokens == tm_t.tokens
+
+
+def test_tokens_stable_across_runs_and_small_windows(tmp_path: Path):
+    m = tmp_path / "m.json"
+    whole = _run(LOG, m, types=("SNILS", "PHONE", "PER"))
+    again = _run(LOG, m, types=("SNILS", "PHONE", "PER"), chunk_bytes=7)  # окна по одной строке
+    assert whole == again
+    assert "[PHONE_001]" in json.loads(m.read_text(encoding="utf-8"))["tokens"]["PHONE"].values()
+
+
+def test_text_path_keeps_lines(tmp_path: Path):
+    data = "Иванов Иван Петрович\nзвонил +7 999 123 45 67\nбез данных".encode()
+    out = _run(data, tmp_path / "m.json", types=("PHONE", "PER")).decode()
+    assert out.count("\n") == 2 and out.endswith("без данных")
+    assert out.splitlines()[1] == "звонил [PHONE_001]"
+
+
+def test_cli_flushes_each_line(tmp_path: Path):
+    env = {**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1] / "src")}
+    p = subprocess.Popen([sys.executable, "-m", "redactru.cli", "filter", "--mapping", str(tmp_path / "m.json")],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+    try:
+        for line in LINES[1:3]:
+            p.stdin.write((line + "\n").encode())
+            p.stdin.flush()
+            t0 = time.perf_counter()
+            got = p.stdout.readline().decode()  # ответ приходит до закрытия stdin
+            assert "[" in got and time.perf_counter() - t0 < 5
+    finally:
+        p.stdin.close()
+        p.wait(timeout=30)
+    assert json.loads((tmp_path / "m.json").read_text(encoding="utf-8"))["counters"]["PHONE"] == 1
@@ -0,0 +1,71 @@
+from pathlib import Path
+import pytest
+
+from redactru.detect import detect_candidates
+from redactru.rules import gazetteer
+from redactru.rules.gazetteer import (LOCALITY, REGION, STREET, Gazetteer, build_gazetteer,
+                                      iter_gazetteer_addresses, write_gazetteer)
+
+GAR_XML = """<?xml version="1.0" encoding="utf-8"?>
+<ADDRESSOBJECTS>
+  <OBJECT ID="1" NAME="Татарстан" TYPENAME="Респ" LEVEL="1" ISACTUAL="1" ISACTIVE="1" />
+  <OBJECT ID="2" NAME="Казань" TYPENAME="г" LEVEL="5" ISACTUAL="1" ISACTIVE="1" />
+  <OBJECT ID="3" NAME="Баумана" TYPENAME="ул" LEVEL="8" ISACTUAL="1" ISACTIVE="1" />
+  <OBJECT ID="4" NAME="Карла Маркса" TYPENAME="ул" LEVEL="8" ISACTUAL="1" ISACTIVE="1" />
+  <OBJECT ID="5" NAME="Мира" TYPENAME="ул" LEVEL="8" ISACTUAL="1" ISACTIVE="1" />
+  <OBJECT ID="6" NAME="Старая" TYPENAME="ул" LEVEL="8" ISACTUAL="0" ISACTIVE="0" />
+</ADDRESSOBJECTS>
+"""
+
+
+@pytest.fixture
+def gaz(tmp_path: Path):
+    src = tmp_path / "AS_ADDR_OBJ_16.XML"
+    src.write_text(GAR_XML, encoding="utf-8")
+    p = tmp_path / "gaz.bin"
+    assert build_gazetteer([src], p) == 5
+    g = Gazetteer.open(p)
+    yield g
+    g.close()
+
+
+def _raw(text, g):
+    return [a.raw for a in iter_gazetteer_addresses(text, gaz=g)]
+
+
+def test_build_from_gar_and_csv(gaz, tmp_path: Path):
+    assert gaz.get("Татарстан") == REGION and gaz.get("КАЗАНЬ") == LOCALITY
+    assert gaz.get("карла маркса") == STREET and gaz.get("Старая") is None
+    src = tmp_path / "streets.csv"
+    src.write_text("NAME;TYPENAME;LEVEL\nЁлочная;ул;8\nКазань;г;5\n", encoding="utf-8")
+    p = tmp_path / "csv.bin"
+    assert build_gazetteer([src], p) == 2
+    g = Gazetteer.open(p)
+    assert g.get("елочная") == STREET and g.stamp["sources"] == ["streets.csv"]
+    g.close()
+
+
+def test_street_with_house_and_locality(gaz):
+    txt = "Проживает: Татарстан, Казань, Карла Маркса 12/3, кв. 45. Позже — г. Казань, ул. Баумана, 7а."
+    assert _raw(txt, gaz) == ["Татарстан, Казань, Карла Маркса 12/3, кв. 45", "г. Казань, ул. Баумана, 7а"]
+
+
+def test_needs_house_number_and_evidence(gaz):
+    # нет номера дома; номер без метки и без населённого пункта; строчная буква
+    assert _raw("Мир и Мира много. На Баумана гуляли.", gaz) == []
+    assert _raw("Глава Мира 5 посвящена", gaz) == []
+    assert _raw("казань, баумана 5", gaz) == []
+    assert _raw("Мира, д. 5", gaz) == ["Мира, д. 5"]
+
+
+def test_detect_uses_loaded_gazetteer(tmp_path: Path):
+    p = tmp_path / "gaz.bin"
+    write_gazetteer({"Казань": LOCALITY, "Баумана": STREET}, p)
+    txt = "Адрес доставки: Казань, Баумана 5."
+    try:
+        assert gazetteer.load_gazetteer(tmp_path / "missing.bin") is None
+        assert [c.typ for c in detect_candidates(txt)] == []
+        assert gazetteer.load_gazetteer(p) is not None
+        assert [(c.typ, c.text) for c in detect_candidates(txt)] == [("ADDR", "Казань, Баумана 5")]
+    finally:
+        gazetteer.load_gazetteer(tmp_path / "missing.bin")
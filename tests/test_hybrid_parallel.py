@@ -0,0 +1,35 @@
+import re
+
+from hybrid.ner_stanza import NerSpan
+from hybrid.parallel import ShardedNER, shard_text
+
+
+class CapsNER:
+    """Фейковый NER: каждое слово с заглавной — PER (без stanza)."""
+    def find(self, text):
+        return [NerSpan(m.start(), m.end(), m.group(), "PER", 0.9) for m in re.finditer(r"[А-ЯЁ][а-яё]+", text)]
+
+
+def caps_factory():
+    return CapsNER()
+
+
+TXT = " ".join(f"Предложение номер {i} упоминает Иванова и Петрова." for i in range(60))
+
+
+def test_shards_cover_text_at_sentence_starts():
+    shards = shard_text(TXT, 300)
+    assert len(shards) > 5
+    assert "".join(ch for _, ch in shards) == TXT
+    for off, ch in shards[1:]:
+        assert ch.startswith("Предложение") and TXT[off:off + len(ch)] == ch
+
+
+def test_sharded_matches_single_process():
+    serial = CapsNER().find(TXT)
+    # fork: в тесте нет torch, а spawn заново поднимает интерпретатор с pytest
+    with ShardedNER(workers=2, shard_chars=500, factory=caps_factory, mp_context="fork") as ner:
+        sharded = ner.find(TXT)
+        many = ner.find_many([TXT, "Анна пришла."])
+    assert sharded == serial
+    assert many[0] == serial and [s.text for s in many[1]] == ["Анна"]
@@ -0,0 +1,65 @@
+from hybrid.aggregator import HybridAnonymizer
+from redactru.detect import detect_candidates
+from redactru.run import run_text
+from redactru.util.ids import is_valid_id, iter_id_spans
+
+TXT = ("Заказчик: ИНН 7707083893, ОГРН 1027700132195. ИП: ИНН 500100732259, ОГРНИП 304500116000157. "
+       "Карта 4111 1111 1111 1111, полис ОМС 1234 5678 9012 3456, паспорт серия 4510 № 123456. "
+       "Тел. 8 999 123-45-67.")
+
+
+def test_one_scan_classifies_all_types():
+    got = [(s.typ, s.digits, s.valid) for s in iter_id_spans(TXT)]
+    assert got == [
+        ("INN", "7707083893", True), ("OGRN", "1027700132195", True),
+        ("INN", "500100732259", True), ("OGRNIP", "304500116000157", True),
+        ("CARD", "4111111111111111", True), ("OMS", "1234567890123456", True),
+        ("PASSPORT", "4510123456", True),
+    ]
+
+
+def test_checksums_and_labels():
+    assert not is_valid_id("INN", "500100732258")
+    assert not is_valid_id("OGRN", "1027700132196")
+    # без метки — только с верной суммой; с меткой — и с неверной (valid=False)
+    assert list(iter_id_spans("номер 7707083894")) == []
+    bad = list(iter_id_spans("ИНН 7707083894"))
+    assert [(s.typ, s.valid) for s in bad] == [("INN", False)]
+    # паспорт и ОМС без метки не ищутся
+    assert list(iter_id_spans("код 45 10 123456")) == []
+
+
+def test_phone_keeps_priority_over_unlabelled_digits():
+    # 10 цифр с верной суммой ИНН, но без метки — это телефон, как раньше
+    cands = detect_candidates("Звоните: 7707083893.")
+    assert [c.typ for c in cands] == ["PHONE"]
+    cands = detect_candidates("ИНН: 7707083893.")
+    assert [(c.typ, c.norm, c.meta["valid"]) for c in cands] == [("INN", "7707083893", True)]
+
+
+def test_ids_flow_to_tokens(tmp_path):
+    res = run_text(TXT, tmp_path / "mapping.json")
+    for tok in ("[INN_001]", "[INN_002]", "[OGRN_001]", "[OGRNIP_001]", "[CARD_001]", "[OMS_001]",
+                "[PASSPORT_001]", "[PHONE_001]"):
+        assert tok in res.text
+    assert "4111" not in res.text
+    res = run_text("ИНН 7707083894", tmp_path / "mapping.json")
+    assert res.text == "ИНН 7707083894"  # неверная сумма — только на ручную проверку
+
+
+def test_hybrid_rules_profile_sees_ids():
+    out = HybridAnonymizer(profile="ru_regex_only").process(TXT)
+    assert {"INN", "OGRN", "OGRNIP", "CARD", "OMS", "PASSPORT"} <= {s.type for s in out}
+
+
+def test_unlabelled_card_needs_label_or_evidence(tmp_path):
+    txt = "Исх. № 1234567890128. Номер заказа 4111111111111111. Оплата 5469 3800 1234 5673."
+    spans = {s.raw: s for s in iter_id_spans(txt)}
+    assert [(s.valid, s.labelled, s.confirmed) for s in spans.values()] == [
+        (True, False, False), (True, False, False), (True, False, True)]
+    cands = [c for c in detect_candidates(txt) if c.typ == "CARD"]
+    assert [c.meta.get("review", False) for c in cands] == [True, True, False]
+    res = run_text(txt, tmp_path / "mapping.json")
+    assert "1234567890128" in res.text and "4111111111111111" in res.text
+    assert "5469" not in res.text  # IIN Mastercard и группы по 4 — карта
+    assert "4111111111111111" not in run_text("Карта: 4111111111111111", tmp_path / "m2.json").text
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from redactru.detect import detect_candidates, detect_file_mapped
+from redactru.util.mapped import ByteCharIndex
+from redactru.util.phones import iter_phone_spans_bytes
+
+def test_byte_char_index_roundtrip():
+    txt = "Жёлтый дом, ёлка; Tel: 8 999 123 45 67. " * 50
+    buf = txt.encode("utf-8")
+    idx = ByteCharIndex(buf, stride=64)
+    for c in (0, 1, 7, 40, 333, len(txt)):
+        b = idx.byte_at(c)
+        assert b == len(txt[:c].encode("utf-8"))
+        assert idx.char_at(b) == c
+
+def test_phone_bytes_ext_and_left_context():
+    buf = "Тел: +7 (999) 123-45-67 ДОБ. 12. Договор № 7-321-654-98-76.".encode("utf-8")
+    spans = list(iter_phone_spans_bytes(buf))
+    assert len(spans) == 1
+    assert spans[0].normalized == "+79991234567" and spans[0].ext == "12"
+    # регистр «доб» — по буквам, как в текстовом пути (там view в нижнем регистре); «o» — латинская
+    for ext in ("дОб.", "ДоБ", "дoб."):
+        (sp,) = iter_phone_spans_bytes(f"тел. 8 999 123 45 67 {ext} 7".encode("utf-8"))
+        assert sp.ext == "7", ext
+
+def test_detect_file_mapped_matches_text_mode(tmp_path: Path):
+    txt = ("Иванов: СНИЛС 112-233-445 95, тел. +7 (999) 123-45-67; Пётр — 8 912 000 11 22.\n"
+           "Тел: +7\xa0999\xa0123\xa045\xa067; СНИЛС 112\xa0233\xa0445\xa095; 8\u202f912\u2009000-11-23.")
+    p = tmp_path / "in.txt"
+    p.write_bytes(txt.encode("utf-8"))
+    got = detect_file_mapped(str(p))
+    ref = [c for c in detect_candidates(txt) if c.typ in ("SNILS", "PHONE")]
+    assert len(ref) == 6
+    assert [(c.typ, c.start, c.end, c.text) for c in got] == [(c.typ, c.start, c.end, c.text) for c in ref]
+    raw = p.read_bytes()
+    for c in got:
+        assert raw[c.meta["byte_start"]:c.meta["byte_end"]].decode("utf-8") == c.text
@@ -23,3 +23,16 @@ def test_petrovich_inflection():
 def test_gender_guess():
     assert guess_gender_from_token("Елена") in ("femn", None)
     assert guess_gender_from_token("Сергей") in ("masc", None)
+
+def test_document_lexicon_one_analysis_per_token(monkeypatch):
+    import redactru.nlp.lexicon as lx
+    from redactru.rules.regex_ru import iter_person_spans
+    calls = []
+    orig = lx.name_flags
+    monkeypatch.setattr(lx, "name_flags", lambda t: calls.append(t) or orig(t))
+    txt = "Иванов И.И. и Пётр Сидоров. " * 20
+    lex = lx.DocumentLexicon(txt)
+    spans = list(iter_person_spans(txt, lexicon=lex))
+    assert len(spans) >= 20
+    assert len(calls) == len(set(calls))  # каждый токен — ровно один раз
+    assert is_person_like("Сидоров", lexicon=lex) and detect_case("Сидоров", lexicon=lex) == "nomn"
@@ -0,0 +1,35 @@
+from pathlib import Path
+import pytest
+
+from redactru.nlp import morph
+from redactru.nlp.namelex import NAME, SURN, NameLexicon, current_stamp, write_name_lexicon
+
+@pytest.fixture
+def restore_lexicon(tmp_path: Path):
+    yield
+    morph.load_name_lexicon(tmp_path / "missing.bin")
+
+def test_artifact_roundtrip(tmp_path: Path):
+    p = tmp_path / "names.bin"
+    n = write_name_lexicon({"Иванов": SURN, "иванова": SURN, "Пётр": NAME, "Анна": NAME}, p)
+    lex = NameLexicon.open(p)
+    assert n == len(lex) == 4
+    assert lex.stamp == current_stamp()
+    assert lex.get("ИВАНОВА") == SURN and lex.get("петр") == NAME and lex.get("Сидоров") is None
+    lex.close()
+
+def test_predicates_use_artifact(tmp_path: Path, restore_lexicon):
+    p = tmp_path / "names.bin"
+    # «Стол» — словарное слово без Name; артефакт здесь «главнее» анализатора
+    write_name_lexicon({"стол": NAME}, p)
+    assert morph.load_name_lexicon(p) is not None
+    assert morph.is_name_token("Стол") and not morph.is_surname_token("Стол")
+    # словарное слово, которого нет в артефакте, — без граммем, без вызова parse()
+    assert not morph.is_surname_token("Иванов")
+
+def test_stale_artifact_ignored(tmp_path: Path, restore_lexicon):
+    p = tmp_path / "names.bin"
+    write_name_lexicon({"стол": NAME}, p, stamp={"format": 1, "dicts": "0.0"})
+    with pytest.warns(UserWarning):
+        assert morph.load_name_lexicon(p) is None
+    assert not morph.is_name_token("Стол")
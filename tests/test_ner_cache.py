@@ -0,0 +1,67 @@
+import re
+
+import hybrid.aggregator as agg
+from hybrid.aggregator import HybridAnonymizer
+from hybrid.ner_cache import CachedNER, NerCache
+from hybrid.ner_stanza import NerSpan
+
+TEMPLATE = "Прошу рассмотреть заявление Иванова. С уважением, Анна Петрова. "
+
+
+class CountingNER:
+    """Фейковый NER: PER по списку имён; считает символы, прошедшие через модель."""
+    model_id = "caps-v1"
+
+    def __init__(self, *a, **k):
+        self.chars = 0
+
+    def find(self, text):
+        self.chars += len(text)
+        return [NerSpan(m.start(), m.end(), m.group(), "PER", 0.9)
+                for m in re.finditer(r"Иванова?|Анна|Петрова|Сидорову", text)]
+
+
+def test_cached_find_matches_model_and_skips_hits(tmp_path):
+    ner = CountingNER()
+    cached = CachedNER(ner, NerCache(tmp_path / "c.sqlite"))
+    doc = TEMPLATE + "Позвоните Сидорову."
+    first = cached.find(doc)
+    assert [(s.start, s.end, s.text) for s in first] == \
+        [(s.start, s.end, s.text) for s in CountingNER().find(doc)]
+    used = ner.chars
+    again = cached.find(TEMPLATE * 3 + "Позвоните Сидорову.")  # нормализация пробелов
+    assert ner.chars == used  # все предложения из кеша — модель не вызывалась
+    assert [s.text for s in again].count("Иванова") == 3
+    st = cached.cache.stats()
+    assert st["misses"] == 3 and st["hits"] == 7 and st["entries"] == 3
+    cached.close()
+
+    # кеш на диске переживает процесс; другая модель — другие ключи
+    cache = NerCache(tmp_path / "c.sqlite")
+    assert len(cache) == 3
+    other = CountingNER()
+    CachedNER(other, cache, model_id="caps-v2").find(TEMPLATE)
+    assert other.chars > 0 and len(cache) == 5
+
+
+def test_lru_eviction(tmp_path):
+    cache = NerCache(tmp_path / "c.sqlite", max_entries=10)
+    cached = CachedNER(CountingNER(), cache)
+    cached.find("Первое Иванов. ")
+    for i in range(12):
+        cached.find(f"Первое Иванов. Предложение {i}.")  # «Первое…» всё время используется
+    assert len(cache) <= 10 and cache.evictions > 0
+    before = cache.hits
+    cached.find("Первое Иванов.")
+    assert cache.hits == before + 1  # горячая запись не вытеснена
+
+
+def test_hybrid_process_with_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(agg, "StanzaNER", CountingNER)
+    az = HybridAnonymizer(device="cpu", ner_cache=tmp_path / "c.sqlite")
+    a = az.process(TEMPLATE)
+    used = az.ner.ner.chars
+    b = az.process(TEMPLATE)
+    assert az.ner.ner.chars == used
+    assert [(s.start, s.end, s.type) for s in a] == [(s.start, s.end, s.type) for s in b]
+    az.close()
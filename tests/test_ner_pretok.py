@@ -0,0 +1,84 @@
+import re
+import sys
+from types import SimpleNamespace
+
+import hybrid.aggregator as agg
+from hybrid.aggregator import HybridAnonymizer
+from hybrid.ner_stanza import NerSpan, StanzaNER, razdel_chunks
+
+NAMES = {"Иван", "Петров", "Анна"}
+TXT = " ".join(f"Вчера  Иван Петров ({i}) звонил Анне. Анна перезвонила." for i in range(40))
+
+
+class FakePipeline:
+    """stanza.Pipeline для pretokenized-входа: PER — подряд идущие токены из NAMES."""
+    calls = []
+
+    def __init__(self, **kw):
+        assert kw["tokenize_pretokenized"] is True
+        self.kw = kw
+
+    def __call__(self, sents):
+        FakePipeline.calls.append(sum(len(t) for s in sents for t in s))
+        out = []
+        for toks in sents:
+            ents, i = [], 0
+            while i < len(toks):
+                j = i
+                while j < len(toks) and toks[j] in NAMES:
+                    j += 1
+                if j > i:
+                    tk = [SimpleNamespace(id=(k + 1,)) for k in range(i, j)]
+                    ents.append(SimpleNamespace(tokens=tk, type="PER"))
+                    i = j
+                else:
+                    i += 1
+            out.append(SimpleNamespace(ents=ents))
+        return SimpleNamespace(sentences=out)
+
+
+def _fake_stanza(monkeypatch):
+    FakePipeline.calls = []
+    monkeypatch.setitem(sys.modules, "stanza", SimpleNamespace(Pipeline=FakePipeline))
+
+
+def test_razdel_chunks_bounded_and_offsets():
+    chunks = list(razdel_chunks(TXT, 300))
+    assert len(chunks) > 5
+    sent_len = max(s[-1][1] - s[0][0] for c in chunks for s in c)
+    for c in chunks:
+        assert c[-1][-1][1] - c[0][0][0] <= 300 + sent_len
+        for sent in c:
+            for a, b, t in sent:
+                assert TXT[a:b] == t
+
+
+def test_pretokenized_find_maps_offsets(monkeypatch):
+    _fake_stanza(monkeypatch)
+    ner = StanzaNER(device="cpu", use_gpu=False, chunk_chars=500)
+    spans = ner.find(TXT)
+    assert len(FakePipeline.calls) > 3  # документ ушёл в stanza кусками
+    assert max(FakePipeline.calls) < 500
+    assert [s.text for s in spans[:2]] == ["Иван Петров", "Анна"] and len(spans) == 80
+    assert all(TXT[s.start:s.end] == s.text for s in spans)
+    assert ner.model_id.endswith(";razdel")
+
+
+class NamesNER:
+    def __init__(self, *a, **k):
+        pass
+
+    def find(self, text):
+        return [NerSpan(m.start(), m.end(), m.group(), "PER", 0.99) for m in re.finditer(r"Иван|Анна", text)]
+
+
+def test_iter_process_streams_same_spans(monkeypatch):
+    monkeypatch.setattr(agg, "StanzaNER", NamesNER)
+    az = HybridAnonymizer(device="cpu")
+    whole = az.process(TXT)
+    parts = list(az.iter_process(TXT, chunk_chars=400))
+    assert len(parts) > 3
+    streamed = [s for p in parts for s in p]
+    assert [(s.start, s.end, s.type, s.text) for s in streamed] == \
+        [(s.start, s.end, s.type, s.text) for s in whole]
+    assert all(TXT[s.start:s.end] == s.text for s in streamed)
@@ -0,0 +1,68 @@
+import os
+import warnings
+from pathlib import Path
+
+import pytest
+
+from hybrid.ner_stanza import quant_cache_path, quantize_module
+
+try:
+    import torch
+    from torch import nn
+
+    class Tiny(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.lstm = nn.LSTM(8, 8, batch_first=True)
+            self.out = nn.Linear(8, 3)
+
+        def forward(self, x):
+            return self.out(self.lstm(x)[0])
+except ImportError:
+    torch = None
+
+
+class Planted:
+    """Пикл, исполняющий код при загрузке: так выглядела бы подмена кеша."""
+
+    def __reduce__(self):
+        return (Path.touch, (Path(os.environ["PLANTED_MARK"]),))
+
+
+def test_cache_key_follows_model_file(tmp_path: Path):
+    m = tmp_path / "ner.pt"
+    m.write_bytes(b"x")
+    a = quant_cache_path(str(m), tmp_path / "cache")
+    assert a == quant_cache_path(str(m), tmp_path / "cache")
+    m.write_bytes(b"xy")  # другая модель — другой кеш
+    assert a != quant_cache_path(str(m), tmp_path / "cache")
+
+
+@pytest.mark.skipif(torch is None, reason="torch not installed")
+def test_quantize_module_and_cache(tmp_path: Path):
+    model = Tiny().eval()
+    x = torch.randn(2, 5, 8)
+    cache = tmp_path / "q.pt"
+    q = quantize_module(model, cache)
+    assert cache.exists()
+    assert "quantized" in type(q.out).__module__ and "quantized" in type(q.lstm).__module__
+    q2 = quantize_module(Tiny().eval(), cache)  # из кеша: веса первой модели
+    assert torch.allclose(q(x), q2(x))
+    assert (q(x) - model(x)).abs().max() < 0.1
+
+
+@pytest.mark.skipif(torch is None, reason="torch not installed")
+def test_cache_is_not_unpickled(tmp_path: Path, monkeypatch):
+    mark = tmp_path / "pwned"
+    monkeypatch.setenv("PLANTED_MARK", str(mark))
+    cache = tmp_path / "q.pt"
+    torch.save({"model": Planted()}, cache)
+    with pytest.warns(UserWarning, match="ignored"):
+        q = quantize_module(Tiny().eval(), cache)
+    assert not mark.exists()
+    assert "quantized" in type(q.out).__module__
+    # кеш перезаписан state_dict-ом и дальше грузится без предупреждений
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", UserWarning)
+        warnings.filterwarnings("ignore", message=".*deprecated.*")
+        quantize_module(Tiny().eval(), cache)
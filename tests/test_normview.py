@@ -0,0 +1,43 @@
+from redactru.registry import run_detectors
+from redactru.rules.regex_ru import iter_address_spans
+from redactru.util.normview import NormalizedText, fold_key
+
+TXT = "Адрес:\t\tг. Казань,   ул.  Ленина, Д. 5\n\nтел.  +7 (999)  123-45-67"
+
+
+def test_offset_map_round_trip():
+    v = NormalizedText(TXT)
+    assert "  " not in v.norm and "\t" not in v.norm and "\n\n" in v.norm
+    for j, ch in enumerate(v.norm):
+        i = v.to_orig(j)
+        assert v.to_norm(i) == j
+        if ch != " ":
+            assert TXT[i].lower() == ch
+    assert v.to_orig(len(v.norm)) == len(TXT)
+    assert v.to_norm(len(TXT)) == len(v.norm)
+
+
+def test_homoglyphs_folded_only_in_cyrillic_words():
+    v = NormalizedText("Ул. Лeнина, snils, ext 12")   # «e» — латинская
+    assert v.norm == "ул. ленина, snils, ext 12"
+
+
+def test_address_case_and_whitespace_insensitive():
+    spans = list(iter_address_spans(TXT))
+    assert len(spans) == 1
+    a = spans[0]
+    assert a.raw == TXT[a.start:a.end]
+    assert a.raw.startswith("г. Казань") and a.raw.endswith("Д. 5")
+    upper = list(iter_address_spans("Г. КАЗАНЬ, УЛ. ЛЕНИНА, Д. 5"))
+    assert [s.raw for s in upper] == ["Г. КАЗАНЬ, УЛ. ЛЕНИНА, Д. 5"]
+
+
+def test_phone_offsets_and_homoglyph_label():
+    spans = run_detectors(TXT, types=("PHONE",))
+    assert [TXT[s.start:s.end] for s in spans] == ["+7 (999)  123-45-67"]
+    # «СНИЛС» с латинской «C» — всё равно метка, номер не телефон
+    assert run_detectors("CНИЛC: 8 999 123 45 67", types=("PHONE",)) == []
+
+
+def test_fold_key():
+    assert fold_key("Ул.\tЛeнина\n д 5") == fold_key("ул. ленина д 5") == "ул. ленина д 5"
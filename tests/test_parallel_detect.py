@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from redactru.cli import app
+from redactru.detect import detect_candidates, detect_file
+from redactru.parallel import detect_file_parallel, detect_parallel, plan_shards
+from redactru.registry import run_detectors
+from redactru.util.spans import resolve_by_components, resolve_overlaps
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "examples"
+CORPUS = EXAMPLES / "ambiguous_narrative_ru.txt"
+
+
+def test_plan_shards_tiles_text_on_paragraphs():
+    data = CORPUS.read_bytes()
+    shards = plan_shards(data, 1000, 100)
+    assert len(shards) > 10
+    assert shards[0].cs == 0 and shards[-1].ce == len(data)
+    for a, b in zip(shards, shards[1:]):
+        assert a.ce == b.cs and data[b.cs - 1:b.cs] == b"\n"
+    for sh in shards:
+        assert sh.ws <= sh.cs < sh.ce <= sh.we
+        assert sh.cs == 0 or sh.cs - sh.ws >= 100
+
+
+def test_resolve_by_components_matches_resolve_overlaps():
+    spans = run_detectors(CORPUS.read_text(encoding="utf-8"))
+    assert resolve_by_components(spans) == resolve_overlaps(spans)
+
+
+@pytest.mark.parametrize("shard_bytes,overlap", [(300, 64), (2000, 500)])
+def test_parallel_identical_to_serial(shard_bytes, overlap):
+    text = CORPUS.read_text(encoding="utf-8")
+    # адрес через границу шардов и телефон с меткой в конце предыдущего абзаца
+    text += "\n\nРеспублика Татарстан, г. Казань,\n\nпр-кт Победы, д 1. Договор №\n\n8 999 123 45 67"
+    assert detect_parallel(text, workers=2, shard_bytes=shard_bytes, overlap_bytes=overlap) == \
+        detect_candidates(text)
+
+
+def test_file_parallel_and_cli(tmp_path: Path):
+    assert detect_file_parallel(CORPUS, workers=2, shard_bytes=4000) == detect_file(str(CORPUS))
+    out = tmp_path / "raw.json"
+    r = CliRunner().invoke(app, ["detect", str(CORPUS), "-o", str(out), "--workers", "2"])
+    assert r.exit_code == 0, r.output
+    assert out.read_text(encoding="utf-8").count('"typ"') == len(detect_file(str(CORPUS)))
@@ -0,0 +1,48 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from redactru.cli import app
+from redactru.detect import detect_candidates
+from redactru.prefork import PreforkPool
+
+pytestmark = pytest.mark.skipif(sys.platform != "linux", reason="fork и /proc — только Linux")
+
+TEXTS = [
+    "Позвонить Иванову И.И. по тел. +7 (999) 123-45-67.",
+    "СНИЛС 112-233-445 95, г. Казань, ул. Ленина, д. 5.",
+    "Без персональных данных.",
+]
+
+
+def test_pool_matches_serial_detect():
+    with PreforkPool(2) as pool:
+        got = pool.map(TEXTS)
+        assert len(pool.pids) == 2 and os.getpid() not in pool.pids
+    assert got == [[c.to_dict() for c in detect_candidates(t)] for t in TEXTS]
+
+
+def test_memory_report_shares_parent_pages():
+    with PreforkPool(2) as pool:
+        pool.map(TEXTS)
+        rep = pool.memory_report()
+    assert rep["parent"] is not None and len(rep["workers"]) == 2
+    for m in rep["workers"]:
+        assert m.shared_kb > 0 and m.rss_kb >= m.private_kb
+        assert m.pss_kb < m.rss_kb  # часть страниц делится с родителем и соседями
+    assert rep["workers_shared_kb"] == sum(m.shared_kb for m in rep["workers"])
+
+
+def test_cli_pool(tmp_path: Path):
+    files = []
+    for i, t in enumerate(TEXTS):
+        p = tmp_path / f"doc{i}.txt"
+        p.write_text(t, encoding="utf-8")
+        files.append(str(p))
+    r = CliRunner().invoke(app, ["pool", *files, "-o", str(tmp_path / "out"), "--workers", "2"])
+    assert r.exit_code == 0, r.output
+    assert "shared" in r.output
+    assert (tmp_path / "out" / "doc1.json").exists()
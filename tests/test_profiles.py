@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import pytest
+
+import hybrid.aggregator as agg
+from hybrid.aggregator import HybridAnonymizer, SpanList
+from hybrid.profiles import Profile, get_profile
+
+
+class FakeClock:
+    """Часы для бюджета: время идёт только по advance()."""
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+    def advance(self, seconds):
+        self.t += seconds
+
+
+CLOCK = FakeClock()
+
+
+class SlowNER:
+    """Фейковый NER: PER на каждом «Иван», 1 мс на 100 символов (по CLOCK)."""
+    def __init__(self, *a, **k):
+        self.seen = []
+
+    def find(self, text):
+        self.seen.append(len(text))
+        CLOCK.advance(len(text) / 100_000)
+        i, out = text.find("Иван "), []
+        while i >= 0:
+            out.append(SimpleNamespace(start=i, end=i + 4, text="Иван", label="PER", prob=1.0))
+            i = text.find("Иван ", i + 1)
+        return out
+
+
+TXT = "Звонил Иван Петров. Тел: +7 (999) 123-45-67. " * 100
+# скоринг на фейковых часах бесплатен: без резерва под него
+RATES = {"ner": 100_000.0, "regex": 350_000.0, "score": float("inf")}
+
+
+def test_regex_only_profile_needs_no_ner(monkeypatch):
+    monkeypatch.setattr(agg, "StanzaNER", lambda *a, **k: pytest.fail("NER must not load"))
+    az = HybridAnonymizer(profile="ru_regex_only")
+    spans = az.process("Тел: +7 (999) 123-45-67. Иванов И.И. пришёл.")
+    assert isinstance(spans, SpanList) and not spans.degraded
+    assert {s.type for s in spans} == {"PHONE", "PER"}
+
+
+def _budget_az(monkeypatch, budget_ms, **kw):
+    monkeypatch.setattr(agg, "StanzaNER", SlowNER)
+    prof = Profile("t", stages=("regex", "ner"), budget_ms=budget_ms, rates=dict(RATES),
+                   thresholds={"PHONE": 0.3, "PER": 0.6}, **kw)
+    return HybridAnonymizer(device="cpu", profile=prof, clock=CLOCK)
+
+
+def test_budget_truncates_ner_at_sentence(monkeypatch):
+    az = _budget_az(monkeypatch, 15.0)
+    spans = az.process(TXT)
+    assert spans.degraded and "ner" in spans.truncated
+    n = spans.truncated["ner"]
+    assert 1400 < n <= 1500 and TXT[:n].endswith(". ")   # 15 мс × 100 000 символов/с
+    per = [s for s in spans if s.type == "PER"]
+    assert per and max(s.end for s in per) <= n
+    assert sum(s.type == "PHONE" for s in spans) == 100  # дешёвые этапы — по всему тексту
+
+
+def test_budget_charges_earlier_stages_and_scoring(monkeypatch):
+    az = _budget_az(monkeypatch, 15.0)
+    regex = az._stage_regex
+
+    def slow_regex(*a):
+        CLOCK.advance(0.010)  # regex занял 10 мс из 15
+        return regex(*a)
+
+    monkeypatch.setattr(az, "_stage_regex", slow_regex)
+    n = az.process(TXT).truncated["ner"]
+    assert 400 < n <= 500
+    # резерв под скоринг ~1 мс из оставшихся 5
+    az._rates["score"] = len(TXT) / 0.001
+    n2 = az.process(TXT).truncated["ner"]
+    assert 300 < n2 <= 400
+
+
+def test_budget_skip_and_no_budget(monkeypatch):
+    az = _budget_az(monkeypatch, 0.0, on_budget="skip")
+    spans = az.process(TXT)
+    assert spans.degraded and spans.skipped_stages == ("ner",)
+    spans = HybridAnonymizer(device="cpu", clock=CLOCK).process(TXT)  # ru_hybrid: без бюджета
+    assert not spans.degraded and spans.profile == "ru_hybrid"
+
+
+def test_unknown_profile_and_stage():
+    with pytest.raises(ValueError):
+        get_profile("nope")
+    with pytest.raises(ValueError):
+        Profile("x", stages=("ocr",))
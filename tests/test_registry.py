@@ -0,0 +1,33 @@
+import redactru.registry as reg
+from hybrid.aggregator import HybridAnonymizer
+from hybrid.normalizers import normalize_phone, snils_checksum_ok
+from redactru.detect import detect_candidates
+from redactru.registry import run_detectors
+
+TXT = "СНИЛС 112-233-445 95. Тел: +7 (999) 123-45-67. Иванов И.И. живёт: г. Казань, ул. Ленина, д. 5."
+
+
+def test_one_scan_shared_by_detect_and_hybrid(monkeypatch):
+    calls = []
+    for typ, fn in list(reg.DETECTORS.items()):
+        monkeypatch.setitem(reg.DETECTORS, typ, lambda t, c, fn=fn, typ=typ: calls.append(typ) or fn(t, c))
+    spans = run_detectors(TXT)
+    assert sorted(calls) == ["ADDR", "ID", "PER", "PHONE", "SNILS"]
+
+    cands = detect_candidates(TXT, spans=spans)
+    out = HybridAnonymizer(profile="ru_regex_only").process(TXT, extra_regex_spans=spans)
+    assert len(calls) == 5  # ни detect, ни hybrid не сканировали текст повторно
+    assert [(c.typ, c.start, c.end) for c in cands] == [(c.typ, c.start, c.end) for c in detect_candidates(TXT)]
+    assert {s.type for s in out} == {"SNILS", "PHONE", "PER", "ADDR"}
+
+
+def test_hybrid_uses_registry_without_extra_spans():
+    out = HybridAnonymizer(profile="ru_regex_only").process(TXT)
+    phones = [s for s in out if s.type == "PHONE"]
+    assert phones and phones[0].meta["normalized"] == "+79991234567"
+
+
+def test_normalizers_match_redactru():
+    assert normalize_phone("8 (999) 123-45-67") == "+79991234567"
+    assert snils_checksum_ok("112-233-445 95")
+    assert not snils_checksum_ok("000-000-000 00")
@@ -0,0 +1,36 @@
+from pathlib import Path
+import json
+
+from redactru.run import run_text, run_file
+from redactru.util.tokens import TokenManager
+
+TXT = "СНИЛС 112-233-445 95; Тел: +7 (999) 123-45-67; г. Казань, ул. Ленина, д 5; Иванов И.И."
+
+def test_run_text_in_memory(tmp_path: Path):
+    mapping = tmp_path / "mapping.json"
+    res = run_text(TXT, mapping)
+    assert "[SNILS_001]" in res.text and "[PHONE_001]" in res.text
+    # ADDR/PER по умолчанию не применяются
+    assert "г. Казань" in res.text
+    assert res.report["counts"]["total"] == len(res.document["items"]) == len(res.candidates)
+    data = json.loads(mapping.read_text(encoding="utf-8"))
+    assert data["counters"]["PHONE"] == 1
+
+def test_run_text_apply_types_and_shared_tokens(tmp_path: Path):
+    tm = TokenManager(tmp_path / "mapping.json", autosave=False)
+    res = run_text(TXT, tokens=tm, apply_types=["PHONE", "ADDR"])
+    assert "[ADDR_" in res.text and "[PHONE_" in res.text
+    assert "112-233-445 95" in res.text  # SNILS не в списке типов
+    assert not (tmp_path / "mapping.json").exists()  # сохраняет вызывающий
+    tm.save()
+    assert (tmp_path / "mapping.json").exists()
+
+def test_run_file_with_dump(tmp_path: Path):
+    src = tmp_path / "in.txt"
+    src.write_text(TXT, encoding="utf-8")
+    out_p, rep_p = run_file(src, tmp_path / "out.txt", tmp_path / "report.json",
+                            tmp_path / "mapping.json", dump_dir=tmp_path / "dump")
+    assert "[PHONE_001]" in out_p.read_text(encoding="utf-8")
+    assert json.loads(rep_p.read_text(encoding="utf-8"))["source_path"]
+    assert (tmp_path / "dump" / "candidates_raw.json").exists()
+    assert (tmp_path / "dump" / "candidates.json").exists()
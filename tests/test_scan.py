@@ -0,0 +1,57 @@
+from redactru.scan import iter_files, ranked_paths, scan_buffer, scan_paths, write_manifest
+
+DOC = (
+    "Сотрудник Петр Иванов, СНИЛС 112-233-445 95 (второй раз: 11223344595).\n"
+    "Тел. +7 (999) 123-45-67, доб. 12; рабочий 8 843 555 12 34.\n"
+    "Адрес: Республика Татарстан, г.Казань, ул. Баумана, дом 5, кв. 7.\n"
+)
+LOG = "2026-10-19 12:00:01 INFO GET /api/v1/items/1234567890123 status=200\n" * 50
+
+
+def test_signals():
+    st = scan_buffer(DOC.encode())
+    assert (st.snils, st.phones) == (2, 2)
+    assert st.addr_markers == 5          # Республика, г., ул., дом, кв.; «Адрес» не маркер
+    assert st.cap_bigrams == 2           # «Петр Иванов», «Республика Татарстан»
+    assert st.density > 0
+
+
+def test_capitalized_markers_with_letter_s():
+    # «с» и «Ё» после снятия ведущих байт — один байт 0x81: «с» не должна становиться «ё»
+    for txt in ("д. 5, стр. 2", "д. 5, Стр. 2", "Д. 5, СТР. 2", "дом 5 Строение 2"):
+        assert scan_buffer(txt.encode()).addr_markers == 2, txt
+
+
+def test_clean_log_has_no_signals():
+    st = scan_buffer(LOG.encode())
+    assert (st.snils, st.phones, st.addr_markers, st.cap_bigrams) == (0, 0, 0, 0)
+    assert st.density == 0
+
+
+def test_sentence_start_and_block_boundaries():
+    txt = "Вчера было тихо. Иван Петров пришёл.\nМосква Сити\n" * 3
+    assert scan_buffer(txt.encode()).cap_bigrams == 0
+    data = (DOC * 40).encode()
+    a, b = scan_buffer(data, block_bytes=100), scan_buffer(data)
+    assert (a.snils, a.phones, a.addr_markers, a.cap_bigrams) == (b.snils, b.phones, b.addr_markers, b.cap_bigrams)
+
+
+def test_max_bytes_extrapolates():
+    data = (DOC * 100).encode()
+    full, part = scan_buffer(data), scan_buffer(data, max_bytes=len(data) // 4)
+    assert part.scanned_bytes < len(data)
+    assert abs(part.est_entities - full.est_entities) / full.est_entities < 0.1
+
+
+def test_manifest_ranked(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "dense.txt").write_text(DOC * 5, encoding="utf-8")
+    (tmp_path / "sparse.txt").write_text(LOG + DOC, encoding="utf-8")
+    (tmp_path / "sub" / "clean.log").write_text(LOG, encoding="utf-8")
+    paths = list(iter_files([tmp_path]))
+    assert len(paths) == 3
+    stats = scan_paths(paths, workers=2)
+    write_manifest(stats, tmp_path / "m.csv")
+    ranked = ranked_paths(tmp_path / "m.csv")
+    assert [p.rsplit("/", 1)[-1] for p in ranked] == ["dense.txt", "sparse.txt"]
+    assert len(ranked_paths(tmp_path / "m.csv", min_density=-1)) == 3
@@ -0,0 +1,96 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+import redactru.sqlite as rsql
+from redactru.cli import app
+from redactru.run import run_text
+from redactru.sqlite import anonymize_sqlite, read_checkpoint
+
+NOTES = [
+    "Позвонить по тел. +7 (999) 123-45-67.",
+    "Без персональных данных.",
+    "СНИЛС 112-233-445 95, тел. 8 999 765-43-21.",
+    None,
+    "Повторно: +7 (999) 123-45-67.",
+]
+
+
+def _make_db(path: Path) -> Path:
+    con = sqlite3.connect(str(path))
+    con.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT, extra TEXT)")
+    con.executemany("INSERT INTO notes (id, body, extra) VALUES (?, ?, ?)",
+                    [(i * 10, t, "тел. 8 916 000-11-22" if i == 1 else None) for i, t in enumerate(NOTES)])
+    con.commit()
+    con.close()
+    return path
+
+
+def _rows(path: Path):
+    con = sqlite3.connect(str(path))
+    try:
+        return con.execute("SELECT id, body, extra FROM notes ORDER BY id").fetchall()
+    finally:
+        con.close()
+
+
+def _expected(tmp_path: Path):
+    m = tmp_path / "expected.json"
+    out = []
+    for i, t in enumerate(NOTES):
+        body = run_text(t, m).text if t else t
+        extra = run_text("тел. 8 916 000-11-22", m).text if i == 1 else None
+        out.append((i * 10, body, extra))
+    return out
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sqlite_matches_text_pipeline(tmp_path: Path, workers):
+    db = _make_db(tmp_path / "n.db")
+    stats = anonymize_sqlite(db, "notes", ["body", "extra"], tmp_path / "m.json", key="id",
+                             batch_rows=2, workers=workers)
+    assert stats.rows == 5 and stats.last_key == 40
+    assert stats.updated == 4  # без замен — только строка 30
+    got = _rows(db)
+    assert got == _expected(tmp_path)  # те же тексты и токены, что у run_text по порядку ключей
+    assert got[0][1] == "Позвонить по тел. [PHONE_001]."
+    assert got[4][1] == "Повторно: [PHONE_001]."
+    assert got[3] == (30, None, None)
+
+
+def test_sqlite_resumes_from_checkpoint(tmp_path: Path, monkeypatch):
+    db = _make_db(tmp_path / "n.db")
+    calls = []
+    real = rsql._detect_many
+
+    def flaky(texts):
+        calls.append(len(calls))
+        if len(calls) == 2:
+            raise RuntimeError("boom")
+        return real(texts)
+
+    monkeypatch.setattr(rsql, "_detect_many", flaky)
+    with pytest.raises(RuntimeError):
+        anonymize_sqlite(db, "notes", ["body"], tmp_path / "m.json", batch_rows=2)
+    con = sqlite3.connect(str(db))
+    assert read_checkpoint(con, "notes", ["body"]) == (10, 2)  # ключ последней строки первого пакета
+    con.close()
+    assert _rows(db)[2][1] == NOTES[2]  # второй пакет не записан
+
+    monkeypatch.setattr(rsql, "_detect_many", real)
+    stats = anonymize_sqlite(db, "notes", ["body"], tmp_path / "m.json", batch_rows=2)
+    assert stats.rows == 3  # только оставшиеся строки
+    assert "[SNILS_001]" in _rows(db)[2][1]
+
+    stats = anonymize_sqlite(db, "notes", ["body"], tmp_path / "m.json", batch_rows=2)
+    assert stats.rows == 0  # всё уже обработано
+
+
+def test_cli_sqlite(tmp_path: Path):
+    db = _make_db(tmp_path / "n.db")
+    r = CliRunner().invoke(app, ["sqlite", str(db), "-t", "notes", "-c", "body",
+                                 "--mapping", str(tmp_path / "m.json")])
+    assert r.exit_code == 0, r.output
+    assert "rows: 5" in r.output and "rows/s" in r.output
@@ -0,0 +1,56 @@
+from pathlib import Path
+import json
+
+import redactru.nlp.surrogates as sg
+from redactru.nlp.surrogates import SurrogateTables, surrogate_key, CASES
+from redactru.run import run_text
+
+POOL = {"masc": [("Борис", "Попов", "Андреевич")], "femn": [("Галина", "Попова", "Андреевна")]}
+
+def test_tables_cover_all_cases_and_genders():
+    t = SurrogateTables.build(POOL)
+    for g in ("masc", "femn"):
+        for role in ("first", "last", "middle"):
+            assert set(t.tables[g][0][role]) == set(CASES)
+    assert t.form("masc", 0, "last", "ablt") in ("Поповым", "Попов")  # no-op без petrovich
+
+def test_render_keeps_shape_case_and_gender():
+    t = SurrogateTables.build(POOL)
+    assert t.render("Иванов И.И.", 1) == "Попов Б.А."
+    assert t.render("И. И. Иванову", 1) == "Б. А. Попову"
+    assert t.render("Петром Сидоровым", 1) == "Борисом Поповым"
+    assert t.render("Сидоровой Анной Петровной", 1) == "Поповой Галиной Андреевной"
+    assert surrogate_key("Петра Сидорова") == surrogate_key("Пётр Сидоров")
+
+def test_tables_cached_on_disk(tmp_path: Path, monkeypatch):
+    p = tmp_path / "tables.json"
+    t1 = SurrogateTables.load(p, POOL)
+    assert json.loads(p.read_text(encoding="utf-8"))["stamp"] == t1.stamp
+    monkeypatch.setattr(sg, "_INFLECT", None)  # повторная загрузка не склоняет
+    t2 = SurrogateTables.load(p, POOL)
+    assert t2.tables == t1.tables
+
+def test_run_surrogate_mode(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("REDACTRU_SURROGATE_TABLES", str(tmp_path / "tables.json"))
+    monkeypatch.setattr(sg, "_tables", None)
+    txt = "Документы передал Пётр Сидоров. Позже звонили Иванову И.И., а Иванов И.И. ответил."
+    res = run_text(txt, tmp_path / "mapping.json", apply_types=["PER"], replacement_mode="surrogate")
+    per = [it for it in res.document["items"] if it["typ"] == "PER"]
+    assert [it["meta"]["token"] for it in per] == ["[PER_001]", "[PER_002]", "[PER_002]"]
+    assert "Сидоров" not in res.text and "Иванов" not in res.text
+    assert "Алексей Смирнов" in res.text
+    assert "Кузнецову А.П." in res.text and "Кузнецов А.П. ответил" in res.text
+
+def test_more_people_than_pool_rows():
+    t = SurrogateTables.build(sg.POOL)
+    n = len(sg.POOL["masc"])
+    rows = {tuple(sorted(t.identity(i).items())) for i in range(t.capacity())}
+    assert len(rows) == t.capacity() == n ** 3 and t.identity(n ** 3) is None
+    assert t.identity(3) == {"last": 3, "first": 3, "middle": 3}  # первые n — строки пула
+    full = [t.render("Петром Сидоровым", k) for k in range(1, 3 * n + 1)]
+    assert None not in full and len(set(full)) == len(full)
+    # одна фамилия различима только у первых n; дальше — токен, а не чужой суррогат
+    assert t.render("Сидоров", n) is not None and t.render("Сидоров", n + 1) is None
+    assert sg.render_surrogate("Сидоров", f"[PER_{n + 1:03d}]", t) == f"[PER_{n + 1:03d}]"
+    short = [sg.render_surrogate("Иванов И.И.", f"[PER_{k:03d}]", t) for k in range(1, 3 * n + 1)]
+    assert len(set(short)) == len(short)
@@ -0,0 +1,83 @@
+import csv
+import json
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from redactru.cli import app
+from redactru.run import run_text
+from redactru.table import anonymize_table, parse_columns
+from redactru.util.phones import normalize_phone_array, _normalize, _only_digits
+from redactru.util.snils import is_valid_snils, valid_snils_array
+
+ROWS = [
+    ["id", "snils", "phone", "comment"],
+    ["1", "112-233-445 95", "8 (999) 123-45-67", "Звонил Иванов И.И."],
+    ["2", "112-233-445 96", "+7 999 123 45 67", ""],
+    ["3", "11223344595", "нет", "СНИЛС 112-233-445 95"],
+    ["4", "", "9161234567"],
+]
+
+
+def _write(p: Path, rows, delimiter=","):
+    with p.open("w", encoding="utf-8", newline="") as f:
+        csv.writer(f, delimiter=delimiter).writerows(rows)
+
+
+def _read(p: Path, delimiter=","):
+    with p.open("r", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f, delimiter=delimiter))
+
+
+def test_vectorized_rules_match_scalar():
+    values = ["112-233-445 95", "112-233-445 96", "000-000-000 00", "1122334459", "112233445950",
+              "8 999 123 45 67", "+7 (999) 123-45-67", "79991234567", "99912345", "", "abc",
+              "１１２２３３４４５９５", "+7 ９９９ 123 45 67", "８ ９９９ １２３ ４５ ６７"]
+    assert valid_snils_array(values).tolist() == [is_valid_snils(v) for v in values]
+    assert normalize_phone_array(values) == [_normalize(_only_digits(v)) for v in values]
+
+
+@pytest.mark.parametrize("batch_rows", [1, 2, 1000])
+def test_table_columns_and_batches(tmp_path: Path, batch_rows):
+    src, out = tmp_path / "in.csv", tmp_path / "out.csv"
+    _write(src, ROWS)
+    cols = parse_columns(["snils=snils", "phone=PHONE", "comment=text"])
+    stats = anonymize_table(src, out, cols, tmp_path / "mapping.json", batch_rows=batch_rows)
+    got = _read(out)
+    assert got[0] == ROWS[0]
+    assert [r[1] for r in got[1:]] == ["[SNILS_001]", "112-233-445 96", "[SNILS_001]", ""]
+    assert [r[2] for r in got[1:]] == ["[PHONE_001]", "[PHONE_001]", "нет", "[PHONE_002]"]
+    assert got[3][3] == "СНИЛС [SNILS_001]"  # тот же ключ, что и в текстовом конвейере
+    assert stats.rows == 4
+    assert stats.columns["snils"] == {"replaced": 2, "invalid": 1, "empty": 1}
+    assert stats.columns["phone"] == {"replaced": 3, "invalid": 1, "empty": 0}
+
+
+def test_table_shares_mapping_with_text_pipeline(tmp_path: Path):
+    src, out = tmp_path / "in.tsv", tmp_path / "out.tsv"
+    _write(src, ROWS[:2], delimiter="\t")
+    mapping = tmp_path / "mapping.json"
+    anonymize_table(src, out, {"phone": "phone"}, mapping)
+    assert _read(out, delimiter="\t")[1][2] == "[PHONE_001]"
+    assert run_text("Тел: +7 999 123-45-67", mapping).text == "Тел: [PHONE_001]"
+    assert json.loads(mapping.read_text(encoding="utf-8"))["counters"]["PHONE"] == 1
+
+
+def test_bad_columns(tmp_path: Path):
+    with pytest.raises(ValueError):
+        parse_columns(["snils=inn"])
+    src = tmp_path / "in.csv"
+    _write(src, ROWS)
+    with pytest.raises(ValueError):
+        anonymize_table(src, tmp_path / "out.csv", {"nope": "snils"}, tmp_path / "m.json")
+
+
+def test_cli_table(tmp_path: Path):
+    src, out = tmp_path / "in.csv", tmp_path / "out.csv"
+    _write(src, ROWS)
+    r = CliRunner().invoke(app, ["table", str(src), "-o", str(out), "-c", "snils=snils",
+                                 "--mapping", str(tmp_path / "m.json")])
+    assert r.exit_code == 0, r.output
+    assert "snils: replaced=2 invalid=1 empty=1" in r.output
+    assert _read(out)[1][1] == "[SNILS_001]"